@@ -4,6 +4,7 @@ import kappadata.common
 import kappadata.copying
 import kappadata.datasets
 import kappadata.loading
+import kappadata.streaming
 import kappadata.transforms
 import kappadata.wrappers
 
@@ -1 +1,5 @@
+from .disk_cached_dataset import DiskCachedDataset
+from .read_ahead_buffer import ReadAheadBuffer
 from .shared_dict_dataset import SharedDictDataset
+from .shared_memory_cache import SharedMemoryCache
+from .shared_memory_dataset import SharedMemoryDataset
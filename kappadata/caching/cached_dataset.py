@@ -23,6 +23,12 @@ class CachedDataset(Dataset):
             return getattr(super(), item)
         return getattr(self.dataset, item)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.dispose()
+
     def _cached_getitem(self, index):
         raise NotImplementedError
 
@@ -0,0 +1,183 @@
+import hashlib
+import os
+import pickle
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from kappadata.utils.file_lock import FileLock
+from .cached_dataset import CachedDataset
+
+
+class DiskCachedDataset(CachedDataset):
+    """
+    caches samples on a (node-local) disk such that a restarted job can reuse the warm cache
+    the size of the cache is limited to num_bytes where samples are evicted with the CLOCK algorithm
+    layout of cache_dir:
+    - index.npy: header rows (total bytes, clock hand, hits, misses, fingerprint) followed by (size, reference bit)
+      per sample
+    - samples/<idx // 1000>/<idx>.pkl: pickled samples
+    - lock: lock file to synchronize inserts/evictions between processes
+    the index is a memory-mapped file that is shared between all processes
+    an existing cache is only reused if its fingerprint matches the dataset (see get_fingerprint)
+    changes that are not part of the fingerprint (e.g. transforms of a dataset without __repr__) require to change
+    version (e.g. version="v2")
+    NOTE: hit/miss counters are approximate when multiple processes access the cache concurrently
+    """
+    _HEADER_ROWS = 3
+    _FINGERPRINT_ROW = 2
+
+    def __init__(self, dataset, cache_dir, num_bytes, version=None, **kwargs):
+        super().__init__(dataset=dataset, **kwargs)
+        assert isinstance(num_bytes, int) and 0 < num_bytes
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.num_bytes = num_bytes
+        self.version = version
+        fingerprint = self.get_fingerprint(dataset, version=version)
+        self._lock = FileLock(self.cache_dir / "lock")
+        self._index = None
+
+        # reuse existing cache (e.g. after a job was preempted) or create a new one
+        index_path = self.cache_dir / "index.npy"
+        with self._lock:
+            if index_path.exists():
+                index = np.load(index_path, mmap_mode="r")
+                if (
+                        index.shape == (len(dataset) + self._HEADER_ROWS, 2)
+                        and index.dtype == np.int64
+                        and np.array_equal(index[self._FINGERPRINT_ROW], fingerprint)
+                ):
+                    self.logger.info(f"reusing disk cache '{self.cache_dir}' ({index[0, 0]} bytes cached)")
+                    return
+                self.logger.info(f"index of disk cache '{self.cache_dir}' doesn't match dataset -> clearing cache")
+                del index
+            samples_dir = self.cache_dir / "samples"
+            if samples_dir.exists():
+                shutil.rmtree(samples_dir)
+            samples_dir.mkdir(parents=True)
+            index = np.lib.format.open_memmap(
+                index_path,
+                mode="w+",
+                dtype=np.int64,
+                shape=(len(dataset) + self._HEADER_ROWS, 2),
+            )
+            index[:] = 0
+            index[self._FINGERPRINT_ROW] = fingerprint
+            index.flush()
+            del index
+
+    @staticmethod
+    def get_fingerprint(dataset, version=None):
+        """
+        128bit hash of the dataset type, length, root (if the dataset has a root attribute), repr (if the dataset
+        implements __repr__, e.g. torchvision datasets include root and transforms) and the user-defined version
+        """
+        dataset_type = type(dataset)
+        parts = [f"{dataset_type.__module__}.{dataset_type.__qualname__}", str(len(dataset)), str(version)]
+        root = getattr(dataset, "root", None)
+        if root is not None:
+            parts.append(str(root))
+        # default repr contains the memory address and builtin containers would repr all samples
+        if dataset_type.__repr__ is not object.__repr__ and not isinstance(dataset, (list, tuple, dict)):
+            parts.append(repr(dataset))
+        digest = hashlib.sha256("\n".join(parts).encode("utf-8")).digest()
+        return np.frombuffer(digest[:16], dtype=np.int64).copy()
+
+    def __getstate__(self):
+        # memory-mapped index is reopened in worker processes (pickling a np.memmap copies its content)
+        state = dict(self.__dict__)
+        state["_index"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = np.load(self.cache_dir / "index.npy", mmap_mode="r+")
+        return self._index
+
+    @property
+    def num_cached_bytes(self):
+        return int(self.index[0, 0])
+
+    @property
+    def hits(self):
+        return int(self.index[1, 0])
+
+    @property
+    def misses(self):
+        return int(self.index[1, 1])
+
+    def _sample_path(self, idx):
+        return self.cache_dir / "samples" / str(idx // 1000) / f"{idx}.pkl"
+
+    def _cached_getitem(self, idx):
+        row = idx + self._HEADER_ROWS
+        if self.index[row, 0] > 0:
+            try:
+                with open(self._sample_path(idx), "rb") as f:
+                    sample = pickle.load(f)
+                self.index[row, 1] = 1
+                self.index[1, 0] += 1
+                return sample
+            except FileNotFoundError:
+                # sample was evicted by another process
+                pass
+        self.index[1, 1] += 1
+        sample = self.dataset[idx]
+        self._put(idx, sample)
+        return sample
+
+    def _put(self, idx, sample):
+        data = pickle.dumps(sample, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.num_bytes:
+            return
+        # write to temporary file outside of lock (rename is atomic)
+        path = self._sample_path(idx)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        row = idx + self._HEADER_ROWS
+        with self._lock:
+            if self.index[row, 0] > 0:
+                # cached concurrently by another process
+                os.remove(tmp_path)
+                return
+            self._evict(len(data))
+            os.replace(tmp_path, path)
+            self.index[row] = len(data), 1
+            self.index[0, 0] += len(data)
+
+    def _evict(self, num_bytes):
+        """ CLOCK eviction until num_bytes fit into the cache (has to be called while holding the lock) """
+        index = self.index
+        num_samples = len(index) - self._HEADER_ROWS
+        hand = int(index[0, 1])
+        while index[0, 0] + num_bytes > self.num_bytes:
+            # find occupied slots in chunks to avoid iterating over empty slots in python
+            chunk_end = min(hand + 4096, num_samples)
+            chunk = index[self._HEADER_ROWS + hand:self._HEADER_ROWS + chunk_end]
+            for offset in np.flatnonzero(chunk[:, 0] > 0):
+                row = self._HEADER_ROWS + hand + offset
+                if index[row, 1] == 1:
+                    # second chance
+                    index[row, 1] = 0
+                    continue
+                size = index[row, 0]
+                self._sample_path(hand + int(offset)).unlink(missing_ok=True)
+                index[row, 0] = 0
+                index[0, 0] -= size
+                if index[0, 0] + num_bytes <= self.num_bytes:
+                    chunk_end = hand + int(offset) + 1
+                    break
+            hand = chunk_end % num_samples
+        index[0, 1] = hand
+
+    def dispose(self):
+        if self._index is not None:
+            self._index.flush()
+            self._index = None
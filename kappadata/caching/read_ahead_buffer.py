@@ -0,0 +1,126 @@
+import os
+import threading
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+
+class ReadAheadBuffer:
+    """
+    bounded ring buffer in shared memory for raw bytes of samples that will be loaded soon
+    samples are written by a single process (e.g. ReadAheadSampler in the main process) and read lock-free by
+    all dataloader worker processes
+    - positions in the ring are absolute (monotonically increasing) byte positions (ring offset = position % size)
+    - writers first advance the write head and afterwards overwrite the data of older samples
+      -> a reader copies the data and then checks that the write head didn't reach the copied region in the meantime
+    - slot of a sample is invalidated before it is rewritten and readers check that the slot didn't change
+    """
+    _HEADER_SIZE = 3
+    _WRITE_HEAD = 0
+    _HITS = 1
+    _MISSES = 2
+
+    def __init__(self, num_slots, num_bytes):
+        super().__init__()
+        assert isinstance(num_slots, int) and 0 < num_slots
+        assert isinstance(num_bytes, int) and 0 < num_bytes
+        self.num_slots = num_slots
+        self.num_bytes = num_bytes
+        self._shm = SharedMemory(create=True, size=8 * self._HEADER_SIZE + 16 * num_slots + num_bytes)
+        self._is_owner = True
+        self._pid = os.getpid()
+        # reserving space is only done by threads of the writing process
+        self._write_lock = threading.Lock()
+        self._create_views()
+        self._header[:] = 0
+        # slots: (position, length) with position=-1 for samples that are not in the buffer
+        self._slots[:, 0] = -1
+        self._slots[:, 1] = 0
+
+    def _create_views(self):
+        buf = self._shm.buf
+        offset = 0
+        self._header = np.ndarray(shape=(self._HEADER_SIZE,), dtype=np.int64, buffer=buf, offset=offset)
+        offset += self._header.nbytes
+        self._slots = np.ndarray(shape=(self.num_slots, 2), dtype=np.int64, buffer=buf, offset=offset)
+        offset += self._slots.nbytes
+        self._ring = np.ndarray(shape=(self.num_bytes,), dtype=np.uint8, buffer=buf, offset=offset)
+
+    def __getstate__(self):
+        # only required for the "spawn" start method (with "fork" the mapped memory is inherited)
+        return dict(name=self._shm.name, num_slots=self.num_slots, num_bytes=self.num_bytes)
+
+    def __setstate__(self, state):
+        self.num_slots = state["num_slots"]
+        self.num_bytes = state["num_bytes"]
+        self._shm = SharedMemory(name=state["name"])
+        self._is_owner = False
+        self._pid = None
+        self._write_lock = threading.Lock()
+        self._create_views()
+
+    def __contains__(self, key):
+        position = self._slots[key, 0]
+        return position != -1 and self._header[self._WRITE_HEAD] <= position + self.num_bytes
+
+    @property
+    def hits(self):
+        return int(self._header[self._HITS])
+
+    @property
+    def misses(self):
+        return int(self._header[self._MISSES])
+
+    @property
+    def write_head(self):
+        return int(self._header[self._WRITE_HEAD])
+
+    def put(self, key, data):
+        """ stores data (bytes) for key; returns False if data is larger than the buffer """
+        assert self._pid == os.getpid(), "ReadAheadBuffer can only be written by the process that created it"
+        length = len(data)
+        if length > self.num_bytes:
+            return False
+        with self._write_lock:
+            # invalidate old slot before the data is overwritten
+            self._slots[key, 0] = -1
+            position = int(self._header[self._WRITE_HEAD])
+            # samples are stored contiguously -> skip the end of the ring if the sample doesn't fit
+            if position % self.num_bytes + length > self.num_bytes:
+                position += self.num_bytes - position % self.num_bytes
+            # advance write head before writing (invalidates all samples that are overwritten)
+            self._header[self._WRITE_HEAD] = position + length
+        # copy without holding the lock (multiple threads can write into their reserved regions)
+        offset = position % self.num_bytes
+        self._ring[offset:offset + length] = np.frombuffer(data, dtype=np.uint8)
+        self._slots[key, 1] = length
+        self._slots[key, 0] = position
+        return True
+
+    def get(self, key, default=None):
+        """ returns a copy of the bytes of key or default if key is not (or no longer) in the buffer """
+        position, length = self._slots[key].tolist()
+        if position != -1:
+            offset = position % self.num_bytes
+            data = self._ring[offset:offset + length].tobytes()
+            # check that neither the sample nor the region it was stored in was overwritten while copying
+            if (
+                    self._slots[key, 0] == position
+                    and self._slots[key, 1] == length
+                    and self._header[self._WRITE_HEAD] <= position + self.num_bytes
+            ):
+                # counters are only statistics -> races between worker processes are acceptable
+                self._header[self._HITS] += 1
+                return data
+        self._header[self._MISSES] += 1
+        return default
+
+    def dispose(self):
+        if self._shm is None:
+            return
+        # numpy views have to be released before the shared memory can be closed
+        self._header = self._slots = self._ring = None
+        self._shm.close()
+        if self._is_owner:
+            self._shm.unlink()
+        self._shm = None
@@ -0,0 +1,140 @@
+import multiprocessing
+import pickle
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from torch.utils.data import get_worker_info
+
+
+class SharedMemoryCache:
+    """
+    cache that stores pickled objects in a preallocated shared memory arena that can be read/written by all
+    dataloader worker processes without going through a broker process (as multiprocessing.Manager does)
+    the arena consists of:
+    - header: heap pointer
+    - hit/miss counters: one row per process (main process + dataloader workers) -> counting requires no lock
+      the counters are approximate: processes that share a row (dataloader workers with id >= 63 or workers of
+      multiple dataloaders that use the same cache concurrently) can lose increments
+    - slot table: offset/length/state per key (keys are integers in [0, num_slots))
+    - byte heap: append-only storage for the pickled objects (objects that don't fit anymore are not cached)
+    reads are lock-free, only reserving space in the heap requires a lock
+    """
+    _EMPTY = 0
+    _WRITING = 1
+    _READY = 2
+
+    _HEADER_SIZE = 1
+    _HEAP_POINTER = 0
+    # row 0 is the main process, row i + 1 is dataloader worker i
+    # worker ids are per dataloader -> workers >= 63 or concurrent dataloaders share rows (counts are approximate)
+    _NUM_COUNTER_ROWS = 64
+    _HITS = 0
+    _MISSES = 1
+
+    def __init__(self, num_slots, num_bytes, multiprocessing_context=None):
+        super().__init__()
+        assert isinstance(num_slots, int) and 0 < num_slots
+        assert isinstance(num_bytes, int) and 0 < num_bytes
+        self.num_slots = num_slots
+        self.num_bytes = num_bytes
+        # int64 header/counters/slot table + uint8 states/heap (int64 arrays first for alignment)
+        self._shm = SharedMemory(create=True, size=self._get_shm_size(num_slots=num_slots, num_bytes=num_bytes))
+        self._is_owner = True
+        # lock has to be created with the same start method as the dataloader workers (e.g. "spawn")
+        self._lock = multiprocessing.get_context(multiprocessing_context).Lock()
+        self._create_views()
+        self._header[:] = 0
+        self._counters[:] = 0
+        self._states[:] = self._EMPTY
+
+    @staticmethod
+    def _get_shm_size(num_slots, num_bytes):
+        num_int64s = SharedMemoryCache._HEADER_SIZE + 2 * SharedMemoryCache._NUM_COUNTER_ROWS + 2 * num_slots
+        return 8 * num_int64s + num_slots + num_bytes
+
+    def _create_views(self):
+        buf = self._shm.buf
+        offset = 0
+        self._header = np.ndarray(shape=(self._HEADER_SIZE,), dtype=np.int64, buffer=buf, offset=offset)
+        offset += self._header.nbytes
+        self._counters = np.ndarray(shape=(self._NUM_COUNTER_ROWS, 2), dtype=np.int64, buffer=buf, offset=offset)
+        offset += self._counters.nbytes
+        self._slots = np.ndarray(shape=(self.num_slots, 2), dtype=np.int64, buffer=buf, offset=offset)
+        offset += self._slots.nbytes
+        self._states = np.ndarray(shape=(self.num_slots,), dtype=np.uint8, buffer=buf, offset=offset)
+        offset += self._states.nbytes
+        self._heap = np.ndarray(shape=(self.num_bytes,), dtype=np.uint8, buffer=buf, offset=offset)
+
+    def __getstate__(self):
+        # only required for the "spawn" start method (with "fork" the mapped memory is inherited)
+        return dict(name=self._shm.name, num_slots=self.num_slots, num_bytes=self.num_bytes, lock=self._lock)
+
+    def __setstate__(self, state):
+        self.num_slots = state["num_slots"]
+        self.num_bytes = state["num_bytes"]
+        self._lock = state["lock"]
+        self._shm = SharedMemory(name=state["name"])
+        self._is_owner = False
+        self._create_views()
+
+    def __len__(self):
+        return int((self._states == self._READY).sum())
+
+    def __contains__(self, key):
+        return self._states[key] == self._READY
+
+    @property
+    def hits(self):
+        return int(self._counters[:, self._HITS].sum())
+
+    @property
+    def misses(self):
+        return int(self._counters[:, self._MISSES].sum())
+
+    def _get_counter_row(self):
+        worker_info = get_worker_info()
+        if worker_info is None:
+            return 0
+        return 1 + worker_info.id % (self._NUM_COUNTER_ROWS - 1)
+
+    @property
+    def num_used_bytes(self):
+        return int(self._header[self._HEAP_POINTER])
+
+    def get(self, key, default=None):
+        if self._states[key] != self._READY:
+            self._counters[self._get_counter_row(), self._MISSES] += 1
+            return default
+        self._counters[self._get_counter_row(), self._HITS] += 1
+        offset, length = self._slots[key]
+        return pickle.loads(self._heap[offset:offset + length])
+
+    def put(self, key, obj):
+        """ returns True if obj was cached and False if key is already cached or the heap is full """
+        if self._states[key] != self._EMPTY:
+            return False
+        data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        # reserve space in the heap
+        with self._lock:
+            if self._states[key] != self._EMPTY:
+                return False
+            offset = int(self._header[self._HEAP_POINTER])
+            if offset + len(data) > self.num_bytes:
+                return False
+            self._header[self._HEAP_POINTER] = offset + len(data)
+            self._slots[key] = offset, len(data)
+            self._states[key] = self._WRITING
+        # copy data without holding the lock (other processes can concurrently write into their reserved space)
+        self._heap[offset:offset + len(data)] = np.frombuffer(data, dtype=np.uint8)
+        self._states[key] = self._READY
+        return True
+
+    def dispose(self):
+        if self._shm is None:
+            return
+        # numpy views have to be released before the shared memory can be closed
+        self._header = self._counters = self._slots = self._states = self._heap = None
+        self._shm.close()
+        if self._is_owner:
+            self._shm.unlink()
+        self._shm = None
@@ -0,0 +1,43 @@
+from .cached_dataset import CachedDataset
+from .shared_memory_cache import SharedMemoryCache
+
+_MISSING = object()
+
+
+class SharedMemoryDataset(CachedDataset):
+    """
+    caches samples in a preallocated shared memory arena of size num_bytes
+    in contrast to SharedDictDataset, worker processes read/write the cache directly instead of sending each sample
+    through a multiprocessing.Manager process (which becomes a bottleneck with many workers)
+    samples that don't fit into the arena anymore are loaded from the underlying dataset every time
+    """
+
+    def __init__(self, dataset, num_bytes, multiprocessing_context=None, **kwargs):
+        super().__init__(dataset=dataset, **kwargs)
+        self.cache = SharedMemoryCache(
+            num_slots=len(dataset),
+            num_bytes=num_bytes,
+            multiprocessing_context=multiprocessing_context,
+        )
+
+    @property
+    def hits(self):
+        return self.cache.hits
+
+    @property
+    def misses(self):
+        return self.cache.misses
+
+    def _cached_getitem(self, idx):
+        sample = self.cache.get(idx, default=_MISSING)
+        if sample is _MISSING:
+            sample = self.dataset[idx]
+            self.cache.put(idx, sample)
+        return sample
+
+    def dispose(self):
+        self.logger.info(
+            f"disposing cache (hits={self.hits} misses={self.misses} "
+            f"used_bytes={self.cache.num_used_bytes}/{self.cache.num_bytes})"
+        )
+        self.cache.dispose()
@@ -1 +1,4 @@
+from .kd_decoded_image_folder import KDDecodedImageFolder
 from .kd_image_folder import KDImageFolder
+from .kd_packed_image_folder import KDPackedImageFolder
+from .kd_zip_image_folder import KDZipImageFolder
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import numpy as np
+
+from kappadata.datasets.kd_dataset import KDDataset
+
+
+class KDDecodedImageFolder(KDDataset):
+    """
+    dataset for image folders that were decoded with kappadata.copying.create_decoded.create_decoded_imagefolder
+    getitem_x returns a zero-copy view (uint8 numpy array with shape (height, width, 3)) into the memory-mapped file
+    -> transforms have to handle numpy arrays (e.g. via PIL.Image.fromarray or torch.from_numpy)
+    """
+
+    def __init__(self, root, transform=None, **kwargs):
+        super().__init__(**kwargs)
+        self.root = Path(root).expanduser()
+        assert (self.root / "x.npy").exists(), f"'{self.root}' was not created by create_decoded_imagefolder"
+        self.transform = transform
+        self.offsets = np.load(self.root / "offsets.npy")
+        self.sizes = np.load(self.root / "sizes.npy")
+        self.classes = np.load(self.root / "classes.npy")
+        with open(self.root / "class_names.txt") as f:
+            self.class_names = f.read().split("\n")
+        self._x = None
+
+    def __getstate__(self):
+        # memory-mapped array is reopened in worker processes (pickling a np.memmap copies its content)
+        state = dict(self.__dict__)
+        state["_x"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    @property
+    def x(self):
+        if self._x is None:
+            self._x = np.load(self.root / "x.npy", mmap_mode="r")
+        return self._x
+
+    def getitem_x(self, idx, ctx=None):
+        offset = self.offsets[idx]
+        height, width = self.sizes[idx]
+        x = self.x[offset:offset + height * width * 3].reshape(height, width, 3)
+        if self.transform is not None:
+            x = self.transform(x, ctx=ctx)
+        return x
+
+    # noinspection PyUnusedLocal
+    def getitem_class(self, idx, ctx=None):
+        return int(self.classes[idx])
+
+    def getall_class(self):
+        return self.classes.tolist()
+
+    def getshape_class(self):
+        return len(self.class_names),
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def dispose(self):
+        self._x = None
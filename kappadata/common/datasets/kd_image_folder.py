@@ -1,7 +1,13 @@
+from functools import partial
+from pathlib import Path
+
 from torchvision.datasets import ImageFolder
 from torchvision.datasets.folder import default_loader
 
 from kappadata.datasets.kd_dataset import KDDataset
+from kappadata.loading.draft import draft_loader
+from kappadata.loading.image_folder import raw_image_to_pil
+from kappadata.loading.image_folder_index import ImageFolderIndex
 
 
 class KDImageFolder(KDDataset):
@@ -12,28 +18,93 @@ class KDImageFolder(KDDataset):
             target_transform=None,
             loader=default_loader,
             is_valid_file=None,
+            use_index=False,
+            index_path=None,
+            draft_size=None,
+            read_ahead_buffer=None,
+            local_root=None,
     ):
         super().__init__()
-        self.dataset = ImageFolder(
-            root=root,
-            target_transform=target_transform,
-            loader=loader,
-            is_valid_file=is_valid_file,
-        )
         self.transform = transform
+        self.draft_size = draft_size
+        # raw bytes of samples that were read ahead (see kappadata.samplers.ReadAheadSampler)
+        if read_ahead_buffer is not None:
+            assert loader == default_loader, "read_ahead_buffer requires the default loader"
+        self.read_ahead_buffer = read_ahead_buffer
+        if draft_size is not None:
+            # decode JPEGs with reduced size (shorter side >= draft_size) if the final output is much smaller
+            # NOTE: draft_size should be chosen such that crops are not upsampled (e.g. for a
+            # KDRandomResizedCrop(size=224, scale=(0.25, 1.0)) draft_size=448 avoids upsampling)
+            assert loader == default_loader, "draft_size requires the default loader"
+            loader = partial(draft_loader, draft_size=draft_size)
+        if local_root is not None:
+            # samples are loaded from local_root if they were already copied (e.g. by a BackgroundCopier)
+            assert use_index, "local_root requires use_index=True"
+            local_root = Path(local_root).expanduser()
+        self.local_root = local_root
+        if use_index:
+            # load persisted index (paths/classes) instead of walking the whole directory in every process
+            self.root = Path(root).expanduser()
+            self.loader = loader
+            self.dataset = None
+            self.index = ImageFolderIndex.load_or_create(
+                root=self.root,
+                index_path=index_path,
+                is_valid_file=is_valid_file,
+                log_fn=self.logger.info,
+            )
+        else:
+            assert index_path is None
+            self.index = None
+            self.dataset = ImageFolder(
+                root=root,
+                target_transform=target_transform,
+                loader=loader,
+                is_valid_file=is_valid_file,
+            )
+
+    def get_relative_path(self, idx):
+        if self.index is None:
+            return Path(self.dataset.samples[idx][0]).relative_to(self.dataset.root).as_posix()
+        return self.index.get_relative_path(idx)
+
+    def get_path(self, idx):
+        if self.index is None:
+            return self.dataset.samples[idx][0]
+        relative_path = self.index.get_relative_path(idx)
+        if self.local_root is not None:
+            # files are copied to a temporary file and renamed -> existing files are complete
+            local_path = self.local_root / relative_path
+            if local_path.exists():
+                return local_path
+        return self.root / relative_path
 
     # noinspection PyUnusedLocal
     def getitem_x(self, idx, ctx=None):
-        x, _ = self.dataset[idx]
+        data = None
+        if self.read_ahead_buffer is not None:
+            data = self.read_ahead_buffer.get(idx)
+        if data is not None:
+            x = raw_image_to_pil(data, draft_size=self.draft_size)
+        elif self.index is None:
+            x, _ = self.dataset[idx]
+        else:
+            x = self.loader(self.get_path(idx))
         x = self.transform(x, ctx=ctx)
         return x
 
     # noinspection PyUnusedLocal
     def getitem_class(self, idx, ctx=None):
-        return self.dataset.targets[idx]
+        if self.index is None:
+            return self.dataset.targets[idx]
+        return int(self.index.classes[idx])
 
     def getshape_class(self):
-        return len(self.dataset.classes),
+        if self.index is None:
+            return len(self.dataset.classes),
+        return len(self.index.class_names),
 
     def __len__(self):
-        return len(self.dataset)
+        if self.index is None:
+            return len(self.dataset)
+        return len(self.index)
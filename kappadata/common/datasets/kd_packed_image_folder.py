@@ -0,0 +1,66 @@
+import io
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from kappadata.datasets.kd_dataset import KDDataset
+
+
+class KDPackedImageFolder(KDDataset):
+    """
+    dataset for image folders that were packed into a single file with kappadata.copying.create_packed_imagefolder
+    samples are sliced out of the memory-mapped file (no per-sample open/close syscalls and no copies until decoding)
+    """
+
+    def __init__(self, root, transform=None, **kwargs):
+        super().__init__(**kwargs)
+        self.root = Path(root).expanduser()
+        assert (self.root / "data.bin").exists(), f"'{self.root}' was not created by create_packed_imagefolder"
+        self.transform = transform
+        self.offsets = np.load(self.root / "offsets.npy")
+        self.classes = np.load(self.root / "classes.npy")
+        with open(self.root / "class_names.txt") as f:
+            self.class_names = f.read().split("\n")
+        self._data = None
+
+    def __getstate__(self):
+        # memory-mapped file is reopened in worker processes (pickling a np.memmap copies its content)
+        state = dict(self.__dict__)
+        state["_data"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = np.memmap(self.root / "data.bin", dtype=np.uint8, mode="r")
+        return self._data
+
+    def getitem_raw(self, idx, ctx=None):
+        """ returns the encoded file as view into the memory-mapped file """
+        return self.data[self.offsets[idx]:self.offsets[idx + 1]]
+
+    def getitem_x(self, idx, ctx=None):
+        x = Image.open(io.BytesIO(self.getitem_raw(idx))).convert("RGB")
+        if self.transform is not None:
+            x = self.transform(x, ctx=ctx)
+        return x
+
+    # noinspection PyUnusedLocal
+    def getitem_class(self, idx, ctx=None):
+        return int(self.classes[idx])
+
+    def getall_class(self):
+        return self.classes.tolist()
+
+    def getshape_class(self):
+        return len(self.class_names),
+
+    def __len__(self):
+        return len(self.classes)
+
+    def dispose(self):
+        self._data = None
@@ -0,0 +1,140 @@
+import io
+import os
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+
+from PIL import Image
+from torchvision.datasets.folder import IMG_EXTENSIONS
+
+from kappadata.datasets.kd_dataset import KDDataset
+
+
+class KDZipImageFolder(KDDataset):
+    """
+    image folder that reads samples directly from zips (without extracting them)
+    supported layouts (same as kappadata.copying.copy_imagefolder_from_global_to_local):
+    - folder of classwise zips (e.g. imagenet1k/train/n01558993.zip which contains n01558993_10029.JPEG)
+    - single zip (e.g. imagenet1k/train.zip which contains n01558993/n01558993_10029.JPEG)
+    the members of all zips are indexed once and each process (e.g. dataloader worker) opens its own file handles
+    samples that were extracted into local_root (e.g. by kappadata.copying.subset.copy_subset_from_global_to_local)
+    are loaded from local_root instead of the zip
+    """
+
+    def __init__(
+            self,
+            root,
+            transform=None,
+            extensions=IMG_EXTENSIONS,
+            max_open_zips=128,
+            local_root=None,
+            **kwargs,
+    ):
+        super().__init__(**kwargs)
+        root = Path(root).expanduser()
+        assert isinstance(max_open_zips, int) and 0 < max_open_zips
+        self.transform = transform
+        self.max_open_zips = max_open_zips
+        self.local_root = Path(local_root).expanduser() if local_root is not None else None
+        extensions = tuple(extension.lower() for extension in extensions)
+
+        if root.is_dir():
+            # folder of classwise zips
+            zip_names = sorted(item for item in os.listdir(root) if item.endswith(".zip"))
+            assert len(zip_names) > 0, f"no zips found in '{root}'"
+            self.zip_paths = [root / zip_name for zip_name in zip_names]
+            self.class_names = [zip_name[:-len(".zip")] for zip_name in zip_names]
+            self.zip_idxs = []
+            self.members = []
+            self.classes = []
+            for zip_idx, zip_path in enumerate(self.zip_paths):
+                with zipfile.ZipFile(zip_path) as f:
+                    members = sorted(name for name in f.namelist() if name.lower().endswith(extensions))
+                self.zip_idxs += [zip_idx] * len(members)
+                self.members += members
+                self.classes += [zip_idx] * len(members)
+        else:
+            # single zip (root can be passed with or without .zip suffix)
+            zip_path = root if root.name.endswith(".zip") else root.with_suffix(".zip")
+            assert zip_path.exists(), f"'{root}' is neither a folder of zips nor a zip"
+            self.zip_paths = [zip_path]
+            with zipfile.ZipFile(zip_path) as f:
+                members = sorted(name for name in f.namelist() if name.lower().endswith(extensions))
+            # class is the folder of a member (members that are not inside a folder are ignored)
+            members = [member for member in members if "/" in member]
+            self.class_names = sorted({member.split("/")[0] for member in members})
+            class_to_idx = {class_name: i for i, class_name in enumerate(self.class_names)}
+            self.zip_idxs = [0] * len(members)
+            self.members = members
+            self.classes = [class_to_idx[member.split("/")[0]] for member in members]
+
+        # layout of the extracted dataset is the same for both zip layouts (e.g. n01558993/n01558993_10029.JPEG)
+        self.is_classwise = root.is_dir()
+
+        # file handles are opened lazily per process
+        self._zips = OrderedDict()
+        self._pid = None
+
+    def __getstate__(self):
+        # file handles can't be shared with other processes
+        state = dict(self.__dict__)
+        state["_zips"] = OrderedDict()
+        state["_pid"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def _get_zip(self, zip_idx):
+        if self._pid != os.getpid():
+            # process was forked -> the inherited handles share their file offset with the parent process
+            self._zips = OrderedDict()
+            self._pid = os.getpid()
+        if zip_idx in self._zips:
+            self._zips.move_to_end(zip_idx)
+            return self._zips[zip_idx]
+        if len(self._zips) >= self.max_open_zips:
+            _, least_recently_used = self._zips.popitem(last=False)
+            least_recently_used.close()
+        handle = zipfile.ZipFile(self.zip_paths[zip_idx])
+        self._zips[zip_idx] = handle
+        return handle
+
+    def get_relative_path(self, idx):
+        """ path of the sample relative to the root of the extracted dataset """
+        if self.is_classwise:
+            return f"{self.class_names[self.zip_idxs[idx]]}/{self.members[idx]}"
+        return self.members[idx]
+
+    def getitem_x(self, idx, ctx=None):
+        local_path = None
+        if self.local_root is not None:
+            local_path = self.local_root / self.get_relative_path(idx)
+        if local_path is not None and local_path.exists():
+            with open(local_path, "rb") as f:
+                data = f.read()
+        else:
+            data = self._get_zip(self.zip_idxs[idx]).read(self.members[idx])
+        x = Image.open(io.BytesIO(data)).convert("RGB")
+        if self.transform is not None:
+            x = self.transform(x, ctx=ctx)
+        return x
+
+    # noinspection PyUnusedLocal
+    def getitem_class(self, idx, ctx=None):
+        return self.classes[idx]
+
+    def getall_class(self):
+        return self.classes
+
+    def getshape_class(self):
+        return len(self.class_names),
+
+    def __len__(self):
+        return len(self.members)
+
+    def dispose(self):
+        if self._pid == os.getpid():
+            for handle in self._zips.values():
+                handle.close()
+        self._zips = OrderedDict()
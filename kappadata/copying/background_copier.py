@@ -0,0 +1,193 @@
+import os
+import shutil
+import threading
+from collections import deque
+from pathlib import Path
+
+from kappadata.utils.logging import log
+from .copying_utils import CopyManifest, finish_autocopy_dst, folder_contains_mostly_zips, prepare_autocopy_dst
+
+
+class BackgroundCopier:
+    """
+    copies a folder (raw files, not zipped) from global to local storage in background threads such that the
+    training can start before the copy is finished (samples that are not copied yet are loaded from the global
+    storage, e.g. KDImageFolder(root=global_path, use_index=True, local_root=local_path))
+    - files are copied to a temporary file and renamed -> a file that exists in local_path is complete
+    - upcoming files can be copied first (see prioritize and kappadata.samplers.CopyAheadSampler)
+    - uses the same autocopy marker/manifest files as copy_folder_from_global_to_local
+      -> interrupted copies are resumed and subsequent jobs use the completed copy
+    - files that fail to copy are logged and skipped (the copy is not marked as finished -> retried by the next start)
+    - at most max_priority files are queued via prioritize (older requests are dropped)
+    """
+
+    def __init__(self, global_path, local_path, relative_path=None, num_workers=8, max_priority=65536, log_fn=None):
+        super().__init__()
+        assert isinstance(num_workers, int) and 0 < num_workers
+        assert isinstance(max_priority, int) and 0 < max_priority
+        global_path = Path(global_path).expanduser()
+        local_path = Path(local_path).expanduser()
+        self.src_path = global_path / relative_path if relative_path is not None else global_path
+        self.dst_path = local_path / relative_path if relative_path is not None else local_path
+        assert self.src_path.is_dir(), f"src_path '{self.src_path}' has to be a folder"
+        assert not folder_contains_mostly_zips(self.src_path)[0], "BackgroundCopier doesn't support zips"
+        self.num_workers = num_workers
+        self.max_priority = max_priority
+        self.log_fn = log_fn
+
+        self.manifest = None
+        self.is_finished = False
+        self.error = None
+        self.failed_paths = []
+        self._cond = threading.Condition()
+        self._priority = deque()
+        self._priority_set = set()
+        self._remaining = deque()
+        self._in_progress = set()
+        self._is_walk_finished = False
+        self._is_stopped = False
+        self._coordinator = None
+
+    def start(self):
+        state = prepare_autocopy_dst(self.dst_path, log_fn=self.log_fn)
+        if state in ["copied", "manual"]:
+            self.is_finished = True
+            return self
+        manifest_file = self.dst_path / "autocopy_manifest.txt"
+        manifest_file.touch()
+        self.manifest = CopyManifest(manifest_file)
+        log(self.log_fn, f"copying '{self.src_path}' to '{self.dst_path}' in background ({self.num_workers} workers)")
+        self._coordinator = threading.Thread(target=self._coordinate, name="background_copier", daemon=True)
+        self._coordinator.start()
+        return self
+
+    def prioritize(self, relative_paths):
+        """ relative_paths (relative to src_path) are copied before all other files """
+        if self.is_finished:
+            return
+        with self._cond:
+            for relative_path in relative_paths:
+                if relative_path in self._priority_set or relative_path in self._in_progress:
+                    continue
+                self._priority.append(relative_path)
+                self._priority_set.add(relative_path)
+            # drop oldest requests (e.g. samples that were already loaded from the global storage)
+            while len(self._priority) > self.max_priority:
+                self._priority_set.discard(self._priority.popleft())
+            self._cond.notify_all()
+
+    def _remove_stale_tmp_files(self):
+        # temporary files of a previous (interrupted) copy
+        num_removed = 0
+        for root, _, files in os.walk(self.dst_path):
+            for file in files:
+                if file.startswith(".") and file.endswith(".tmp"):
+                    Path(root, file).unlink(missing_ok=True)
+                    num_removed += 1
+        if num_removed > 0:
+            log(self.log_fn, f"removed {num_removed} temporary files of an interrupted copy from '{self.dst_path}'")
+
+    def _coordinate(self):
+        self._remove_stale_tmp_files()
+        workers = [
+            threading.Thread(target=self._work, name=f"background_copier{i}", daemon=True)
+            for i in range(self.num_workers)
+        ]
+        for worker in workers:
+            worker.start()
+        # collect files while workers already copy prioritized files
+        exclude = {"autocopy_start.txt", "autocopy_end.txt", "autocopy_manifest.txt"}
+        try:
+            for root, dirs, files in os.walk(self.src_path):
+                if self._is_stopped:
+                    break
+                dirs.sort()
+                relative_root = Path(root).relative_to(self.src_path)
+                relative_paths = [(relative_root / file).as_posix() for file in sorted(files)]
+                with self._cond:
+                    self._remaining.extend(
+                        relative_path
+                        for relative_path in relative_paths
+                        if relative_path not in exclude and relative_path not in self.manifest
+                    )
+                    self._cond.notify_all()
+        except Exception as e:
+            self.error = e
+        with self._cond:
+            self._is_walk_finished = True
+            self._cond.notify_all()
+        for worker in workers:
+            worker.join()
+        if self.error is not None:
+            log(self.log_fn, f"background copy of '{self.src_path}' failed ({self.error})")
+        elif len(self.failed_paths) > 0:
+            log(
+                self.log_fn,
+                f"background copy of '{self.src_path}' finished with {len(self.failed_paths)} failed files "
+                f"(retried by the next start)",
+            )
+        elif not self._is_stopped:
+            finish_autocopy_dst(self.dst_path)
+            log(self.log_fn, f"finished copying '{self.src_path}' to '{self.dst_path}' in background")
+        self.is_finished = True
+
+    def _next(self):
+        with self._cond:
+            while True:
+                if self._is_stopped or self.error is not None:
+                    return None
+                for queue in [self._priority, self._remaining]:
+                    while len(queue) > 0:
+                        relative_path = queue.popleft()
+                        if queue is self._priority:
+                            self._priority_set.discard(relative_path)
+                        if relative_path not in self.manifest and relative_path not in self._in_progress:
+                            self._in_progress.add(relative_path)
+                            return relative_path
+                if self._is_walk_finished:
+                    return None
+                self._cond.wait()
+
+    def _work(self):
+        while True:
+            relative_path = self._next()
+            if relative_path is None:
+                return
+            try:
+                self._copy(relative_path)
+            except Exception as e:
+                # skip file (e.g. unreadable file on the global storage) and continue with the other files
+                log(self.log_fn, f"failed to copy '{relative_path}' in background ({e})")
+                with self._cond:
+                    self.failed_paths.append(relative_path)
+            with self._cond:
+                self._in_progress.remove(relative_path)
+
+    def _copy(self, relative_path):
+        src = self.src_path / relative_path
+        dst = self.dst_path / relative_path
+        dst.parent.mkdir(exist_ok=True, parents=True)
+        # copy to temporary file and rename -> readers never see incomplete files
+        tmp_dst = dst.with_name(f".{dst.name}.{threading.get_ident()}.tmp")
+        try:
+            shutil.copy2(src, tmp_dst)
+            os.replace(tmp_dst, dst)
+        except Exception:
+            tmp_dst.unlink(missing_ok=True)
+            raise
+        self.manifest.add([relative_path])
+
+    def wait(self):
+        """ blocks until the copy is finished """
+        if self._coordinator is not None:
+            self._coordinator.join()
+        if self.error is not None:
+            raise self.error
+
+    def stop(self):
+        """ stops the copy (files that are currently copied are finished), the copy is resumed by the next start """
+        with self._cond:
+            self._is_stopped = True
+            self._cond.notify_all()
+        if self._coordinator is not None:
+            self._coordinator.join()
@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+
+from kappadata.utils.logging import log
+
+
+def create_stats_delta(worker=None):
+    """
+    statistics of a single copy job (e.g. in a joblib worker process) which are merged via CopyStats.add(**delta)
+    worker defaults to the pid of the process
+    """
+    return dict(
+        num_files=0,
+        num_bytes=0,
+        read_time=0.,
+        write_time=0.,
+        decompress_time=0.,
+        worker=worker or f"pid{os.getpid()}",
+    )
+
+
+class TimedReader:
+    """
+    wraps a binary file and measures the time spent in read
+    (e.g. zipfile.ZipFile(TimedReader(...)) separates the time for reading a zip from the time for decompressing it)
+    """
+
+    def __init__(self, fp):
+        super().__init__()
+        self.fp = fp
+        self.read_time = 0.
+
+    def read(self, *args):
+        start_time = time.perf_counter()
+        data = self.fp.read(*args)
+        self.read_time += time.perf_counter() - start_time
+        return data
+
+    def seek(self, *args):
+        return self.fp.seek(*args)
+
+    def tell(self):
+        return self.fp.tell()
+
+    @staticmethod
+    def seekable():
+        return True
+
+    def close(self):
+        self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class CopyStats:
+    """
+    thread-safe progress and throughput statistics of a copy
+    - bytes/files per second and ETA (if the total number of bytes or files is known)
+    - time spent in read/write/decompress (summed over all workers)
+    - throughput of each worker (bytes per second of time where the worker was busy)
+    progress is logged every log_interval seconds
+    """
+
+    def __init__(self, num_files=None, num_bytes=None, log_fn=None, log_interval=30.):
+        super().__init__()
+        self.num_files = num_files
+        self.num_bytes = num_bytes
+        self.log_fn = log_fn
+        self.log_interval = log_interval
+        self.copied_files = 0
+        self.copied_bytes = 0
+        self.read_time = 0.
+        self.write_time = 0.
+        self.decompress_time = 0.
+        # worker -> [num_bytes, busy_time]
+        self.workers = {}
+        self.start_time = time.perf_counter()
+        self.end_time = None
+        self._last_log_time = self.start_time
+        self._lock = threading.Lock()
+
+    def add(self, num_files=0, num_bytes=0, read_time=0., write_time=0., decompress_time=0., worker=None):
+        worker = worker or threading.current_thread().name
+        with self._lock:
+            self.copied_files += num_files
+            self.copied_bytes += num_bytes
+            self.read_time += read_time
+            self.write_time += write_time
+            self.decompress_time += decompress_time
+            worker_stats = self.workers.setdefault(worker, [0, 0.])
+            worker_stats[0] += num_bytes
+            worker_stats[1] += read_time + write_time + decompress_time
+            now = time.perf_counter()
+            should_log = self.log_fn is not None and now - self._last_log_time >= self.log_interval
+            if should_log:
+                self._last_log_time = now
+        if should_log:
+            log(self.log_fn, self.format_progress())
+
+    @property
+    def elapsed(self):
+        end_time = self.end_time if self.end_time is not None else time.perf_counter()
+        return end_time - self.start_time
+
+    @property
+    def bytes_per_second(self):
+        return self.copied_bytes / max(self.elapsed, 1e-9)
+
+    @property
+    def files_per_second(self):
+        return self.copied_files / max(self.elapsed, 1e-9)
+
+    @property
+    def eta(self):
+        """ estimated remaining seconds (None if the total is unknown) """
+        if self.num_bytes is not None and self.copied_bytes > 0:
+            return max(0., (self.num_bytes - self.copied_bytes) / self.bytes_per_second)
+        if self.num_files is not None and self.copied_files > 0:
+            return max(0., (self.num_files - self.copied_files) / self.files_per_second)
+        return None
+
+    @property
+    def worker_bytes_per_second(self):
+        with self._lock:
+            return {
+                worker: num_bytes / busy_time if busy_time > 0 else 0.
+                for worker, (num_bytes, busy_time) in self.workers.items()
+            }
+
+    def finish(self):
+        self.end_time = time.perf_counter()
+        log(self.log_fn, self.format_progress())
+
+    def to_dict(self):
+        return dict(
+            copied_files=self.copied_files,
+            copied_bytes=self.copied_bytes,
+            elapsed=self.elapsed,
+            bytes_per_second=self.bytes_per_second,
+            files_per_second=self.files_per_second,
+            eta=self.eta,
+            read_time=self.read_time,
+            write_time=self.write_time,
+            decompress_time=self.decompress_time,
+            worker_bytes_per_second=self.worker_bytes_per_second,
+        )
+
+    def format_progress(self):
+        num_files = f"/{self.num_files}" if self.num_files is not None else ""
+        num_mbytes = f"/{self.num_bytes / 1024 ** 2:.1f}" if self.num_bytes is not None else ""
+        eta = self.eta
+        worker_mbps = [value / 1024 ** 2 for value in self.worker_bytes_per_second.values()]
+        return (
+            f"copied {self.copied_files}{num_files} files ({self.copied_bytes / 1024 ** 2:.1f}{num_mbytes} MB) "
+            f"in {self.elapsed:.1f}s "
+            f"({self.bytes_per_second / 1024 ** 2:.1f} MB/s {self.files_per_second:.1f} files/s"
+            f"{f' ETA {eta:.0f}s' if eta is not None else ''}) "
+            f"read={self.read_time:.1f}s write={self.write_time:.1f}s decompress={self.decompress_time:.1f}s "
+            f"(summed over {len(worker_mbps)} workers"
+            f"{f' with {min(worker_mbps):.1f}-{max(worker_mbps):.1f} MB/s per worker' if len(worker_mbps) > 0 else ''})"
+        )
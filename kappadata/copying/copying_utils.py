@@ -1,7 +1,18 @@
 import os
+import shutil
+import threading
+import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import joblib
+import numpy as np
+
+from kappadata.utils.logging import log
+from .copy_stats import TimedReader, create_stats_delta
+
+_BUFFER_SIZE = 16 * 1024 ** 2
 
 
 def folder_contains_mostly_zips(path):
@@ -12,16 +23,325 @@ def folder_contains_mostly_zips(path):
     return contains_mostly_zips, zips
 
 
-def unzip(src, dst):
-    with zipfile.ZipFile(src) as f:
-        f.extractall(dst)
+def get_extract_path(dst, filename):
+    # same sanitization as ZipFile.extract (no absolute paths or "..")
+    return Path(dst, *[part for part in filename.split("/") if part not in ["", ".", ".."]])
+
+
+def extract_member(f, reader, info, dst, delta):
+    """
+    extracts a member of the zip f (opened via zipfile.ZipFile(reader) where reader is a TimedReader)
+    and adds the time spent in reading/decompressing/writing to delta (see create_stats_delta)
+    """
+    path = get_extract_path(dst, info.filename)
+    if info.is_dir():
+        path.mkdir(exist_ok=True, parents=True)
+        return
+    path.parent.mkdir(exist_ok=True, parents=True)
+    read_time = reader.read_time
+    unzip_time = 0.
+    with f.open(info) as src_f, open(path, "wb") as dst_f:
+        while True:
+            start_time = time.perf_counter()
+            data = src_f.read(_BUFFER_SIZE)
+            end_time = time.perf_counter()
+            unzip_time += end_time - start_time
+            if len(data) == 0:
+                break
+            dst_f.write(data)
+            delta["write_time"] += time.perf_counter() - end_time
+            delta["num_bytes"] += len(data)
+    # time spent in ZipExtFile.read consists of reading from the file and decompressing
+    delta["read_time"] += reader.read_time - read_time
+    delta["decompress_time"] += unzip_time - (reader.read_time - read_time)
+    delta["num_files"] += 1
+
+
+def run_jobs(jobs, num_workers):
+    """
+    runs jobs (created via joblib.delayed) sequentially if num_workers <= 1 and otherwise with num_workers processes
+    returns a generator of the results (in order of jobs) which yields results as soon as they are available
+    """
+    if num_workers <= 1:
+        return (fn(*args, **kwargs) for fn, args, kwargs in jobs)
+    return joblib.Parallel(n_jobs=num_workers, return_as="generator")(jobs)
+
+
+def unzip(src, dst, manifest_path=None):
+    delta = create_stats_delta()
+    with TimedReader(open(src, "rb")) as reader, zipfile.ZipFile(reader) as f:
+        for info in f.infolist():
+            extract_member(f, reader, info, dst, delta)
+    if manifest_path is not None:
+        append_to_manifest(manifest_path, [Path(src).name])
+    return delta
+
+
+def run_unzip_jobs(jobargs, num_workers, manifest_path=None, stats=None):
+    """
+    extracts zips (jobargs is a list of (src, dst) tuples) with num_workers processes
+    if manifest_path is passed, extracted zips are recorded in the manifest and skipped when resuming
+    if stats (a CopyStats) is passed, the statistics of each extracted zip are added to stats
+    """
+    if manifest_path is not None:
+        manifest = CopyManifest(manifest_path)
+        jobargs = [(src, dst) for src, dst in jobargs if Path(src).name not in manifest]
+    if stats is not None and stats.num_bytes is None:
+        # only reads the central directories
+        stats.num_bytes = 0
+        for src, _ in jobargs:
+            with zipfile.ZipFile(src) as f:
+                stats.num_bytes += sum(info.file_size for info in f.infolist())
+    jobs = [joblib.delayed(unzip)(src, dst, manifest_path=manifest_path) for src, dst in jobargs]
+    for delta in run_jobs(jobs, num_workers=num_workers):
+        if stats is not None:
+            stats.add(**delta)
 
 
-def run_unzip_jobs(jobargs, num_workers):
+def _unzip_chunks(src, dst, chunks, manifest_path):
+    delta = create_stats_delta()
+    # each worker opens its own file handle
+    with TimedReader(open(src, "rb")) as reader, zipfile.ZipFile(reader) as f:
+        infos = f.infolist()
+        for start, end in chunks:
+            for info in infos[start:end]:
+                extract_member(f, reader, info, dst, delta)
+            if manifest_path is not None:
+                append_to_manifest(manifest_path, [_get_chunk_entry(src, start, end)])
+    return delta
+
+
+def _get_chunk_entry(src, start, end):
+    return f"{Path(src).name}:{start}-{end}"
+
+
+def split_balanced(sizes, num_splits):
+    """ splits sizes into num_splits contiguous ranges with (approximately) equal sum """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    cumsum = np.cumsum(sizes)
+    if len(cumsum) == 0 or cumsum[-1] == 0:
+        bounds = np.linspace(0, len(sizes), num_splits + 1).round().astype(np.int64)
+    else:
+        # an item belongs to the split that contains its center
+        targets = cumsum[-1] * np.arange(1, num_splits) / num_splits
+        bounds = np.concatenate([[0], np.searchsorted(cumsum - sizes / 2, targets, side="right"), [len(sizes)]])
+    return [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:]) if start < end]
+
+
+def unzip_parallel(
+        src,
+        dst,
+        num_workers=0,
+        chunk_bytes=64 * 1024 ** 2,
+        manifest_path=None,
+        stats=None,
+        log_fn=None,
+):
+    """
+    extracts a single zip with num_workers processes
+    - members are split into contiguous chunks of approximately chunk_bytes bytes (chunks don't depend on num_workers
+      such that a resumed extraction can use a different number of workers)
+    - chunks are distributed among the workers as contiguous byte-balanced ranges (sequential reads per worker)
+    - each worker opens its own file handle
+    if manifest_path is passed, extracted chunks are recorded in the manifest and skipped when resuming
+    if stats (a CopyStats) is passed, the statistics of each worker are added to stats
+    """
+    src_path = Path(src).expanduser()
+    dst_path = Path(dst).expanduser()
+    with zipfile.ZipFile(src_path) as f:
+        infos = f.infolist()
+    sizes = np.array([info.compress_size + info.file_size for info in infos], dtype=np.int64)
+    chunks = split_balanced(sizes, num_splits=max(1, int(sizes.sum() // chunk_bytes)))
+    if manifest_path is not None:
+        manifest = CopyManifest(manifest_path)
+        chunks = [(start, end) for start, end in chunks if _get_chunk_entry(src_path, start, end) not in manifest]
+
+    # create folders upfront (ZipFile.extract is not safe w.r.t. concurrent creation of the same folder)
+    # paths are sanitized (no absolute paths or "..") -> folders are always inside dst_path
+    folders = {get_extract_path(dst_path, info.filename).parent for info in infos}
+    for folder in sorted(folders):
+        folder.mkdir(exist_ok=True, parents=True)
+
+    num_bytes = sum(int(sizes[start:end].sum()) for start, end in chunks)
+    log(log_fn, f"extracting {len(chunks)} chunks ({num_bytes} bytes) of '{src_path}' using {num_workers} workers")
+    if stats is not None and stats.num_bytes is None:
+        stats.num_bytes = sum(infos[i].file_size for start, end in chunks for i in range(start, end))
     if num_workers <= 1:
-        for src, dst in jobargs:
-            unzip(src, dst)
+        splits = [(0, len(chunks))]
     else:
-        jobs = [joblib.delayed(unzip)(src, dst) for src, dst in jobargs]
-        pool = joblib.Parallel(n_jobs=num_workers)
-        pool(jobs)
+        chunk_sizes = [int(sizes[start:end].sum()) for start, end in chunks]
+        splits = split_balanced(chunk_sizes, num_splits=min(num_workers, len(chunks)))
+    jobs = [
+        joblib.delayed(_unzip_chunks)(src_path, dst_path, chunks=chunks[start:end], manifest_path=manifest_path)
+        for start, end in splits
+    ]
+    for delta in run_jobs(jobs, num_workers=num_workers):
+        if stats is not None:
+            stats.add(**delta)
+
+
+class CopyManifest:
+    """
+    append-only file with one line per completed entry (e.g. relative path of a copied file)
+    used to resume an interrupted copy instead of starting from scratch
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path) as f:
+                content = f.read()
+            # last line is either empty or incomplete (process was killed while writing it)
+            lines = content.split("\n")
+            self.completed = set(lines[:-1])
+            if len(lines[-1]) > 0:
+                # remove incomplete line such that new entries start in a new line
+                os.truncate(self.path, len(content.encode("utf-8")) - len(lines[-1].encode("utf-8")))
+        else:
+            self.completed = set()
+
+    def __contains__(self, entry):
+        return entry in self.completed
+
+    def add(self, entries):
+        if len(entries) == 0:
+            return
+        with self._lock:
+            append_to_manifest(self.path, entries)
+            self.completed.update(entries)
+
+
+def append_to_manifest(path, entries):
+    # single write in append mode -> lines of concurrent writers (e.g. multiple processes) are not interleaved
+    with open(path, "a") as f:
+        f.write("".join(f"{entry}\n" for entry in entries))
+
+
+def copy_file(src, dst, delta):
+    """ same as shutil.copy2 but adds the time spent in reading/writing to delta (see create_stats_delta) """
+    with open(src, "rb") as src_f, open(dst, "wb") as dst_f:
+        while True:
+            start_time = time.perf_counter()
+            data = src_f.read(_BUFFER_SIZE)
+            end_time = time.perf_counter()
+            delta["read_time"] += end_time - start_time
+            if len(data) == 0:
+                break
+            dst_f.write(data)
+            delta["write_time"] += time.perf_counter() - end_time
+            delta["num_bytes"] += len(data)
+    shutil.copystat(src, dst)
+    delta["num_files"] += 1
+
+
+def _copy_files(src_path, dst_path, relative_paths, manifest, stats):
+    delta = create_stats_delta(worker=threading.current_thread().name)
+    for relative_path in relative_paths:
+        copy_file(src_path / relative_path, dst_path / relative_path, delta)
+    # files are only marked as completed after they were copied
+    manifest.add(relative_paths)
+    if stats is not None:
+        stats.add(**delta)
+
+
+def copy_files_resumable(
+        src,
+        dst,
+        manifest,
+        num_workers=0,
+        chunk_size=256,
+        exclude=None,
+        relative_paths=None,
+        stats=None,
+        log_fn=None,
+):
+    """
+    copies all files of src into dst (same as shutil.copytree) with a thread pool
+    completed files are recorded in manifest (a CopyManifest) and skipped when the copy is resumed
+    exclude can be used to skip files in the root of src (e.g. autocopy marker files)
+    relative_paths can be used to copy only the given files (paths relative to src)
+    if stats (a CopyStats) is passed, the statistics of each chunk are added to stats
+    returns the number of copied files
+    """
+    src_path = Path(src).expanduser()
+    dst_path = Path(dst).expanduser()
+    exclude = set(exclude or [])
+
+    # collect files and create folders
+    if relative_paths is None:
+        relative_paths = []
+        for root, dirs, files in os.walk(src_path):
+            dirs.sort()
+            relative_root = Path(root).relative_to(src_path)
+            (dst_path / relative_root).mkdir(exist_ok=True, parents=True)
+            for file in sorted(files):
+                relative_path = (relative_root / file).as_posix()
+                if relative_path in exclude or relative_path in manifest:
+                    continue
+                relative_paths.append(relative_path)
+    else:
+        relative_paths = [relative_path for relative_path in relative_paths if relative_path not in manifest]
+        for folder in sorted({os.path.dirname(relative_path) for relative_path in relative_paths}):
+            (dst_path / folder).mkdir(exist_ok=True, parents=True)
+    num_skipped = len(manifest.completed)
+    log(log_fn, f"copying {len(relative_paths)} files ({num_skipped} were already copied) using {num_workers} workers")
+    if stats is not None and stats.num_files is None:
+        stats.num_files = len(relative_paths)
+
+    # copy in chunks (one manifest update per chunk)
+    chunks = [relative_paths[i:i + chunk_size] for i in range(0, len(relative_paths), chunk_size)]
+    if num_workers <= 1:
+        for chunk in chunks:
+            _copy_files(src_path, dst_path, chunk, manifest, stats)
+    else:
+        with ThreadPoolExecutor(max_workers=num_workers) as pool:
+            futures = [pool.submit(_copy_files, src_path, dst_path, chunk, manifest, stats) for chunk in chunks]
+            for future in futures:
+                # propagate errors
+                future.result()
+    return len(relative_paths)
+
+
+def prepare_autocopy_dst(dst_path, log_fn=None):
+    """
+    checks the autocopy marker files of dst_path and prepares it for copying
+    - autocopy start/end file exists -> already copied -> "copied"
+    - autocopy start file exists && autocopy end file doesn't exist -> incomplete copy
+      - autocopy manifest file exists -> resume copy -> "resumed"
+      - otherwise -> delete and copy again -> "deleted"
+    - autocopy start file doesn't exists -> manually copied dataset -> "manual"
+    - dst_path doesn't exist -> "new"
+    the autocopy start file is created if the dataset has to be copied
+    """
+    start_copy_file = dst_path / "autocopy_start.txt"
+    end_copy_file = dst_path / "autocopy_end.txt"
+    manifest_file = dst_path / "autocopy_manifest.txt"
+    if dst_path.exists():
+        if start_copy_file.exists():
+            if end_copy_file.exists():
+                log(log_fn, f"dataset was already automatically copied '{dst_path}'")
+                return "copied"
+            if manifest_file.exists():
+                log(log_fn, f"found incomplete automatic copy in '{dst_path}' -> resuming copy")
+                state = "resumed"
+            else:
+                log(log_fn, f"found incomplete automatic copy in '{dst_path}' -> deleting folder")
+                shutil.rmtree(dst_path)
+                dst_path.mkdir()
+                state = "deleted"
+        else:
+            log(log_fn, f"using manually copied dataset '{dst_path}'")
+            return "manual"
+    else:
+        dst_path.mkdir(parents=True)
+        state = "new"
+    with open(start_copy_file, "w") as f:
+        f.write("this file indicates that an attempt to copy the dataset automatically was started")
+    return state
+
+
+def finish_autocopy_dst(dst_path):
+    with open(dst_path / "autocopy_end.txt", "w") as f:
+        f.write("this file indicates that copying the dataset automatically was successful")
@@ -0,0 +1,89 @@
+from pathlib import Path
+
+import joblib
+import numpy as np
+from PIL import Image
+from torchvision.datasets import ImageFolder
+from torchvision.transforms import InterpolationMode
+from torchvision.transforms.functional import resize
+
+from kappadata.utils.image_utils import get_resized_size
+from kappadata.utils.logging import log
+from .copying_utils import run_jobs
+
+
+def _get_resized_sizes(paths, max_short_side):
+    # only reads the image header (no decoding)
+    sizes = []
+    for path in paths:
+        with Image.open(path) as img:
+            sizes.append(get_resized_size(width=img.width, height=img.height, max_short_side=max_short_side))
+    return sizes
+
+
+def _decode_images(x_path, paths, offsets, sizes, interpolation):
+    x = np.load(x_path, mmap_mode="r+")
+    for path, offset, (height, width) in zip(paths, offsets, sizes):
+        with Image.open(path) as img:
+            img = img.convert("RGB")
+            if (img.height, img.width) != (height, width):
+                img = resize(img, size=[height, width], interpolation=interpolation, antialias=True)
+            x[offset:offset + height * width * 3] = np.asarray(img, dtype=np.uint8).reshape(-1)
+    x.flush()
+
+
+def create_decoded_imagefolder(
+        src,
+        dst,
+        max_short_side=None,
+        interpolation="bilinear",
+        num_workers=0,
+        chunk_size=1000,
+        log_fn=None,
+):
+    """
+    decodes all images of an image folder once and stores them (optionally resized such that the shorter side is
+    at most max_short_side) as uint8 into a single array that can be memory-mapped by KDDecodedImageFolder
+    Result:
+    dst/x.npy: all images as flat uint8 array (HWC layout)
+    dst/offsets.npy: start index of each image in x.npy
+    dst/sizes.npy: (height, width) of each image
+    dst/classes.npy: class index of each image
+    dst/class_names.txt: one class name per line
+    """
+    src_path = Path(src).expanduser()
+    assert src_path.exists(), f"src_path '{src_path}' doesn't exist"
+    dst_path = Path(dst).expanduser()
+    dst_path.mkdir(exist_ok=True, parents=True)
+    interpolation = InterpolationMode(interpolation)
+
+    # only used to retrieve the paths/classes (no images are loaded)
+    ds = ImageFolder(root=src_path)
+    paths = [path for path, _ in ds.samples]
+    chunks = [slice(i, i + chunk_size) for i in range(0, len(paths), chunk_size)]
+
+    # calculate sizes after resizing to preallocate the array
+    log(log_fn, f"reading sizes of {len(paths)} images from '{src_path}'")
+    jobs = [joblib.delayed(_get_resized_sizes)(paths[chunk], max_short_side) for chunk in chunks]
+    sizes = np.array([size for sizes in run_jobs(jobs, num_workers=num_workers) for size in sizes], dtype=np.int64)
+    sizes = sizes.reshape(len(paths), 2)
+    offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+    np.cumsum(sizes[:, 0] * sizes[:, 1] * 3, out=offsets[1:])
+
+    # decode into memory-mapped array
+    log(log_fn, f"decoding {len(paths)} images ({offsets[-1]} bytes) into '{dst_path}' using {num_workers} workers")
+    x_path = dst_path / "x.npy"
+    x = np.lib.format.open_memmap(x_path, mode="w+", dtype=np.uint8, shape=(int(offsets[-1]),))
+    del x
+    jobs = [
+        joblib.delayed(_decode_images)(x_path, paths[chunk], offsets[chunk], sizes[chunk], interpolation)
+        for chunk in chunks
+    ]
+    for _ in run_jobs(jobs, num_workers=num_workers):
+        pass
+    np.save(dst_path / "offsets.npy", offsets[:-1])
+    np.save(dst_path / "sizes.npy", sizes)
+    np.save(dst_path / "classes.npy", np.array(ds.targets, dtype=np.int64))
+    with open(dst_path / "class_names.txt", "w") as f:
+        f.write("\n".join(ds.classes))
+    log(log_fn, "finished decoding images")
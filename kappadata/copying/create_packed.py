@@ -0,0 +1,58 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from torchvision.datasets import ImageFolder
+
+from kappadata.loading.image_folder import raw_image_loader
+from kappadata.utils.logging import log
+
+
+def create_packed_imagefolder(src, dst, num_workers=0, max_reads_in_flight_per_worker=4, log_fn=None):
+    """
+    packs the raw (encoded) files of an image folder into a single file with an offsets/classes index
+    copying one large file to a local disk is much faster than copying millions of small files
+    Source:
+    imagenet1k/train/n2933412/n2933412_1.JPEG
+    imagenet1k/train/n3498534/n3498534_1.JPEG
+    Result:
+    imagenet1k_packed/train/data.bin (all files concatenated)
+    imagenet1k_packed/train/offsets.npy (start of each file in data.bin + total size as last element)
+    imagenet1k_packed/train/classes.npy
+    imagenet1k_packed/train/class_names.txt
+    """
+    src_path = Path(src).expanduser()
+    assert src_path.exists(), f"src_path '{src_path}' doesn't exist"
+    dst_path = Path(dst).expanduser()
+    dst_path.mkdir(exist_ok=True, parents=True)
+    assert not (dst_path / "data.bin").exists(), f"'{dst_path}' already contains a packed dataset"
+
+    # only used to retrieve the paths/classes (no images are loaded)
+    ds = ImageFolder(root=src_path)
+    paths = [path for path, _ in ds.samples]
+    log(log_fn, f"packing {len(paths)} files of '{src_path}' into '{dst_path / 'data.bin'}'")
+
+    offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+    # write into a tmp file -> an interrupted packing doesn't leave a data.bin that looks complete
+    tmp_path = dst_path / "data.bin.tmp"
+    with open(tmp_path, "wb") as f:
+        # read with multiple threads (e.g. to hide latency of a network filesystem) but write sequentially
+        # number of reads in flight is bounded (results that are ahead of the writer would otherwise accumulate)
+        max_in_flight = max_reads_in_flight_per_worker * max(1, num_workers)
+        with ThreadPoolExecutor(max_workers=max(1, num_workers)) as pool:
+            futures = deque(pool.submit(raw_image_loader, path) for path in paths[:max_in_flight])
+            for i in range(len(paths)):
+                data = futures.popleft().result()
+                if i + max_in_flight < len(paths):
+                    futures.append(pool.submit(raw_image_loader, paths[i + max_in_flight]))
+                f.write(data)
+                offsets[i + 1] = offsets[i] + len(data)
+    np.save(dst_path / "offsets.npy", offsets)
+    np.save(dst_path / "classes.npy", np.array(ds.targets, dtype=np.int64))
+    with open(dst_path / "class_names.txt", "w") as f:
+        f.write("\n".join(ds.classes))
+    # data.bin is created last (marks the packed dataset as complete)
+    os.replace(tmp_path, dst_path / "data.bin")
+    log(log_fn, f"finished packing ({offsets[-1]} bytes)")
@@ -0,0 +1,132 @@
+import io
+import os
+import zipfile
+from pathlib import Path
+
+import joblib
+from PIL import Image
+from torchvision.transforms import InterpolationMode
+from torchvision.transforms.functional import resize
+
+from kappadata.loading.draft import draft_image
+from kappadata.utils.image_utils import get_resized_size
+from kappadata.utils.logging import log
+from .copying_utils import run_jobs
+from .create_zips import _list_files
+
+
+def _resize_image(path, max_short_side, quality, interpolation):
+    # returns the encoded bytes of the resized image (original bytes if the image doesn't need to be resized)
+    with open(path, "rb") as f:
+        data = f.read()
+    with Image.open(io.BytesIO(data)) as img:
+        img_format = img.format
+        height, width = get_resized_size(width=img.width, height=img.height, max_short_side=max_short_side)
+        if (height, width) == (img.height, img.width):
+            return data
+        # decode JPEGs with reduced size (shorter side is still >= max_short_side)
+        img = draft_image(img, draft_size=max_short_side).convert("RGB")
+        img = resize(img, size=[height, width], interpolation=interpolation, antialias=True)
+        buffer = io.BytesIO()
+        # quality is ignored by formats without a quality setting (e.g. PNG)
+        img.save(buffer, format=img_format, quality=quality)
+    return buffer.getvalue()
+
+
+def _resize_images(files, max_short_side, quality, interpolation):
+    return [(arcname, _resize_image(path, max_short_side, quality, interpolation)) for path, arcname in files]
+
+
+def _resize_to_folder(dst, files, max_short_side, quality, interpolation):
+    for arcname, data in _resize_images(files, max_short_side, quality, interpolation):
+        path = dst / arcname
+        path.parent.mkdir(exist_ok=True, parents=True)
+        # write to temporary file and rename to avoid incomplete images if the process is killed
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+def _resize_to_zip(dst, files, compression, max_short_side, quality, interpolation):
+    tmp_dst = dst.with_name(f"{dst.name}.tmp")
+    with zipfile.ZipFile(tmp_dst, "w", compression=compression) as f:
+        for path, arcname in files:
+            f.writestr(arcname, _resize_image(path, max_short_side, quality, interpolation))
+    os.replace(tmp_dst, dst)
+
+
+def create_resized_imagefolder(
+        src,
+        dst,
+        max_short_side,
+        quality=90,
+        interpolation="bilinear",
+        output_format="folder",
+        num_workers=0,
+        chunk_size=256,
+        compression=zipfile.ZIP_STORED,
+        log_fn=None,
+):
+    """
+    rewrites an image folder where all images are resized such that the shorter side is at most max_short_side and
+    re-encoded with the given quality (images are processed in parallel with num_workers processes)
+    images that are already small enough are stored unchanged
+    Source:
+    imagenet1k/train/n2933412/n2933412_1.JPEG
+    Result:
+    - output_format="folder": imagenet1k_256/train/n2933412/n2933412_1.JPEG
+    - output_format="zip": imagenet1k_256/train.zip (contains n2933412/n2933412_1.JPEG, dst is passed without .zip)
+    - output_format="zips": imagenet1k_256/train/n2933412.zip (contains n2933412_1.JPEG)
+    the results can be copied via kappadata.copying.image_folder.copy_imagefolder_from_global_to_local
+    """
+    src_path = Path(src).expanduser()
+    assert src_path.exists(), f"src_path '{src_path}' doesn't exist"
+    dst_path = Path(dst).expanduser()
+    assert isinstance(max_short_side, int) and 0 < max_short_side
+    assert output_format in ["folder", "zip", "zips"], f"invalid output_format '{output_format}'"
+    interpolation = InterpolationMode(interpolation)
+    resize_kwargs = dict(max_short_side=max_short_side, quality=quality, interpolation=interpolation)
+    class_names = sorted(item for item in os.listdir(src_path) if (src_path / item).is_dir())
+    files_per_class = {class_name: _list_files(src_path / class_name) for class_name in class_names}
+    files = [
+        (path, f"{class_name}/{arcname}")
+        for class_name in class_names
+        for path, arcname in files_per_class[class_name]
+    ]
+    log(
+        log_fn,
+        f"resizing {len(files)} images of '{src_path}' to max_short_side={max_short_side} (output_format="
+        f"{output_format}) using {num_workers} workers",
+    )
+
+    if output_format == "zip":
+        # images are resized in parallel and written sequentially into a single zip
+        dst_path.parent.mkdir(exist_ok=True, parents=True)
+        zip_path = dst_path.with_suffix(".zip")
+        chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+        jobs = [joblib.delayed(_resize_images)(chunk, **resize_kwargs) for chunk in chunks]
+        tmp_path = zip_path.with_name(f"{zip_path.name}.tmp")
+        with zipfile.ZipFile(tmp_path, "w", compression=compression) as f:
+            for result in run_jobs(jobs, num_workers=num_workers):
+                for arcname, data in result:
+                    f.writestr(arcname, data)
+        os.replace(tmp_path, zip_path)
+    elif output_format == "zips":
+        # one zip per class (created in parallel)
+        dst_path.mkdir(exist_ok=True, parents=True)
+        jobs = [
+            joblib.delayed(_resize_to_zip)(dst_path / f"{class_name}.zip", class_files, compression, **resize_kwargs)
+            for class_name, class_files in files_per_class.items()
+        ]
+        for _ in run_jobs(jobs, num_workers=num_workers):
+            pass
+    else:
+        dst_path.mkdir(exist_ok=True, parents=True)
+        jobs = [
+            joblib.delayed(_resize_to_folder)(dst_path, files[i:i + chunk_size], **resize_kwargs)
+            for i in range(0, len(files), chunk_size)
+        ]
+        for _ in run_jobs(jobs, num_workers=num_workers):
+            pass
+    log(log_fn, "finished resizing images")
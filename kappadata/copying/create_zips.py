@@ -1,39 +1,104 @@
-import numpy as np
 import os
-import shutil
 import zipfile
 from pathlib import Path
 
+import joblib
+import numpy as np
+
+from kappadata.utils.logging import log
+from .copying_utils import run_jobs, split_balanced
+
+
+def _list_files(root):
+    # (path, arcname) of all files in root (recursively)
+    files = []
+    for cur_root, dirs, cur_files in os.walk(root):
+        dirs.sort()
+        for file in sorted(cur_files):
+            path = Path(cur_root) / file
+            files.append((path, path.relative_to(root).as_posix()))
+    return files
+
+
+def _write_zip(dst, files, compression):
+    # write to temporary file and rename to avoid incomplete zips if the process is killed
+    tmp_dst = dst.with_name(f"{dst.name}.tmp")
+    with zipfile.ZipFile(tmp_dst, "w", compression=compression) as f:
+        for path, arcname in files:
+            f.write(path, arcname)
+    os.replace(tmp_dst, dst)
+
+
+def _run_zip_jobs(jobargs, num_workers, log_fn=None):
+    """ jobargs is a list of (dst, files, compression) tuples where files is a list of (path, arcname) tuples """
+    num_bytes = [sum(os.path.getsize(path) for path, _ in files) for _, files, _ in jobargs]
+    log(log_fn, f"creating {len(jobargs)} zips ({sum(num_bytes)} bytes) using {num_workers} workers")
+    # largest zips first (longest-processing-time-first scheduling) to avoid that a single large zip is left at the end
+    order = np.argsort(num_bytes, kind="stable")[::-1]
+    jobargs = [jobargs[i] for i in order]
+    jobs = [joblib.delayed(_write_zip)(dst, files, compression) for dst, files, compression in jobargs]
+    for _ in run_jobs(jobs, num_workers=num_workers):
+        pass
+
+
+def create_zip(src, dst, compression=zipfile.ZIP_DEFLATED, log_fn=None):
+    """
+    creates a single zip of a folder (dst is passed without .zip)
+    Source:
+    imagenet1k/train/n2933412/...
+    Result:
+    imagenet1k/train.zip (contains n2933412/...)
+    ZIP_STORED avoids compressing already compressed data (e.g. JPEG/WAV) which makes extracting I/O-bound
+    """
+    src_path = Path(src).expanduser()
+    assert src_path.exists(), f"src_path '{src_path}' doesn't exist"
+    dst_path = Path(dst).expanduser()
+    dst_path.parent.mkdir(exist_ok=True, parents=True)
+    _run_zip_jobs(
+        jobargs=[(dst_path.with_suffix(".zip"), _list_files(src_path), compression)],
+        num_workers=0,
+        log_fn=log_fn,
+    )
+
 
-def create_zips_imagefolder(src, dst):
+def create_zips_imagefolder(src, dst, num_workers=0, compression=zipfile.ZIP_DEFLATED, log_fn=None):
     """
-    creates a zip for each class
+    creates a zip for each class (zips are created in parallel with num_workers processes)
     Source:
     imagenet1k/train/n2933412
     imagenet1k/train/n3498534
     Result:
     imagenet1k/train/n2933412.zip
     imagenet1k/train/n3498534.zip
+    ZIP_STORED avoids compressing already compressed data (e.g. JPEG/WAV) which makes extracting I/O-bound
     """
     src_path = Path(src).expanduser()
     assert src_path.exists(), f"src_path '{src_path}' doesn't exist"
     dst_path = Path(dst).expanduser()
     dst_path.mkdir(exist_ok=True, parents=True)
 
-    for item in os.listdir(src_path):
+    jobargs = []
+    for item in sorted(os.listdir(src_path)):
         src_uri = src_path / item
         if not src_uri.is_dir():
             continue
-        shutil.make_archive(
-            base_name=dst_path / item,
-            format="zip",
-            root_dir=src_uri,
-        )
+        jobargs.append((dst_path / f"{item}.zip", _list_files(src_uri), compression))
+    _run_zip_jobs(jobargs=jobargs, num_workers=num_workers, log_fn=log_fn)
 
 
-def create_zips_folder(src, dst, batch_size=1000):
+def create_zips_folder(
+        src,
+        dst,
+        batch_size=1000,
+        num_bytes_per_zip=None,
+        num_workers=0,
+        compression=zipfile.ZIP_STORED,
+        log_fn=None,
+):
     """
     creates zips where each zip has <batch_size> samples
+    alternatively, zips can be balanced by bytes (each zip has approximately <num_bytes_per_zip> bytes)
+    zips are created in parallel with num_workers processes
     Source:
     audioset/train/sample0.wav
     audioset/train/sample1.wav
@@ -49,16 +114,28 @@ def create_zips_folder(src, dst, batch_size=1000):
 
     # retrieve items and check validity
     items = []
-    for item in os.listdir(src_path):
+    for item in sorted(os.listdir(src_path)):
         assert (src_path / item).is_file(), f"source folder has to contain only files ({item})"
         assert not item.endswith(".zip"), f"source folder cant contain zips ({item})"
         items.append(item)
 
-    # create zipped folders, each with <batch_size> items
-    num_batches = (len(items) + batch_size - 1) // batch_size
-    num_digits = int(np.log10(num_batches)) + 1
+    # split items into batches
+    if num_bytes_per_zip is None:
+        batches = [(i, min(len(items), i + batch_size)) for i in range(0, len(items), batch_size)]
+    else:
+        sizes = [os.path.getsize(src_path / item) for item in items]
+        num_batches = max(1, (sum(sizes) + num_bytes_per_zip - 1) // num_bytes_per_zip)
+        batches = split_balanced(sizes, num_splits=num_batches)
+
+    # create zipped folders
+    num_digits = int(np.log10(max(1, len(batches)))) + 1
     format_str = f"{{:0{num_digits}d}}"
-    for i in range(0, num_batches):
-        with zipfile.ZipFile(dst / f"batch_{format_str.format(i)}.zip", "w") as f:
-            for j in range(i * batch_size, min(len(items), (i + 1) * batch_size)):
-                f.write(src_path / items[j], items[j])
+    jobargs = [
+        (
+            dst_path / f"batch_{format_str.format(i)}.zip",
+            [(src_path / item, item) for item in items[start:end]],
+            compression,
+        )
+        for i, (start, end) in enumerate(batches)
+    ]
+    _run_zip_jobs(jobargs=jobargs, num_workers=num_workers, log_fn=log_fn)
@@ -1,11 +1,20 @@
 import os
-import shutil
-import zipfile
 from dataclasses import dataclass
 from pathlib import Path
 
+from kappadata.utils.file_lock import FileLock
 from kappadata.utils.logging import log
-from .copying_utils import folder_contains_mostly_zips, run_unzip_jobs
+from .copy_stats import CopyStats
+from .copying_utils import (
+    CopyManifest,
+    copy_files_resumable,
+    finish_autocopy_dst,
+    folder_contains_mostly_zips,
+    prepare_autocopy_dst,
+    run_unzip_jobs,
+    unzip_parallel,
+)
+from .integrity import CHECK_INTEGRITY_MODES, check_copy_integrity
 
 
 @dataclass
@@ -13,6 +22,8 @@ class CopyFolderResult:
     was_copied: bool
     was_deleted: bool
     source_format: str
+    was_resumed: bool = False
+    stats: CopyStats = None
 
 
 def _check_src_path(src_path):
@@ -29,7 +40,11 @@ def copy_folder_from_global_to_local(
         relative_path=None,
         num_workers=0,
         log_fn=None,
+        use_lock=False,
+        check_integrity=None,
 ) -> CopyFolderResult:
+    # check arguments before the (potentially long) copy
+    assert check_integrity in CHECK_INTEGRITY_MODES, f"invalid check_integrity '{check_integrity}'"
     if not isinstance(global_path, Path):
         global_path = Path(global_path).expanduser()
     if not isinstance(local_path, Path):
@@ -39,39 +54,31 @@ def copy_folder_from_global_to_local(
     src_path = global_path / relative_path if relative_path is not None else global_path
     assert _check_src_path(src_path), f"invalid src_path (can be folder or folder of zips or zip) '{src_path}'"
 
-    # if dst_path exists:
-    # - autocopy start/end file exists -> already copied -> do nothing
-    # - autocopy start file exists && autocopy end file doesn't exist -> incomplete copy -> delete and copy again
-    # - autocopy start file doesn't exists -> manually copied dataset -> do nothing
     dst_path = local_path / relative_path if relative_path is not None else local_path
+    if use_lock:
+        # exactly one process (e.g. one rank per node) copies the dataset with all workers, other processes wait for
+        # the lock and then reuse the copy (the lock is released automatically if the copying process dies)
+        with FileLock(dst_path.parent / f"{dst_path.name}.autocopy.lock"):
+            return copy_folder_from_global_to_local(
+                global_path=global_path,
+                local_path=local_path,
+                relative_path=relative_path,
+                num_workers=num_workers,
+                log_fn=log_fn,
+                check_integrity=check_integrity,
+            )
+
+    # check autocopy marker files (already copied / manually copied / resume incomplete copy / delete incomplete copy)
+    state = prepare_autocopy_dst(dst_path, log_fn=log_fn)
+    if state in ["copied", "manual"]:
+        return CopyFolderResult(was_copied=False, was_deleted=False, source_format=None)
+    was_deleted = state == "deleted"
+    was_resumed = state == "resumed"
     start_copy_file = dst_path / "autocopy_start.txt"
     end_copy_file = dst_path / "autocopy_end.txt"
-    was_deleted = False
-    if dst_path.exists():
-        if start_copy_file.exists():
-            if end_copy_file.exists():
-                # already automatically copied -> do nothing
-                log(log_fn, f"dataset was already automatically copied '{dst_path}'")
-                return CopyFolderResult(
-                    was_copied=False,
-                    was_deleted=False,
-                    source_format=None,
-                )
-            else:
-                # incomplete copy -> delete and copy again
-                log(log_fn, f"found incomplete automatic copy in '{dst_path}' -> deleting folder")
-                shutil.rmtree(dst_path)
-                was_deleted = True
-                dst_path.mkdir()
-        else:
-            log(log_fn, f"using manually copied dataset '{dst_path}'")
-            return CopyFolderResult(was_copied=False, was_deleted=False, source_format=None)
-    else:
-        dst_path.mkdir(parents=True)
-
-    # create start_copy_file
-    with open(start_copy_file, "w") as f:
-        f.write("this file indicates that an attempt to copy the dataset automatically was started")
+    manifest_file = dst_path / "autocopy_manifest.txt"
+    # progress/throughput is logged periodically and returned as part of the result
+    stats = CopyStats(log_fn=log_fn)
 
     # copy
     if src_path.exists() and src_path.is_dir():
@@ -80,37 +87,76 @@ def copy_folder_from_global_to_local(
             source_format = "zips"
             # extract all zip folders into dst (e.g. audioset/train/batch_0.zip)
             log(log_fn, f"extracting {len(zips)} zips from '{src_path}' to '{dst_path}' using {num_workers} workers")
-            unzip_batched_zips(src=src_path, dst=dst_path, num_workers=num_workers)
+            # extracted zips are tracked in the manifest to be able to resume
+            manifest_file.touch()
+            unzip_batched_zips(
+                src=src_path,
+                dst=dst_path,
+                num_workers=num_workers,
+                manifest_path=manifest_file,
+                stats=stats,
+            )
         else:
             source_format = "raw"
             # copy folders which contain the raw files (not zipped or anything)
             log(log_fn, f"copying files of '{src_path}' to '{dst_path}'")
-            # copy folder (dirs_exist_ok=True because dst_path is created for start_copy_file)
-            shutil.copytree(src_path, dst_path, dirs_exist_ok=True)
+            # copy files with a thread pool and keep track of copied files to be able to resume the copy
+            manifest_file.touch()
+            copy_files_resumable(
+                src=src_path,
+                dst=dst_path,
+                manifest=CopyManifest(manifest_file),
+                num_workers=num_workers,
+                # marker files of src (e.g. src was also copied automatically) would corrupt the markers of dst
+                exclude=[start_copy_file.name, end_copy_file.name, manifest_file.name],
+                stats=stats,
+                log_fn=log_fn,
+            )
     elif src_path.with_suffix(".zip").exists():
         source_format = "zip"
         # extract zip
         log(log_fn, f"extracting '{src_path.with_suffix('.zip')}' to '{dst_path}'")
-        with zipfile.ZipFile(src_path.with_suffix(".zip")) as f:
-            f.extractall(dst_path)
+        # extract chunks of the zip in parallel (extracted chunks are tracked in the manifest to be able to resume)
+        manifest_file.touch()
+        unzip_parallel(
+            src=src_path.with_suffix(".zip"),
+            dst=dst_path,
+            num_workers=num_workers,
+            manifest_path=manifest_file,
+            stats=stats,
+            log_fn=log_fn,
+        )
     else:
         raise NotImplementedError
+    stats.finish()
+
+    # check sizes/checksums of the copied files (before the copy is marked as complete)
+    check_copy_integrity(
+        src_path=src_path,
+        dst_path=dst_path,
+        mode=check_integrity,
+        source_format=source_format,
+        classwise=False,
+        num_workers=num_workers,
+        log_fn=log_fn,
+    )
 
     # create end_copy_file
-    with open(end_copy_file, "w") as f:
-        f.write("this file indicates that copying the dataset automatically was successful")
+    finish_autocopy_dst(dst_path)
 
     log(log_fn, "finished copying data from global to local")
     return CopyFolderResult(
         was_copied=True,
+        stats=stats,
         was_deleted=was_deleted,
+        was_resumed=was_resumed,
         source_format=source_format,
     )
 
 
 
 
-def unzip_batched_zips(src, dst, num_workers=0):
+def unzip_batched_zips(src, dst, num_workers=0, manifest_path=None, stats=None):
     src_path = Path(src).expanduser()
     assert src_path.exists(), f"src_path '{src_path}' doesn't exist"
     dst_path = Path(dst).expanduser()
@@ -125,4 +171,4 @@ def unzip_batched_zips(src, dst, num_workers=0):
         jobargs.append((src_uri, dst_path))
 
     # run jobs
-    run_unzip_jobs(jobargs=jobargs, num_workers=num_workers)
+    run_unzip_jobs(jobargs=jobargs, num_workers=num_workers, manifest_path=manifest_path, stats=stats)
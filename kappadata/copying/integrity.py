@@ -0,0 +1,172 @@
+import os
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from kappadata.utils.logging import log
+
+INTEGRITY_MANIFEST_NAME = "kappadata_integrity.txt"
+# files that are created by kappadata and are not part of the dataset
+_EXCLUDE = {
+    "autocopy_start.txt",
+    "autocopy_end.txt",
+    "autocopy_manifest.txt",
+    "kappadata_index.npz",
+    INTEGRITY_MANIFEST_NAME,
+}
+_BUFFER_SIZE = 16 * 1024 ** 2
+# modes of the check_integrity argument of the copy functions
+CHECK_INTEGRITY_MODES = [None, "size", "checksum"]
+# formats of the sources of the copy functions (folder of raw files, folder of zips, zip)
+SOURCE_FORMATS = ["raw", "zips", "zip"]
+
+
+def _get_crc32(path):
+    # same checksum as zips use -> entries of zips and folders can be compared
+    crc = 0
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(_BUFFER_SIZE)
+            if len(data) == 0:
+                return crc
+            crc = zlib.crc32(data, crc)
+
+
+def _list_relative_paths(root):
+    relative_paths = []
+    for cur_root, dirs, files in os.walk(root):
+        dirs.sort()
+        relative_root = Path(cur_root).relative_to(root)
+        for file in sorted(files):
+            relative_path = (relative_root / file).as_posix()
+            if relative_path not in _EXCLUDE and not file.endswith(".tmp"):
+                relative_paths.append(relative_path)
+    return relative_paths
+
+
+def _map(fn, items, num_workers):
+    # file reads release the GIL (as does zlib.crc32 for large buffers) -> threads are sufficient
+    if num_workers <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        return list(pool.map(fn, items))
+
+
+def create_integrity_manifest(root, use_checksum=True, num_workers=0, log_fn=None):
+    """
+    writes the size (and crc32 checksum) of all files in root into root/kappadata_integrity.txt
+    (one "<relative_path>\t<size>\t<crc32>" line per file) which is used by check_integrity
+    """
+    root = Path(root).expanduser()
+    relative_paths = _list_relative_paths(root)
+    log(log_fn, f"creating integrity manifest of {len(relative_paths)} files in '{root}'")
+
+    def _get_entry(relative_path):
+        path = root / relative_path
+        return os.path.getsize(path), _get_crc32(path) if use_checksum else None
+
+    entries = _map(_get_entry, relative_paths, num_workers=num_workers)
+    path = root / INTEGRITY_MANIFEST_NAME
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        for relative_path, (size, crc) in zip(relative_paths, entries):
+            f.write(f"{relative_path}\t{size}\t{'' if crc is None else f'{crc:08x}'}\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_integrity_manifest(path):
+    """ returns a dict relative_path -> (size, crc32) where crc32 is None if no checksum was stored """
+    entries = {}
+    with open(path) as f:
+        for line in f:
+            relative_path, size, crc = line.rstrip("\n").rsplit("\t", maxsplit=2)
+            entries[relative_path] = int(size), int(crc, 16) if crc != "" else None
+    return entries
+
+
+def get_integrity_entries_from_zip(path, prefix=None):
+    """ integrity entries (see load_integrity_manifest) from the metadata of a zip (no decompression required) """
+    with zipfile.ZipFile(path) as f:
+        return {
+            f"{prefix}/{info.filename}" if prefix is not None else info.filename: (info.file_size, info.CRC)
+            for info in f.infolist()
+            if not info.is_dir()
+        }
+
+
+def get_integrity_entries(src_path, source_format, classwise=False):
+    """
+    integrity entries of a source that can be copied with the kappadata.copying functions
+    source_format is the format that the copy function detected (see CopyFolderResult.source_format)
+    - "raw" with kappadata_integrity.txt -> entries of the manifest
+    - "raw" without manifest -> sizes of the files
+    - "zips" (folder of zips) -> entries from the zip metadata
+      (members of <name>.zip are prefixed with <name> if classwise)
+    - "zip" -> entries from the zip metadata
+    """
+    assert source_format in SOURCE_FORMATS, f"invalid source_format '{source_format}'"
+    src_path = Path(src_path).expanduser()
+    if source_format == "zip":
+        return get_integrity_entries_from_zip(src_path.with_suffix(".zip"))
+    if source_format == "zips":
+        entries = {}
+        for item in sorted(item for item in os.listdir(src_path) if item.endswith(".zip")):
+            prefix = item[:-len(".zip")] if classwise else None
+            entries.update(get_integrity_entries_from_zip(src_path / item, prefix=prefix))
+        return entries
+    if (src_path / INTEGRITY_MANIFEST_NAME).exists():
+        return load_integrity_manifest(src_path / INTEGRITY_MANIFEST_NAME)
+    return {
+        relative_path: (os.path.getsize(src_path / relative_path), None)
+        for relative_path in _list_relative_paths(src_path)
+    }
+
+
+def check_integrity(root, entries, use_checksum=True, num_workers=0, log_fn=None):
+    """
+    checks that all files of entries (see load_integrity_manifest) exist in root and have the expected size
+    (and crc32 checksum if use_checksum and the checksum is part of the entry)
+    returns a list of relative paths of invalid files
+    """
+    root = Path(root).expanduser()
+    log(log_fn, f"checking integrity of {len(entries)} files in '{root}' (use_checksum={use_checksum})")
+
+    def _is_valid(item):
+        relative_path, (size, crc) = item
+        path = root / relative_path
+        if not path.exists() or os.path.getsize(path) != size:
+            return False
+        if use_checksum and crc is not None:
+            return _get_crc32(path) == crc
+        return True
+
+    items = list(entries.items())
+    is_valid = _map(_is_valid, items, num_workers=num_workers)
+    invalid = [relative_path for (relative_path, _), valid in zip(items, is_valid) if not valid]
+    log(log_fn, f"integrity check found {len(invalid)} invalid files")
+    return invalid
+
+
+def check_copy_integrity(src_path, dst_path, mode, source_format, classwise=False, num_workers=0, log_fn=None):
+    """
+    checks sizes (mode="size") or sizes and checksums (mode="checksum") of the files copied from src_path to dst_path
+    (before the copy is marked as complete), mode=None skips the check
+    if files are invalid, the autocopy manifest is removed (the next attempt copies the whole dataset again)
+    and an AssertionError is raised
+    """
+    assert mode in CHECK_INTEGRITY_MODES, f"invalid check_integrity '{mode}'"
+    if mode is None:
+        return
+    invalid = check_integrity(
+        root=dst_path,
+        entries=get_integrity_entries(src_path, source_format=source_format, classwise=classwise),
+        use_checksum=mode == "checksum",
+        num_workers=num_workers,
+        log_fn=log_fn,
+    )
+    if len(invalid) > 0:
+        # copy can't be resumed
+        (Path(dst_path) / "autocopy_manifest.txt").unlink(missing_ok=True)
+        raise AssertionError(f"{len(invalid)} files of '{dst_path}' are invalid (e.g. '{invalid[0]}')")
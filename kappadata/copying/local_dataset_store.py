@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from kappadata.utils.file_lock import FileLock
+from kappadata.utils.logging import log
+from .folder import copy_folder_from_global_to_local
+
+
+def _is_process_alive(pid):
+    if os.name == "nt":
+        # os.kill(pid, 0) terminates the process on windows
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        # PROCESS_QUERY_LIMITED_INFORMATION
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            # ERROR_ACCESS_DENIED -> process exists but belongs to another user
+            return kernel32.GetLastError() == 5
+        try:
+            exit_code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+                return True
+            # STILL_ACTIVE
+            return exit_code.value == 259
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # process exists but belongs to another user
+        return True
+    return True
+
+
+def _get_folder_size(path):
+    num_bytes = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            num_bytes += os.path.getsize(os.path.join(root, file))
+    return num_bytes
+
+
+class LocalDatasetStore:
+    """
+    node-level store for datasets that are copied to a local disk and shared between all jobs of the node
+    - datasets are copied once via copy_folder_from_global_to_local (or another copy function such as
+      copy_imagefolder_from_global_to_local) into <root>/datasets/<name> and reused by subsequent jobs
+    - running jobs hold a reference to the datasets they use (one file <pid>_<uuid> per acquire in <root>/refs/<name>,
+      references of processes that are no longer alive are ignored)
+    - if the store exceeds num_bytes, datasets that are not in use are evicted (least recently used first)
+    sizes and last-used timestamps are stored in <root>/store.json which is only modified while holding a file lock
+    """
+
+    def __init__(self, root, num_bytes=None, log_fn=None):
+        super().__init__()
+        assert num_bytes is None or (isinstance(num_bytes, int) and 0 < num_bytes)
+        self.root = Path(root).expanduser()
+        self.num_bytes = num_bytes
+        self.log_fn = log_fn
+        self.datasets_path = self.root / "datasets"
+        self.refs_path = self.root / "refs"
+        self.state_path = self.root / "store.json"
+        self.lock = FileLock(self.root / "store.lock")
+        # name -> references that were acquired by this object (released in reverse order)
+        self._refs = {}
+
+    @staticmethod
+    def get_default_name(global_path, relative_path=None):
+        src_path = Path(global_path).expanduser()
+        if relative_path is not None:
+            src_path = src_path / relative_path
+        # e.g. /system/data/ImageNet/train.zip -> system_data_ImageNet_train_<hash>
+        # the hash of the full path avoids collisions (e.g. train vs train.zip or data_imagenet vs data/imagenet)
+        path_str = src_path.as_posix()
+        if path_str.endswith(".zip"):
+            path_str = path_str[:-len(".zip")]
+        readable = "_".join(part for part in path_str.split("/") if part not in ["", "."])
+        path_hash = hashlib.sha256(src_path.resolve().as_posix().encode()).hexdigest()[:8]
+        return f"{readable}_{path_hash}"
+
+    def _load_state(self):
+        if not self.state_path.exists():
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        tmp_path = self.state_path.with_name(f"{self.state_path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=4)
+        os.replace(tmp_path, self.state_path)
+
+    def get_num_refs(self, name):
+        """ number of alive processes that use the dataset """
+        ref_path = self.refs_path / name
+        if not ref_path.exists():
+            return 0
+        num_refs = 0
+        for ref in os.listdir(ref_path):
+            if _is_process_alive(int(ref.split("_")[0])):
+                num_refs += 1
+            else:
+                # process died without releasing the dataset
+                (ref_path / ref).unlink(missing_ok=True)
+        return num_refs
+
+    @property
+    def num_used_bytes(self):
+        return sum(entry["num_bytes"] for entry in self._load_state().values())
+
+    def _evict(self, state, num_bytes_required=0):
+        # requires lock
+        if self.num_bytes is None:
+            return
+        num_used_bytes = sum(entry["num_bytes"] for entry in state.values())
+        for name in sorted(state.keys(), key=lambda key: state[key]["last_used"]):
+            if num_used_bytes + num_bytes_required <= self.num_bytes:
+                break
+            if self.get_num_refs(name) > 0:
+                continue
+            log(self.log_fn, f"evicting '{name}' ({state[name]['num_bytes']} bytes) from '{self.datasets_path}'")
+            # remove from state first such that an interrupted deletion is not considered as valid dataset
+            num_used_bytes -= state.pop(name)["num_bytes"]
+            self._save_state(state)
+            shutil.rmtree(self.datasets_path / name, ignore_errors=True)
+        if num_used_bytes + num_bytes_required > self.num_bytes:
+            log(self.log_fn, f"local dataset store exceeds its budget ({num_used_bytes} > {self.num_bytes} bytes)")
+
+    def evict(self, num_bytes_required=0):
+        """ evicts datasets that are not in use until num_bytes_required bytes are available """
+        with self.lock:
+            self._evict(self._load_state(), num_bytes_required=num_bytes_required)
+
+    def acquire(
+            self,
+            global_path,
+            relative_path=None,
+            name=None,
+            copy_fn=copy_folder_from_global_to_local,
+            num_workers=0,
+    ):
+        """ copies the dataset into the store (if it is not already in the store) and returns its local path """
+        src_path = Path(global_path).expanduser()
+        if relative_path is not None:
+            src_path = src_path / relative_path
+        name = name or self.get_default_name(src_path)
+        dst_path = self.datasets_path / name
+
+        # add reference (protects the dataset from being evicted) and make space for the dataset
+        with self.lock:
+            (self.refs_path / name).mkdir(parents=True, exist_ok=True)
+            ref = f"{os.getpid()}_{uuid.uuid4().hex}"
+            (self.refs_path / name / ref).touch()
+            self._refs.setdefault(name, []).append(ref)
+            state = self._load_state()
+            if name not in state:
+                # size of the source (compressed size if it is a zip)
+                self._evict(state, num_bytes_required=self._estimate_num_bytes(src_path))
+
+        # copy (multiple jobs that acquire the same dataset are synchronized via the lock of the copy function)
+        copy_fn(global_path=src_path, local_path=dst_path, num_workers=num_workers, log_fn=self.log_fn, use_lock=True)
+
+        # update state and evict other datasets if the store exceeds its budget
+        with self.lock:
+            state = self._load_state()
+            if name in state:
+                state[name]["last_used"] = time.time()
+            else:
+                state[name] = dict(
+                    num_bytes=_get_folder_size(dst_path),
+                    last_used=time.time(),
+                    global_path=src_path.as_posix(),
+                )
+            self._save_state(state)
+            self._evict(state)
+        return dst_path
+
+    @staticmethod
+    def _estimate_num_bytes(src_path):
+        zip_path = src_path.with_suffix(".zip")
+        if zip_path.exists():
+            return zip_path.stat().st_size
+        if src_path.is_dir():
+            return _get_folder_size(src_path)
+        return 0
+
+    def release(self, name):
+        """ releases the last reference to the dataset that was acquired via this object """
+        with self.lock:
+            refs = self._refs.get(name, [])
+            assert len(refs) > 0, f"dataset '{name}' was not acquired"
+            (self.refs_path / name / refs.pop()).unlink(missing_ok=True)
+            state = self._load_state()
+            if name in state:
+                state[name]["last_used"] = time.time()
+                self._save_state(state)
+
+    @contextmanager
+    def use(self, global_path, relative_path=None, name=None, **kwargs):
+        name = name or self.get_default_name(global_path, relative_path=relative_path)
+        dst_path = self.acquire(global_path=global_path, relative_path=relative_path, name=name, **kwargs)
+        try:
+            yield dst_path
+        finally:
+            self.release(name)
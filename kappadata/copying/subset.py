@@ -0,0 +1,189 @@
+import zipfile
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from kappadata.datasets.kd_subset import KDSubset
+from kappadata.datasets.kd_wrapper import KDWrapper
+from kappadata.utils.file_lock import FileLock
+from kappadata.utils.logging import log
+from kappadata.wrappers.mode_wrapper import ModeWrapper
+from kappadata.wrappers.sample_wrappers.kd_mix_wrapper import KDMixWrapper
+from .copy_stats import CopyStats, TimedReader, create_stats_delta
+from .copying_utils import (
+    CopyManifest,
+    append_to_manifest,
+    copy_files_resumable,
+    extract_member,
+    folder_contains_mostly_zips,
+    prepare_autocopy_dst,
+    run_jobs,
+)
+
+
+@dataclass
+class CopySubsetResult:
+    was_copied: bool
+    num_samples: int
+    source_format: str = None
+    num_copied: int = 0
+    stats: CopyStats = None
+
+
+def _get_root_indices(dataset, indices):
+    # indices is None if all samples of dataset are accessed
+    if isinstance(dataset, KDSubset):
+        subset_indices = np.asarray(dataset.indices, dtype=np.int64)
+        if indices is not None:
+            subset_indices = subset_indices[indices]
+        return _get_root_indices(dataset.dataset, subset_indices)
+    if isinstance(dataset, KDMixWrapper):
+        # mixes samples with random other samples of the dataset
+        return _get_root_indices(dataset.dataset, None)
+    if isinstance(dataset, (KDWrapper, ModeWrapper)):
+        return _get_root_indices(dataset.dataset, indices)
+    assert dataset.root_dataset is dataset, f"unsupported dataset type {type(dataset).__name__}"
+    if indices is None:
+        return np.arange(len(dataset), dtype=np.int64)
+    return indices
+
+
+def get_root_indices(dataset):
+    """ resolves the wrappers of dataset to the (sorted and unique) indices of the root dataset that are accessed """
+    return np.unique(_get_root_indices(dataset, None))
+
+
+def _unzip_members(src, dst, members, entries, manifest_path):
+    delta = create_stats_delta()
+    with TimedReader(open(src, "rb")) as reader, zipfile.ZipFile(reader) as f:
+        for member in members:
+            extract_member(f, reader, f.getinfo(member), dst, delta)
+    append_to_manifest(manifest_path, entries)
+    return delta
+
+
+def copy_subset_from_global_to_local(
+        dataset,
+        global_path,
+        local_path,
+        relative_path=None,
+        num_workers=0,
+        chunk_size=256,
+        log_fn=None,
+        use_lock=False,
+) -> CopySubsetResult:
+    """
+    copies only the files that are accessed by dataset (e.g. a KDImageFolder(root=global_path, use_index=True)
+    or a KDZipImageFolder(root=global_path) wrapped into a FewshotWrapper/ClassFilterWrapper/...)
+    the root dataset has to implement get_relative_path(idx) which returns the path of a sample relative to the
+    (extracted) dataset root (e.g. n01558993/n01558993_10029.JPEG)
+    source can be a folder, a folder of classwise zips or a zip (only the required members are extracted)
+    the copy is not marked as complete (the autocopy end file is not created) -> copying another subset or the whole
+    dataset into the same local_path resumes the copy
+    NOTE: indices of the local copy are not the same as the indices of the global dataset -> load the samples via
+    the index of the global dataset (e.g. KDImageFolder(root=global_path, use_index=True, local_root=local_path))
+    """
+    global_path = Path(global_path).expanduser()
+    local_path = Path(local_path).expanduser()
+    if relative_path is not None:
+        # relative path can be .zip -> relative path is always without .zip as dst_path is never .zip
+        relative_path = Path(relative_path)
+        if relative_path.name.endswith(".zip"):
+            relative_path = relative_path.with_suffix("")
+    src_path = global_path / relative_path if relative_path is not None else global_path
+    dst_path = local_path / relative_path if relative_path is not None else local_path
+    if use_lock:
+        with FileLock(dst_path.parent / f"{dst_path.name}.autocopy.lock"):
+            return copy_subset_from_global_to_local(
+                dataset=dataset,
+                global_path=global_path,
+                local_path=local_path,
+                relative_path=relative_path,
+                num_workers=num_workers,
+                chunk_size=chunk_size,
+                log_fn=log_fn,
+            )
+
+    root_indices = get_root_indices(dataset)
+    root_dataset = dataset.root_dataset
+    log(log_fn, f"dataset accesses {len(root_indices)}/{len(root_dataset)} samples of the root dataset")
+    state = prepare_autocopy_dst(dst_path, log_fn=log_fn)
+    if state in ["copied", "manual"]:
+        return CopySubsetResult(was_copied=False, num_samples=len(root_indices))
+    manifest_file = dst_path / "autocopy_manifest.txt"
+    manifest_file.touch()
+    manifest = CopyManifest(manifest_file)
+    relative_paths = [
+        relative_path
+        for relative_path in (root_dataset.get_relative_path(int(idx)) for idx in root_indices)
+        if relative_path not in manifest
+    ]
+    stats = CopyStats(num_files=len(relative_paths), log_fn=log_fn)
+
+    if src_path.exists() and src_path.is_dir():
+        contains_mostly_zips, _ = folder_contains_mostly_zips(src_path)
+        if not contains_mostly_zips:
+            num_copied = copy_files_resumable(
+                src=src_path,
+                dst=dst_path,
+                manifest=manifest,
+                num_workers=num_workers,
+                chunk_size=chunk_size,
+                relative_paths=relative_paths,
+                stats=stats,
+                log_fn=log_fn,
+            )
+            stats.finish()
+            log(log_fn, "finished copying subset from global to local")
+            return CopySubsetResult(
+                was_copied=True,
+                num_samples=len(root_indices),
+                source_format="raw",
+                num_copied=num_copied,
+                stats=stats,
+            )
+        # classwise zips (e.g. imagenet1k/train/n01558993.zip contains n01558993_10029.JPEG)
+        source_format = "zips"
+        members_per_zip = defaultdict(list)
+        for relative_path in relative_paths:
+            class_name, member = relative_path.split("/", maxsplit=1)
+            members_per_zip[class_name].append((member, relative_path))
+        zip_args = [
+            (src_path / f"{class_name}.zip", dst_path / class_name, members)
+            for class_name, members in members_per_zip.items()
+        ]
+    elif src_path.with_suffix(".zip").exists():
+        # single zip (e.g. imagenet1k/train.zip contains n01558993/n01558993_10029.JPEG)
+        source_format = "zip"
+        zip_args = [
+            (src_path.with_suffix(".zip"), dst_path, [(relative_path, relative_path) for relative_path in relative_paths])
+        ]
+    else:
+        raise NotImplementedError
+
+    # extract required members in chunks (extracted chunks are tracked in the manifest to be able to resume)
+    jobargs = []
+    for src, dst, members in zip_args:
+        dst.mkdir(exist_ok=True, parents=True)
+        for i in range(0, len(members), chunk_size):
+            chunk = members[i:i + chunk_size]
+            jobargs.append((src, dst, [member for member, _ in chunk], [entry for _, entry in chunk]))
+    log(log_fn, f"extracting {len(relative_paths)} files from '{src_path}' using {num_workers} workers")
+    jobs = [
+        joblib.delayed(_unzip_members)(src, dst, members=members, entries=entries, manifest_path=manifest_file)
+        for src, dst, members, entries in jobargs
+    ]
+    for delta in run_jobs(jobs, num_workers=num_workers):
+        stats.add(**delta)
+    stats.finish()
+    log(log_fn, "finished copying subset from global to local")
+    return CopySubsetResult(
+        was_copied=True,
+        num_samples=len(root_indices),
+        source_format=source_format,
+        num_copied=len(relative_paths),
+        stats=stats,
+    )
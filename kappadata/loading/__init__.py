@@ -1 +1,2 @@
-from .image_folder import raw_image_loader, raw_image_folder_sample_to_pil_sample
+from .draft import draft_image, draft_loader, get_draft_original_size
+from .image_folder import raw_image_loader, raw_image_to_pil, raw_image_folder_sample_to_pil_sample
@@ -0,0 +1,40 @@
+from PIL import Image
+
+_DRAFT_INFO_KEY = "kd_draft"
+
+
+def draft_image(img, draft_size):
+    """
+    reduced-size JPEG decoding (DCT-domain downscaling by 1/2, 1/4 or 1/8) via PIL.Image.draft
+    the image is decoded with the smallest scale such that the shorter side is still >= draft_size
+    the original size is stored in img.info such that transforms (e.g. KDRandomResizedCrop) can sample their
+    parameters w.r.t. the original image (see get_draft_original_size)
+    has to be called before the image is decoded (i.e. directly after Image.open)
+    """
+    if draft_size is None or img.format != "JPEG":
+        return img
+    og_size = img.size
+    img.draft("RGB", (draft_size, draft_size))
+    if img.size != og_size:
+        img.info[_DRAFT_INFO_KEY] = dict(og_size=og_size, size=img.size)
+    return img
+
+
+def get_draft_original_size(img):
+    """
+    returns the (width, height) of the original image if img was decoded with draft_image and wasn't resized since
+    (PIL copies img.info in most operations -> check that the size is still the same as after decoding)
+    """
+    if not isinstance(img, Image.Image):
+        return None
+    draft_info = img.info.get(_DRAFT_INFO_KEY, None)
+    if draft_info is None or img.size != draft_info["size"]:
+        return None
+    return draft_info["og_size"]
+
+
+def draft_loader(path, draft_size=None):
+    # same as torchvision.datasets.folder.pil_loader but with draft_image
+    with open(path, "rb") as f:
+        img = draft_image(Image.open(f), draft_size=draft_size)
+        return img.convert("RGB")
@@ -2,12 +2,18 @@ import io
 
 from PIL import Image
 
+from .draft import draft_image
+
 
 def raw_image_loader(path):
     with open(path, "rb") as f:
         return f.read()
 
 
-def raw_image_folder_sample_to_pil_sample(xy):
+def raw_image_to_pil(x, draft_size=None):
+    return draft_image(Image.open(io.BytesIO(x)), draft_size=draft_size).convert("RGB")
+
+
+def raw_image_folder_sample_to_pil_sample(xy, draft_size=None):
     x, y = xy
-    return Image.open(io.BytesIO(x)).convert("RGB"), y
+    return raw_image_to_pil(x, draft_size=draft_size), y
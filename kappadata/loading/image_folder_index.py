@@ -0,0 +1,142 @@
+import os
+import zlib
+from pathlib import Path
+
+import numpy as np
+from torchvision.datasets.folder import IMG_EXTENSIONS, find_classes, make_dataset
+
+from kappadata.utils.file_lock import FileLock
+from kappadata.utils.logging import log
+
+
+class ImageFolderIndex:
+    """
+    compact index of an image folder (same samples/order as torchvision.datasets.ImageFolder)
+    paths are stored relative to the root as one utf-8 encoded byte array + offsets (instead of a list of tuples)
+    which makes saving/loading fast and allows to reuse the index for copies of the image folder
+    """
+
+    def __init__(self, path_bytes, path_offsets, classes, class_names, fingerprint=None):
+        super().__init__()
+        self.path_bytes = path_bytes
+        self.path_offsets = path_offsets
+        self.classes = classes
+        self.class_names = class_names
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.classes)
+
+    def get_relative_path(self, idx):
+        return self.path_bytes[self.path_offsets[idx]:self.path_offsets[idx + 1]].tobytes().decode("utf-8")
+
+    @staticmethod
+    def get_fingerprint(root):
+        """
+        cheap validation of an index via modification times
+        - automatically copied datasets: modification time of the autocopy_end.txt marker
+        - otherwise: checksum of the class folder names and modification times of all class folders
+          (changes when files are added/removed)
+        the modification time of root is not used as the index itself (and its lock) is stored in root
+        """
+        root = Path(root).expanduser()
+        end_copy_file = root / "autocopy_end.txt"
+        if end_copy_file.exists():
+            return np.array([end_copy_file.stat().st_mtime_ns], dtype=np.int64)
+        with os.scandir(root) as it:
+            class_folders = sorted((entry for entry in it if entry.is_dir()), key=lambda e: e.name)
+        names_crc = zlib.crc32("/".join(entry.name for entry in class_folders).encode("utf-8"))
+        mtimes = [names_crc] + [entry.stat().st_mtime_ns for entry in class_folders]
+        return np.array(mtimes, dtype=np.int64)
+
+    @staticmethod
+    def create(root, extensions=IMG_EXTENSIONS, is_valid_file=None):
+        root = Path(root).expanduser()
+        fingerprint = ImageFolderIndex.get_fingerprint(root)
+        class_names, class_to_idx = find_classes(root)
+        if is_valid_file is not None:
+            extensions = None
+        samples = make_dataset(root, class_to_idx=class_to_idx, extensions=extensions, is_valid_file=is_valid_file)
+        encoded_paths = [Path(path).relative_to(root).as_posix().encode("utf-8") for path, _ in samples]
+        path_offsets = np.zeros(len(samples) + 1, dtype=np.int64)
+        np.cumsum([len(encoded_path) for encoded_path in encoded_paths], out=path_offsets[1:])
+        return ImageFolderIndex(
+            path_bytes=np.frombuffer(b"".join(encoded_paths), dtype=np.uint8),
+            path_offsets=path_offsets,
+            classes=np.array([cls for _, cls in samples], dtype=np.int64),
+            class_names=class_names,
+            fingerprint=fingerprint,
+        )
+
+    def save(self, path):
+        path = Path(path).expanduser()
+        # write to temporary file and rename (atomic) to avoid that other processes load a partially written index
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp.npz")
+        np.savez(
+            tmp_path,
+            path_bytes=self.path_bytes,
+            path_offsets=self.path_offsets,
+            classes=self.classes,
+            class_names=np.array(self.class_names),
+            fingerprint=self.fingerprint,
+        )
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path):
+        with np.load(Path(path).expanduser()) as data:
+            return ImageFolderIndex(
+                path_bytes=data["path_bytes"],
+                path_offsets=data["path_offsets"],
+                classes=data["classes"],
+                class_names=data["class_names"].tolist(),
+                fingerprint=data["fingerprint"],
+            )
+
+    @staticmethod
+    def get_default_index_path(root):
+        # files in the root of an image folder are ignored by ImageFolder
+        return Path(root).expanduser() / "kappadata_index.npz"
+
+    @staticmethod
+    def load_or_create(root, index_path=None, extensions=IMG_EXTENSIONS, is_valid_file=None, log_fn=None):
+        """
+        loads the index from index_path if it is valid for root, otherwise creates it and saves it to index_path
+        only one process creates the index, other processes wait for it and load the result
+        NOTE: the index is not invalidated when extensions/is_valid_file change
+        """
+        root = Path(root).expanduser()
+        index_path = Path(index_path or ImageFolderIndex.get_default_index_path(root)).expanduser()
+        fingerprint = ImageFolderIndex.get_fingerprint(root)
+
+        def _try_load():
+            if not index_path.exists():
+                return None
+            index = ImageFolderIndex.load(index_path)
+            if not np.array_equal(index.fingerprint, fingerprint):
+                log(log_fn, f"index '{index_path}' is outdated")
+                return None
+            return index
+
+        index = _try_load()
+        if index is not None:
+            return index
+        try:
+            lock = FileLock(index_path.with_name(f"{index_path.name}.lock"))
+            lock.acquire()
+        except OSError:
+            # e.g. root is read-only -> create index without saving it
+            log(log_fn, f"can't create index '{index_path}' -> creating index in-memory")
+            return ImageFolderIndex.create(root=root, extensions=extensions, is_valid_file=is_valid_file)
+        try:
+            # index could have been created while waiting for the lock
+            index = _try_load()
+            if index is not None:
+                return index
+            log(log_fn, f"creating index of '{root}'")
+            index = ImageFolderIndex.create(root=root, extensions=extensions, is_valid_file=is_valid_file)
+            index.save(index_path)
+            log(log_fn, f"saved index of '{root}' ({len(index)} samples) to '{index_path}'")
+            return index
+        finally:
+            lock.release()
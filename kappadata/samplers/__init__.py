@@ -1,8 +1,12 @@
 from .class_balanced_sampler import ClassBalancedSampler
+from .copy_ahead_sampler import CopyAheadSampler
 from .distributed_sampler import DistributedSampler
 from .infinite_batch_sampler import InfiniteBatchSampler
 from .interleaved_sampler import InterleavedSampler, InterleavedSamplerConfig
+from .partitioned_distributed_sampler import PartitionedDistributedSampler
+from .permutation_sampler import PermutationSampler
 from .random_sampler import RandomSampler
+from .read_ahead_sampler import ReadAheadSampler
 from .semi_sampler import SemiSampler
 from .sequential_sampler import SequentialSampler
 from .weighted_sampler import WeightedSampler
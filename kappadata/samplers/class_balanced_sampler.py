@@ -1,10 +1,19 @@
-import torch
+import numpy as np
 
 from kappadata.utils.distributed import get_rank, get_world_size
-from kappadata.utils.getall_as_tensor import getall_as_tensor
+from kappadata.utils.getall_as_tensor import getall_as_numpy
 
 
 class ClassBalancedSampler:
+    """
+    samples samples_per_class indices of every class per epoch
+    - replacement=False: each class iterates over (random) permutations of its samples (minority classes are
+      repeated, majority classes are cut off)
+    - replacement=True: samples of each class are drawn uniformly with replacement
+    indices of an epoch are created with vectorized numpy operations (one gather per epoch) -> fast also for
+    datasets with many classes and samples (e.g. ImageNet-21k)
+    """
+
     def __init__(
             self,
             dataset,
@@ -14,25 +23,35 @@ class ClassBalancedSampler:
             seed=0,
             rank=None,
             world_size=None,
+            replacement=False,
     ):
         super().__init__()
+        assert shuffle or not replacement, "replacement requires shuffle"
         self.dataset = dataset
         self.shuffle = shuffle
         self.seed = seed
         self.rank = rank or get_rank()
         self.world_size = world_size or get_world_size()
+        self.replacement = replacement
         self.epoch = 0
 
         # load/check all classes
         self.num_classes = max(2, dataset.getdim_class())
-        classes = getall_as_tensor(self.dataset, item=getall_item)
-        unique, counts = classes.unique(return_counts=True)
+        classes = getall_as_numpy(self.dataset, item=getall_item)
         assert classes.ndim == 1
-        assert len(unique) == self.num_classes
+        assert np.all((0 <= classes) & (classes < self.num_classes))
+        counts = np.bincount(classes, minlength=self.num_classes)
+        assert np.all(counts > 0)
+
+        # group indices by class (stable -> indices of a class are in ascending order)
+        self.sorted_indices = np.argsort(classes, kind="stable")
+        self.class_counts = counts
+        self.class_offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        self.samples_per_class = samples_per_class or int(counts.max())
 
-        # calculate indices per class
-        self.indices_per_class = [(classes == i).nonzero().squeeze(1) for i in range(self.num_classes)]
-        self.samples_per_class = samples_per_class or counts.max().item()
+    @property
+    def indices_per_class(self):
+        return np.split(self.sorted_indices, self.class_offsets[1:])
 
     @property
     def effective_length(self):
@@ -45,25 +64,39 @@ class ClassBalancedSampler:
     def set_epoch(self, epoch):
         self.epoch = epoch
 
+    def _get_positions_with_replacement(self, rng):
+        # position of the j-th sample of class c is offset[c] + uniform integer in [0, count[c])
+        counts = np.repeat(self.class_counts, self.samples_per_class)
+        offsets = np.repeat(self.class_offsets, self.samples_per_class)
+        return offsets + (rng.random(len(counts)) * counts).astype(np.int64)
+
+    def _get_positions_without_replacement(self, rng):
+        # class c needs ceil(samples_per_class / count[c]) permutations of its samples
+        # -> one group per (class, permutation) which contains all positions of the class
+        num_perms = -(-self.samples_per_class // self.class_counts)
+        group_class = np.repeat(np.arange(self.num_classes), num_perms)
+        group_perm_idx = np.arange(len(group_class)) - np.repeat(np.cumsum(num_perms) - num_perms, num_perms)
+        group_sizes = self.class_counts[group_class]
+        group_starts = np.cumsum(group_sizes) - group_sizes
+        slot_group = np.repeat(np.arange(len(group_class)), group_sizes)
+        slot_pos = np.arange(len(slot_group)) - group_starts[slot_group]
+        positions = self.class_offsets[group_class][slot_group] + slot_pos
+        if self.shuffle:
+            # permute within each group by sorting random keys within groups
+            positions = positions[np.lexsort((rng.random(len(positions)), slot_group))]
+        # cutoff last permutation of each class
+        is_used = group_perm_idx[slot_group] * group_sizes[slot_group] + slot_pos < self.samples_per_class
+        return positions[is_used]
+
     def __iter__(self):
         # draw indices for current epoch (same for all ranks)
-        generator = torch.Generator().manual_seed(self.seed + self.epoch)
-        indices = []
-        for indices_per_class in self.indices_per_class:
-            remaining_indices = self.samples_per_class
-            while remaining_indices > 0:
-                if self.shuffle:
-                    perm = torch.randperm(len(indices_per_class), generator=generator)
-                else:
-                    perm = torch.arange(len(indices_per_class))
-                perm = perm[:remaining_indices]
-                indices.append(indices_per_class[perm])
-                remaining_indices -= len(perm)
-        indices = torch.concat(indices)
+        rng = np.random.default_rng(seed=[self.seed, self.epoch])
+        if self.replacement:
+            positions = self._get_positions_with_replacement(rng)
+        else:
+            positions = self._get_positions_without_replacement(rng)
         if self.shuffle:
-            indices = indices[torch.randperm(len(indices), generator=generator)]
-        # distribute among ranks
-        indices = indices[self.rank:self.effective_length:self.world_size].tolist()
-        # drop last
-        indices = indices[:len(self)]
-        yield from indices
+            positions = positions[rng.permutation(len(positions))]
+        # distribute among ranks + drop last
+        positions = positions[self.rank:self.effective_length:self.world_size][:len(self)]
+        yield from self.sorted_indices[positions].tolist()
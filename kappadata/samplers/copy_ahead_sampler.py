@@ -0,0 +1,45 @@
+from collections import deque
+
+
+class CopyAheadSampler:
+    """
+    wraps a sampler and tells a kappadata.copying.BackgroundCopier which files are needed next such that the
+    files of the next num_ahead samples are copied to the local storage before all other files
+    path_fn maps an index to the path of the sample relative to the copied folder
+    (e.g. KDImageFolder.get_relative_path)
+    """
+
+    def __init__(self, sampler, copier, path_fn, num_ahead=1024):
+        super().__init__()
+        assert isinstance(num_ahead, int) and 0 < num_ahead
+        self.sampler = sampler
+        self.copier = copier
+        self.path_fn = path_fn
+        self.num_ahead = num_ahead
+
+    @property
+    def data_source(self):
+        # InterleavedSampler retrieves the dataset from the sampler
+        if hasattr(self.sampler, "data_source"):
+            return self.sampler.data_source
+        return self.sampler.dataset
+
+    def __len__(self):
+        return len(self.sampler)
+
+    def set_epoch(self, epoch):
+        if hasattr(self.sampler, "set_epoch"):
+            self.sampler.set_epoch(epoch)
+
+    def __iter__(self):
+        if self.copier.is_finished:
+            yield from self.sampler
+            return
+        pending = deque()
+        for idx in self.sampler:
+            pending.append(idx)
+            if not self.copier.is_finished:
+                self.copier.prioritize([self.path_fn(idx)])
+            if len(pending) > self.num_ahead:
+                yield pending.popleft()
+        yield from pending
@@ -1,3 +1,5 @@
+import math
+
 import torch
 from torch.utils.data import DistributedSampler as TorchDistributedSampler
 
@@ -14,10 +16,9 @@ class DistributedSampler(TorchDistributedSampler):
     def effective_length(self):
         return len(self.dataset)
 
-    def __iter__(self):
+    def _get_indices(self):
         if self.num_repeats == 1:
-            yield from super().__iter__()
-            return
+            return list(super().__iter__())
 
         assert self.shuffle
         indices = torch.randperm(len(self.dataset), generator=torch.Generator().manual_seed(self.seed + self.epoch))
@@ -38,5 +39,12 @@ class DistributedSampler(TorchDistributedSampler):
         # subsample
         indices = indices[self.rank:self.total_size:self.num_replicas]
         assert len(indices) == self.num_samples
+        return indices
 
-        yield from indices
+    def iter_from(self, start):
+        # used by InterleavedSampler to resume in the middle of an epoch
+        # indices of the epoch are deterministic (seed + epoch) -> generate them and slice
+        return iter(self._get_indices()[start:])
+
+    def __iter__(self):
+        return self.iter_from(0)
@@ -1,4 +1,6 @@
 import bisect
+import itertools
+import math
 from dataclasses import dataclass
 
 from torch.utils.data import ConcatDataset
@@ -69,13 +71,7 @@ class _InterleavedBatchSampler:
         self.sampler = sampler
 
     def __iter__(self):
-        idxs = []
-        for is_full_batch, idx in self.sampler:
-            idxs.append(idx)
-            if is_full_batch:
-                yield idxs
-                idxs = []
-        assert len(idxs) == 0
+        yield from self.sampler.iter_batches()
 
     def __len__(self):
         raise NotImplementedError
@@ -123,38 +119,37 @@ class InterleavedSampler:
             assert config.every_n_samples is None or 0 < config.every_n_samples
             assert config.batch_size is None or 0 < config.batch_size
 
+        self.main_sampler = main_sampler
+        self.drop_last = drop_last
+        self.configs = configs
+        self.batch_size = batch_size
+        self.epochs = epochs
+        self.updates = updates
+        self.samples = samples
+        self.drop_last_batch_size = drop_last_batch_size
+
         # infer full start checkpoint from one of epoch/update/sample
+        # all updates of an epoch have batch_size samples except the last one if not drop_last
+        samples_per_epoch = self._get_samples_per_epoch()
+        updates_per_epoch = math.ceil(samples_per_epoch / self.batch_size)
         if start_epoch is not None:
             assert isinstance(start_epoch, int) and start_update is None and start_sample is None
-            start_update = len(main_sampler) // batch_size * start_epoch
-            start_sample = start_update * batch_size
+            start_update = updates_per_epoch * start_epoch
+            start_sample = samples_per_epoch * start_epoch
         elif start_update is not None:
             assert start_epoch is None and isinstance(start_update, int) and start_sample is None
-            start_epoch = int(start_update / (len(main_sampler) // batch_size))
-            start_sample = start_update * batch_size
-            if start_update % (len(main_sampler) // batch_size) != 0 or not drop_last:
-                raise NotImplementedError("defining start_update would require to skip forward in the sampler")
+            start_epoch = start_update // updates_per_epoch
+            start_sample = start_epoch * samples_per_epoch + start_update % updates_per_epoch * self.batch_size
         elif start_sample is not None:
             assert start_epoch is None and start_update is None and isinstance(start_sample, int)
-            assert start_sample % batch_size == 0
-            start_update = start_sample // batch_size
-            start_epoch = int(start_update / (len(main_sampler) // batch_size))
-            if start_update % (len(main_sampler) // batch_size) != 0 or not drop_last:
-                raise NotImplementedError("defining start_update would require to skip forward in the sampler")
+            start_epoch = start_sample // samples_per_epoch
+            assert start_sample % samples_per_epoch % self.batch_size == 0, "start_sample has to be after an update"
+            start_update = start_epoch * updates_per_epoch + start_sample % samples_per_epoch // self.batch_size
         else:
             start_epoch = start_update = start_sample = 0
-
-        self.main_sampler = main_sampler
-        self.drop_last = drop_last
-        self.configs = configs
-        self.batch_size = batch_size
-        self.epochs = epochs
-        self.updates = updates
-        self.samples = samples
         self.start_epoch = start_epoch
         self.start_update = start_update
         self.start_sample = start_sample
-        self.drop_last_batch_size = drop_last_batch_size
 
         def _get_data_source(sampler):
             if hasattr(sampler, "data_source"):
@@ -200,28 +195,36 @@ class InterleavedSampler:
         )
 
     def __iter__(self):
+        # per-sample view of iter_batches (is_full_batch is True for the last index of a batch)
+        for batch in self.iter_batches():
+            for idx in batch[:-1]:
+                yield False, idx
+            yield True, batch[-1]
+
+    def iter_batches(self):
+        """ yields the indices of each batch as list (one generator round-trip per batch instead of per sample) """
         if self.epochs == 0 or self.updates == 0 or self.samples == 0:
             assert self.start_epoch == 0 and self.start_update == 0 and self.start_sample == 0
             yield from self._eval_loop()
         else:
             yield from self._training_loop()
 
+    def _iter_interleaved_batches(self, config_idx):
+        config = self.configs[config_idx]
+        index_offset = self.index_offsets[config_idx]
+        interleaved_batch_size = config.batch_size or self.batch_size
+        iterator = iter(config.sampler)
+        while True:
+            batch = [index_offset + idx for idx in itertools.islice(iterator, interleaved_batch_size)]
+            if len(batch) == 0:
+                return
+            yield batch
+
     def _eval_loop(self):
-        for config_idx, config in enumerate(self.configs):
-            index_offset = self.index_offsets[config_idx]
-            sample_in_interleaved = 0
-            interleaved_batch_size = config.batch_size or self.batch_size
-            for interleaved_idx in config.sampler:
-                sample_in_interleaved += 1
-                if (
-                        sample_in_interleaved % interleaved_batch_size == 0 or
-                        sample_in_interleaved == len(config.sampler)
-                ):
-                    yield True, index_offset + interleaved_idx
-                else:
-                    yield False, index_offset + interleaved_idx
+        for config_idx in range(len(self.configs)):
+            yield from self._iter_interleaved_batches(config_idx)
 
-    def _training_loop(self):
+    def _get_samples_per_epoch(self):
         if self.drop_last:
             if self.drop_last_batch_size is not None:
                 if len(self.main_sampler) < self.drop_last_batch_size:
@@ -233,74 +236,82 @@ class InterleavedSampler:
                 if len(self.main_sampler) < self.batch_size:
                     self.batch_size = len(self.main_sampler)
                 batch_size = self.batch_size
-            samples_per_epoch = len(self.main_sampler) // batch_size * batch_size
-        else:
-            samples_per_epoch = len(self.main_sampler)
+            return len(self.main_sampler) // batch_size * batch_size
+        return len(self.main_sampler)
+
+    def _iter_main_sampler(self, start):
+        if start == 0:
+            return iter(self.main_sampler)
+        # samplers that support random access can start in the middle of an epoch without generating skipped indices
+        if hasattr(self.main_sampler, "iter_from"):
+            return self.main_sampler.iter_from(start)
+        # skip indices of the epoch (only indices are generated, no samples are loaded)
+        return itertools.islice(iter(self.main_sampler), start, None)
+
+    def _get_triggered_config_idxs(self, epoch, update, sample, sample_at_last_update, is_end_of_epoch):
+        # check which interleaved datasets have to be iterated (only possible after an update)
+        config_idxs = []
+        for config_idx, config in enumerate(self.configs):
+            should_iter = False
+            if config.every_n_epochs is not None:
+                # can only occour at the end of an epoch
+                should_iter = is_end_of_epoch and epoch % config.every_n_epochs == 0
+            if config.every_n_updates is not None:
+                should_iter = update % config.every_n_updates == 0
+            if config.every_n_samples is not None:
+                if sample % config.every_n_samples == 0:
+                    should_iter = True
+                elif sample_at_last_update // config.every_n_samples < sample // config.every_n_samples:
+                    should_iter = True
+            if should_iter:
+                config_idxs.append(config_idx)
+        return config_idxs
+
+    def _training_loop(self):
+        samples_per_epoch = self._get_samples_per_epoch()
 
         epoch = self.start_epoch
         update = self.start_update
         sample = self.start_sample
-        sample_in_update = 0
-        sample_at_last_update = 0
+        sample_at_last_update = self.start_sample
+        # resume in the middle of an epoch
+        sample_in_epoch = self.start_sample - self.start_epoch * samples_per_epoch
         while True:
-            sample_in_epoch = 0
             if hasattr(self.main_sampler, "set_epoch"):
                 self.main_sampler.set_epoch(epoch)
-            for main_idx in self.main_sampler:
-                sample += 1
-                sample_in_epoch += 1
-                sample_in_update += 1
-                if sample_in_update == self.batch_size or sample_in_epoch == samples_per_epoch:
-                    yield True, main_idx
-                else:
-                    yield False, main_idx
-                # check if interleaved dataset has to be iterated (only possible after a update)
-                # sample_in_update == self.batch_size -> full batch
-                # if not drop_last -> last batch is not full but is also an update
-                if sample_in_update == self.batch_size or sample_in_epoch == samples_per_epoch:
-                    # keep track of what the sample counter was at the last update for every_n_sample checks
-                    sample_in_update = 0
-                    # increase counters
-                    update += 1
-                    if sample_in_epoch == samples_per_epoch:
-                        epoch += 1
-
-                    for config_idx, config in enumerate(self.configs):
-                        # check if interleaved dataset has to be iterated
-                        should_iter = False
-                        if config.every_n_epochs is not None:
-                            # can only occour at the end of an epoch
-                            should_iter = sample_in_epoch == samples_per_epoch and epoch % config.every_n_epochs == 0
-                        if config.every_n_updates is not None:
-                            should_iter = update % config.every_n_updates == 0
-                        if config.every_n_samples is not None:
-                            if sample % config.every_n_samples == 0:
-                                should_iter = True
-                            elif sample_at_last_update // config.every_n_samples < sample // config.every_n_samples:
-                                should_iter = True
-                        if not should_iter:
-                            continue
-                        index_offset = self.index_offsets[config_idx]
-                        interleaved_batch_size = config.batch_size or self.batch_size
-                        sample_in_interleaved = 0
-                        for interleaved_idx in config.sampler:
-                            sample_in_interleaved += 1
-                            if (
-                                    sample_in_interleaved % interleaved_batch_size == 0 or
-                                    sample_in_interleaved == len(config.sampler)
-                            ):
-                                yield True, index_offset + interleaved_idx
-                            else:
-                                yield False, index_offset + interleaved_idx
-
-                    sample_at_last_update = sample
-                    # check if end is reached
-                    if (
-                            (self.epochs is not None and epoch == self.epochs) or
-                            (self.updates is not None and update == self.updates) or
-                            (self.samples is not None and sample >= self.samples)
-                    ):
-                        return
-                    # if drop_last -> skip last non-full batch
-                    if sample_in_epoch == samples_per_epoch:
-                        break
+            main_iterator = self._iter_main_sampler(sample_in_epoch)
+            # if drop_last -> last non-full batch is skipped
+            # if not drop_last -> last batch is not full but is also an update
+            while sample_in_epoch < samples_per_epoch:
+                cur_batch_size = min(self.batch_size, samples_per_epoch - sample_in_epoch)
+                batch = list(itertools.islice(main_iterator, cur_batch_size))
+                assert len(batch) == cur_batch_size, "main_sampler returned less than len(main_sampler) indices"
+                yield batch
+
+                # increase counters
+                sample += cur_batch_size
+                sample_in_epoch += cur_batch_size
+                update += 1
+                is_end_of_epoch = sample_in_epoch == samples_per_epoch
+                if is_end_of_epoch:
+                    epoch += 1
+
+                for config_idx in self._get_triggered_config_idxs(
+                        epoch=epoch,
+                        update=update,
+                        sample=sample,
+                        sample_at_last_update=sample_at_last_update,
+                        is_end_of_epoch=is_end_of_epoch,
+                ):
+                    yield from self._iter_interleaved_batches(config_idx)
+
+                # keep track of what the sample counter was at the last update for every_n_sample checks
+                sample_at_last_update = sample
+                # check if end is reached
+                if (
+                        (self.epochs is not None and epoch == self.epochs) or
+                        (self.updates is not None and update == self.updates) or
+                        (self.samples is not None and sample >= self.samples)
+                ):
+                    return
+            sample_in_epoch = 0
@@ -0,0 +1,99 @@
+import math
+
+import numpy as np
+import torch
+
+from kappadata.utils.distributed import get_rank, get_world_size
+
+
+def get_partition_indices(num_samples, num_partitions, partition_idx, seed=0):
+    """
+    deterministic partition of range(num_samples) into num_partitions (approximately) equally sized partitions
+    indices are assigned randomly (i.e. each partition contains samples of all classes) and returned sorted
+    (e.g. to copy the partition of a node via kappadata.copying.subset.copy_subset_from_global_to_local)
+    """
+    assert isinstance(num_partitions, int) and 0 < num_partitions <= num_samples
+    assert isinstance(partition_idx, int) and 0 <= partition_idx < num_partitions
+    perm = np.random.default_rng(seed=seed).permutation(num_samples)
+    return np.sort(np.array_split(perm, num_partitions)[partition_idx])
+
+
+class PartitionedDistributedSampler:
+    """
+    distributed sampler where each node only samples from its partition of the dataset
+    (e.g. for datasets that don't fit onto the local disk of a single node -> each node copies only its partition)
+    - ranks are assigned to partitions contiguously (rank // ranks_per_partition, i.e. one partition per node if
+      num_partitions is the number of nodes)
+    - the partition is shuffled every epoch and distributed among the ranks of the partition
+    - the partitions can be rotated every rotate_every_epochs epochs (node i uses partition
+      (i + epoch // rotate_every_epochs) % num_partitions) -> samples of a new partition have to be copied (or are
+      loaded from the global storage)
+    - all ranks return the same number of samples (partitions are padded/cut to the same length)
+    """
+
+    def __init__(
+            self,
+            dataset,
+            num_partitions,
+            rank=None,
+            world_size=None,
+            shuffle=True,
+            seed=0,
+            partition_seed=0,
+            drop_last=False,
+            rotate_every_epochs=None,
+    ):
+        super().__init__()
+        self.dataset = dataset
+        self.rank = rank if rank is not None else get_rank()
+        self.world_size = world_size if world_size is not None else get_world_size()
+        assert isinstance(num_partitions, int) and 0 < num_partitions
+        assert self.world_size % num_partitions == 0, "world_size has to be divisible by num_partitions"
+        assert rotate_every_epochs is None or (isinstance(rotate_every_epochs, int) and 0 < rotate_every_epochs)
+        self.num_partitions = num_partitions
+        self.ranks_per_partition = self.world_size // num_partitions
+        self.shuffle = shuffle
+        self.seed = seed
+        self.partition_seed = partition_seed
+        self.drop_last = drop_last
+        self.rotate_every_epochs = rotate_every_epochs
+        self.epoch = 0
+        self.partitions = [
+            get_partition_indices(len(dataset), num_partitions=num_partitions, partition_idx=i, seed=partition_seed)
+            for i in range(num_partitions)
+        ]
+
+    def get_partition_idx(self, epoch=None):
+        epoch = self.epoch if epoch is None else epoch
+        partition_idx = self.rank // self.ranks_per_partition
+        if self.rotate_every_epochs is not None:
+            partition_idx += epoch // self.rotate_every_epochs
+        return partition_idx % self.num_partitions
+
+    def get_partition_indices(self, epoch=None):
+        """ indices of the partition that is used in epoch (e.g. to copy the next partition in advance) """
+        return self.partitions[self.get_partition_idx(epoch=epoch)]
+
+    def __len__(self):
+        # partitions differ in size by at most 1
+        partition_sizes = [len(partition) for partition in self.partitions]
+        if self.drop_last:
+            return min(partition_sizes) // self.ranks_per_partition
+        return math.ceil(max(partition_sizes) / self.ranks_per_partition)
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def __iter__(self):
+        indices = self.get_partition_indices()
+        if self.shuffle:
+            # all ranks of a partition use the same permutation
+            generator = torch.Generator().manual_seed(self.seed + self.epoch)
+            indices = indices[torch.randperm(len(indices), generator=generator).numpy()]
+        total_size = len(self) * self.ranks_per_partition
+        if len(indices) < total_size:
+            # pad with samples from the start to make it evenly divisible
+            indices = np.tile(indices, math.ceil(total_size / len(indices)))
+        indices = indices[:total_size]
+        # distribute among ranks of the partition
+        yield from indices[self.rank % self.ranks_per_partition::self.ranks_per_partition].tolist()
@@ -0,0 +1,147 @@
+import math
+
+import numpy as np
+
+from kappadata.utils.distributed import get_rank, get_world_size
+
+_MULTIPLIER1 = np.uint64(0xBF58476D1CE4E5B9)
+_MULTIPLIER2 = np.uint64(0x94D049BB133111EB)
+
+
+class FeistelPermutation:
+    """
+    seeded pseudo-random permutation of range(size) where the i-th element is computed on demand (O(1) memory)
+    a feistel network is a bijection of [0, 2^num_bits) which is restricted to [0, size) via cycle walking
+    (values >= size are permuted again until they are < size, the domain is < 4 * size -> few iterations)
+    """
+
+    def __init__(self, size, seed=0, num_rounds=4):
+        super().__init__()
+        assert isinstance(size, int) and 0 < size
+        assert isinstance(num_rounds, int) and 0 < num_rounds
+        self.size = size
+        # even number of bits such that both halves have the same size
+        num_bits = max(2, (size - 1).bit_length())
+        num_bits += num_bits % 2
+        self.half_bits = np.uint64(num_bits // 2)
+        self.half_mask = np.uint64((1 << (num_bits // 2)) - 1)
+        self.keys = np.random.default_rng(seed=seed).integers(0, 2 ** 63, size=num_rounds, dtype=np.uint64)
+
+    def _round_fn(self, x, key):
+        # splitmix64 finalizer
+        x = (x ^ key) * _MULTIPLIER1
+        x ^= x >> np.uint64(31)
+        x *= _MULTIPLIER2
+        x ^= x >> np.uint64(29)
+        return x & self.half_mask
+
+    def _permute(self, x):
+        left = x >> self.half_bits
+        right = x & self.half_mask
+        for key in self.keys:
+            left, right = right, left ^ self._round_fn(right, key)
+        return (left << self.half_bits) | right
+
+    def get(self, idxs):
+        """ vectorized version of __getitem__ (idxs is a numpy array) """
+        x = np.asarray(idxs, dtype=np.uint64)
+        assert np.all(x < self.size)
+        # overflows of the multiplications are intended
+        with np.errstate(over="ignore"):
+            x = self._permute(x)
+            is_outside = x >= self.size
+            while np.any(is_outside):
+                x[is_outside] = self._permute(x[is_outside])
+                is_outside = x >= self.size
+        return x.astype(np.int64)
+
+    def __getitem__(self, idx):
+        return int(self.get(np.array([idx]))[0])
+
+    def __len__(self):
+        return self.size
+
+
+class PermutationSampler:
+    """
+    distributed random sampler that doesn't materialize the permutation of an epoch
+    (torch.utils.data.DistributedSampler creates a torch.randperm(len(dataset)) on every rank in every epoch)
+    - the i-th index is computed on demand via a FeistelPermutation that is seeded with seed and epoch
+      -> O(1) memory, O(1) random access (e.g. to resume in the middle of an epoch via iter_from)
+    - each rank computes only its own indices (same assignment as DistributedSampler: rank, rank + world_size, ...)
+    - supports RepeatedAugmentation (num_repeats) and padding/dropping (drop_last) like DistributedSampler
+    NOTE: the permutation is different from torch.randperm (i.e. the order is not the same as with DistributedSampler)
+    """
+
+    def __init__(
+            self,
+            dataset,
+            rank=None,
+            world_size=None,
+            shuffle=True,
+            seed=0,
+            drop_last=False,
+            num_repeats=1,
+            chunk_size=4096,
+    ):
+        super().__init__()
+        assert 0 < len(dataset)
+        assert isinstance(num_repeats, int) and 1 <= num_repeats
+        assert isinstance(chunk_size, int) and 0 < chunk_size
+        self.dataset = dataset
+        self.rank = rank if rank is not None else get_rank()
+        self.world_size = world_size if world_size is not None else get_world_size()
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.num_repeats = num_repeats
+        self.chunk_size = chunk_size
+        self.epoch = 0
+        self._permutation = None
+
+    @property
+    def effective_length(self):
+        return len(self.dataset)
+
+    def __len__(self):
+        if self.drop_last:
+            return len(self.dataset) // self.world_size
+        return math.ceil(len(self.dataset) / self.world_size)
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+        self._permutation = None
+
+    @property
+    def permutation(self):
+        if self._permutation is None:
+            # np.random.default_rng hashes the seed sequence -> epoch 1 of seed 0 is different from epoch 0 of seed 1
+            seed = int(np.random.default_rng(seed=[self.seed, self.epoch]).integers(2 ** 63))
+            self._permutation = FeistelPermutation(len(self.dataset), seed=seed)
+        return self._permutation
+
+    def get(self, idxs):
+        """ indices of the positions idxs of this rank in the current epoch (idxs is a numpy array) """
+        idxs = np.asarray(idxs, dtype=np.int64)
+        # position in the (padded) epoch of all ranks
+        positions = idxs * self.world_size + self.rank
+        # padding repeats the start of the epoch (same as DistributedSampler)
+        positions %= len(self.dataset)
+        # RepeatedAugmentation: perm.repeat_interleave(num_repeats)[:len(dataset)]
+        positions //= self.num_repeats
+        if not self.shuffle:
+            return positions
+        return self.permutation.get(positions)
+
+    def __getitem__(self, idx):
+        assert 0 <= idx < len(self)
+        return int(self.get(np.array([idx]))[0])
+
+    def iter_from(self, start):
+        # used by InterleavedSampler to resume in the middle of an epoch
+        for chunk_start in range(start, len(self), self.chunk_size):
+            chunk_end = min(chunk_start + self.chunk_size, len(self))
+            yield from self.get(np.arange(chunk_start, chunk_end)).tolist()
+
+    def __iter__(self):
+        yield from self.iter_from(0)
@@ -14,10 +14,9 @@ class RandomSampler(TorchRandomSampler):
     def effective_length(self):
         return self.num_samples
 
-    def __iter__(self):
+    def _get_indices(self):
         if self.num_repeats == 1:
-            yield from super().__iter__()
-            return
+            return list(super().__iter__())
 
         n = len(self.data_source)
         if self.generator is None:
@@ -30,4 +29,12 @@ class RandomSampler(TorchRandomSampler):
             idxs = torch.randint(high=n, size=(n,), dtype=torch.int64, generator=generator)
         else:
             idxs = torch.randperm(n, generator=generator)
-        yield from idxs.repeat_interleave(repeats=self.num_repeats)[:n].tolist()
+        return idxs.repeat_interleave(repeats=self.num_repeats)[:n].tolist()
+
+    def iter_from(self, start):
+        # used by InterleavedSampler to resume in the middle of an epoch
+        # indices of the epoch are generated (consumes the same random state as __iter__) and sliced
+        return iter(self._get_indices()[start:])
+
+    def __iter__(self):
+        return self.iter_from(0)
@@ -0,0 +1,96 @@
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from kappadata.utils.root_indices import get_root_index_mapping
+
+
+def _read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class ReadAheadSampler:
+    """
+    wraps a sampler and reads the raw bytes of the next num_ahead samples with a thread pool (in the process that
+    iterates over the sampler, i.e. the main process of a torch.utils.data.DataLoader) into a ReadAheadBuffer
+    dataloader workers then read the bytes from the buffer instead of the (high-latency) storage
+    (e.g. KDImageFolder(..., read_ahead_buffer=buffer))
+    the read-ahead happens in addition to the prefetching of the DataLoader (which only prefetches
+    num_workers * prefetch_factor batches and blocks a worker while it waits for I/O)
+    NOTE: buffer should be large enough to hold num_ahead + num_workers * prefetch_factor * batch_size samples,
+    otherwise samples are overwritten before they are consumed (which only wastes I/O but doesn't break anything)
+    indices of the sampler are mapped through the wrappers of the sampled dataset (e.g. ShuffleWrapper/SubsetWrapper)
+    to indices of the root dataset before path_fn/read_fn and buffer.put are called
+    (i.e. path_fn/read_fn operate on the root dataset, e.g. path_fn=root_dataset.get_path)
+    """
+
+    def __init__(self, sampler, buffer, path_fn=None, read_fn=None, num_ahead=256, num_threads=16):
+        super().__init__()
+        assert (path_fn is None) != (read_fn is None), "either path_fn or read_fn is required"
+        assert isinstance(num_ahead, int) and 0 < num_ahead
+        assert isinstance(num_threads, int) and 0 < num_threads
+        self.sampler = sampler
+        self.buffer = buffer
+        self.path_fn = path_fn
+        self.read_fn = read_fn
+        self.num_ahead = num_ahead
+        self.num_threads = num_threads
+        self.logger = logging.getLogger(type(self).__name__)
+
+    @property
+    def data_source(self):
+        # InterleavedSampler retrieves the dataset from the sampler
+        if hasattr(self.sampler, "data_source"):
+            return self.sampler.data_source
+        return self.sampler.dataset
+
+    def __len__(self):
+        return len(self.sampler)
+
+    def set_epoch(self, epoch):
+        if hasattr(self.sampler, "set_epoch"):
+            self.sampler.set_epoch(epoch)
+
+    def _get_root_index_mapping(self):
+        # samplers over plain sequences (e.g. range) have no dataset
+        if not hasattr(self.sampler, "data_source") and not hasattr(self.sampler, "dataset"):
+            return None
+        return get_root_index_mapping(self.data_source)
+
+    def _read(self, idx):
+        try:
+            if self.read_fn is None:
+                data = _read_file(self.path_fn(idx))
+            else:
+                data = self.read_fn(idx)
+            self.buffer.put(idx, data)
+        except Exception as e:
+            # errors are raised when the sample is loaded by the dataset
+            self.logger.warning(f"read-ahead of sample {idx} failed ({e})")
+
+    def __iter__(self):
+        # the root dataset looks up samples by its own index -> read/store samples under the root index
+        root_index_mapping = self._get_root_index_mapping()
+        pool = ThreadPoolExecutor(max_workers=self.num_threads, thread_name_prefix="read_ahead")
+        pending = deque()
+        # samples that occur multiple times in the lookahead window (e.g. RepeatedAugmentation) are read once
+        num_pending = {}
+        try:
+            for idx in self.sampler:
+                pending.append(idx)
+                if idx in num_pending:
+                    num_pending[idx] += 1
+                else:
+                    num_pending[idx] = 1
+                    pool.submit(self._read, idx if root_index_mapping is None else int(root_index_mapping[idx]))
+                if len(pending) > self.num_ahead:
+                    next_idx = pending.popleft()
+                    num_pending[next_idx] -= 1
+                    if num_pending[next_idx] == 0:
+                        del num_pending[next_idx]
+                    yield next_idx
+            yield from pending
+        finally:
+            # iterator can be closed before it is exhausted (e.g. when a training is stopped)
+            pool.shutdown(wait=False, cancel_futures=True)
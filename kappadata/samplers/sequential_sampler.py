@@ -5,3 +5,7 @@ class SequentialSampler(TorchSequentialSampler):
     @property
     def effective_length(self):
         return len(self)
+
+    def iter_from(self, start):
+        # used by InterleavedSampler to resume in the middle of an epoch
+        return iter(range(start, len(self.data_source)))
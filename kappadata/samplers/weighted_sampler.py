@@ -1,26 +1,147 @@
+import numpy as np
 import torch
 
 from kappadata.utils.distributed import get_rank, get_world_size
-from kappadata.utils.getall_as_tensor import getall_as_tensor
+
+
+class AliasTable:
+    """
+    alias table (Walker/Vose) of static weights for O(1) weighted sampling with replacement
+    construction is vectorized: in each round, all small columns are filled by the large column in whose cumulative
+    surplus their cumulative deficit starts (a large column that gives more than its surplus becomes small)
+    """
+
+    def __init__(self, weights):
+        super().__init__()
+        weights = np.asarray(weights, dtype=np.float64)
+        assert weights.ndim == 1 and np.all(weights >= 0) and weights.sum() > 0
+        self.size = len(weights)
+        prob = weights * (self.size / weights.sum())
+        alias = np.arange(self.size)
+        small = np.flatnonzero(prob < 1)
+        large = np.flatnonzero(prob >= 1)
+        while len(small) > 0 and len(large) > 0:
+            deficits = 1 - prob[small]
+            deficit_starts = np.cumsum(deficits) - deficits
+            surplus_ends = np.cumsum(prob[large] - 1)
+            owners = np.searchsorted(surplus_ends, deficit_starts, side="right")
+            owners = np.minimum(owners, len(large) - 1)
+            alias[small] = large[owners]
+            prob[large] -= np.bincount(owners, weights=deficits, minlength=len(large))
+            is_small = prob[large] < 1
+            small = large[is_small]
+            large = large[~is_small]
+        # leftovers are due to floating point errors
+        prob[small] = 1.
+        prob[large] = 1.
+        self.prob = prob
+        self.alias = alias
+
+    def sample(self, uniforms):
+        """ maps uniforms in [0, 1) to indices (one uniform per sample: integer part -> column, fraction -> coin) """
+        scaled = np.asarray(uniforms) * self.size
+        columns = np.minimum(scaled.astype(np.int64), self.size - 1)
+        return np.where(scaled - columns < self.prob[columns], columns, self.alias[columns])
+
+
+class SumTree:
+    """
+    binary tree where each node contains the sum of its children for weighted sampling with replacement
+    O(log n) per sample and O(log n) per weight update (e.g. for loss-based importance sampling)
+    """
+
+    def __init__(self, weights):
+        super().__init__()
+        weights = np.asarray(weights, dtype=np.float64)
+        assert weights.ndim == 1 and np.all(weights >= 0) and weights.sum() > 0
+        self.size = len(weights)
+        self.capacity = 1 << max(0, (self.size - 1).bit_length())
+        # tree[1] is the root, leaves are tree[capacity:capacity + size]
+        self.tree = np.zeros(2 * self.capacity, dtype=np.float64)
+        self.tree[self.capacity:self.capacity + self.size] = weights
+        for level_start in reversed([1 << i for i in range(self.capacity.bit_length() - 1)]):
+            nodes = np.arange(level_start, 2 * level_start)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    @property
+    def weights(self):
+        return self.tree[self.capacity:self.capacity + self.size]
+
+    def update(self, idxs, weights):
+        idxs = np.asarray(idxs, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+        assert np.all(weights >= 0)
+        nodes = np.unique(idxs + self.capacity)
+        self.tree[idxs + self.capacity] = weights
+        # recompute sums (instead of adding differences) -> no accumulation of floating point errors
+        while nodes[0] > 1:
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+        assert self.total > 0
+
+    def sample(self, uniforms):
+        """ maps uniforms in [0, 1) to indices """
+        values = np.asarray(uniforms) * self.total
+        nodes = np.ones(len(values), dtype=np.int64)
+        # all leaves have the same depth
+        for _ in range(self.capacity.bit_length() - 1):
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            # avoid subtrees without weight (possible due to floating point errors)
+            go_right = ((values >= left_sum) & (self.tree[left + 1] > 0)) | (left_sum <= 0)
+            values -= left_sum * go_right
+            nodes = left + go_right
+        return nodes - self.capacity
 
 
 class WeightedSampler:
-    def __init__(self, dataset, weights, size=None, seed=0, rank=None, world_size=None):
+    """
+    samples indices proportional to weights
+    - replacement=False: torch.multinomial without replacement over all weights in every epoch
+      (size has to be <= number of non-zero weights)
+    - replacement=True: samples are drawn independently in chunks of chunk_size from an AliasTable (static weights)
+      or a SumTree (use_sum_tree=True, weights can be changed via update_weights during training)
+      each rank draws its own samples with a seed that depends on seed, epoch and rank
+    """
+
+    def __init__(
+            self,
+            dataset,
+            weights,
+            size=None,
+            seed=0,
+            rank=None,
+            world_size=None,
+            replacement=False,
+            use_sum_tree=False,
+            chunk_size=4096,
+    ):
         super().__init__()
         assert len(dataset) == len(weights)
+        assert replacement or not use_sum_tree, "use_sum_tree requires replacement"
+        assert isinstance(chunk_size, int) and 0 < chunk_size
         self.dataset = dataset
         self.weights = weights
         self.size = size
         self.seed = seed
         self.rank = rank or get_rank()
         self.world_size = world_size or get_world_size()
+        self.replacement = replacement
+        self.use_sum_tree = use_sum_tree
+        self.chunk_size = chunk_size
         self.epoch = 0
+        self._table = None
 
     @property
     def effective_length(self):
         if self.size is None:
             return len(self.dataset)
-        assert len(self.dataset) >= self.size, f"{len(self.dataset)} < {self.size}"
+        if not self.replacement:
+            assert len(self.dataset) >= self.size, f"{len(self.dataset)} < {self.size}"
         return self.size
 
     def __len__(self):
@@ -30,7 +151,43 @@ class WeightedSampler:
     def set_epoch(self, epoch):
         self.epoch = epoch
 
+    @property
+    def table(self):
+        if self._table is None:
+            weights = self.weights.numpy() if torch.is_tensor(self.weights) else self.weights
+            self._table = SumTree(weights) if self.use_sum_tree else AliasTable(weights)
+        return self._table
+
+    def update_weights(self, idxs, weights):
+        """ changes the weights of idxs (affects the upcoming chunks of the current epoch if use_sum_tree) """
+        if torch.is_tensor(idxs):
+            idxs = idxs.cpu().numpy()
+        if torch.is_tensor(weights):
+            weights = weights.detach().cpu().numpy()
+        if self.use_sum_tree:
+            self.table.update(idxs, weights)
+            self.weights = self.table.weights
+            return
+        if torch.is_tensor(self.weights):
+            self.weights = self.weights.clone()
+            self.weights[torch.from_numpy(np.asarray(idxs))] = torch.as_tensor(weights, dtype=self.weights.dtype)
+        else:
+            self.weights = np.array(self.weights, dtype=np.float64)
+            self.weights[idxs] = weights
+        # alias table is rebuilt on the next access
+        self._table = None
+
+    def _iter_with_replacement(self):
+        # samples are independent -> every rank draws only its own samples
+        rng = np.random.default_rng(seed=[self.seed, self.epoch, self.rank])
+        for chunk_start in range(0, len(self), self.chunk_size):
+            chunk_end = min(chunk_start + self.chunk_size, len(self))
+            yield from self.table.sample(rng.random(chunk_end - chunk_start)).tolist()
+
     def __iter__(self):
+        if self.replacement:
+            yield from self._iter_with_replacement()
+            return
         # draw indices for current epoch (same for all ranks)
         generator = torch.Generator().manual_seed(self.seed + self.epoch)
         indices = torch.multinomial(self.weights, self.effective_length, replacement=False, generator=generator)
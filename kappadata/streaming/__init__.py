@@ -0,0 +1,2 @@
+from .create_shards import create_shards
+from .sharded_iterable_dataset import ShardedIterableDataset
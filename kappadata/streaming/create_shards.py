@@ -0,0 +1,56 @@
+import io
+import json
+import pickle
+import tarfile
+from pathlib import Path
+
+from kappadata.utils.logging import log
+
+
+def _add_to_tar(tar, name, data):
+    info = tarfile.TarInfo(name=name)
+    info.size = len(data)
+    tar.addfile(info, io.BytesIO(data))
+
+
+def create_shards(dataset, dst, num_bytes_per_shard=1024 ** 3, log_fn=None):
+    """
+    packs a dataset into tar shards that can be read sequentially by ShardedIterableDataset
+    dataset is typically a kappadata.ModeWrapper (e.g. ModeWrapper(ds, mode="x class") where ds loads raw bytes)
+    each sample (the result of dataset[idx]) is pickled into its own tar member
+    Result:
+    dst/shard_000000.tar
+    dst/shard_000001.tar
+    dst/index.json (name and number of samples per shard)
+    """
+    dst_path = Path(dst).expanduser()
+    dst_path.mkdir(exist_ok=True, parents=True)
+    assert not (dst_path / "index.json").exists(), f"'{dst_path}' already contains shards"
+    assert isinstance(num_bytes_per_shard, int) and 0 < num_bytes_per_shard
+
+    shards = []
+    tar = None
+    num_bytes_in_shard = 0
+    num_digits = len(str(len(dataset)))
+    for idx in range(len(dataset)):
+        # start a new shard
+        if tar is None:
+            shards.append(dict(name=f"shard_{len(shards):06d}.tar", num_samples=0))
+            tar = tarfile.open(dst_path / shards[-1]["name"], "w")
+            num_bytes_in_shard = 0
+        data = pickle.dumps(dataset[idx], protocol=pickle.HIGHEST_PROTOCOL)
+        _add_to_tar(tar, name=f"{idx:0{num_digits}d}.pkl", data=data)
+        shards[-1]["num_samples"] += 1
+        num_bytes_in_shard += len(data)
+        if num_bytes_in_shard >= num_bytes_per_shard:
+            tar.close()
+            tar = None
+            log(log_fn, f"created {shards[-1]['name']} ({shards[-1]['num_samples']} samples)")
+    if tar is not None:
+        tar.close()
+        log(log_fn, f"created {shards[-1]['name']} ({shards[-1]['num_samples']} samples)")
+
+    # index is written last -> shards are only used if they were created successfully
+    with open(dst_path / "index.json", "w") as f:
+        json.dump(dict(num_samples=len(dataset), shards=shards), f, indent=1)
+    log(log_fn, f"created {len(shards)} shards with {len(dataset)} samples in '{dst_path}'")
@@ -0,0 +1,137 @@
+import itertools
+import json
+import pickle
+import tarfile
+from pathlib import Path
+
+import numpy as np
+from torch.utils.data import IterableDataset, get_worker_info
+
+from kappadata.utils.distributed import get_rank, get_world_size
+
+
+class ShardedIterableDataset(IterableDataset):
+    """
+    reads shards created by create_shards sequentially (large sequential reads are much faster than random reads of
+    small files on network filesystems)
+    - the order of shards is shuffled every epoch and shards are distributed among ranks and dataloader workers
+    - samples are shuffled within a bounded in-memory shuffle buffer
+    - all ranks yield the same number of samples (surplus samples of a rank are dropped)
+    - the samples of a rank are split evenly among dataloader workers (a worker reads a contiguous range of the
+      shards of its rank, the first/last shard of a worker is read partially) -> all ranks yield the same number of
+      batches also with num_workers > 1 (otherwise DDP can deadlock)
+    NOTE: set_epoch has to be called before the dataloader workers are created (i.e. not with persistent_workers)
+    """
+
+    def __init__(
+            self,
+            root,
+            transform=None,
+            shuffle=True,
+            shuffle_buffer_size=1000,
+            seed=0,
+            rank=None,
+            world_size=None,
+    ):
+        super().__init__()
+        self.root = Path(root).expanduser()
+        assert (self.root / "index.json").exists(), f"'{self.root}' doesn't contain shards (index.json is missing)"
+        assert isinstance(shuffle_buffer_size, int) and 0 < shuffle_buffer_size
+        self.transform = transform
+        self.shuffle = shuffle
+        self.shuffle_buffer_size = shuffle_buffer_size
+        self.seed = seed
+        self.rank = rank if rank is not None else get_rank()
+        self.world_size = world_size if world_size is not None else get_world_size()
+        self.epoch = 0
+        with open(self.root / "index.json") as f:
+            index = json.load(f)
+        self.shard_names = [shard["name"] for shard in index["shards"]]
+        self.shard_lengths = np.array([shard["num_samples"] for shard in index["shards"]], dtype=np.int64)
+        assert len(self.shard_names) >= self.world_size, "each rank requires at least one shard"
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _get_shard_order(self):
+        if self.shuffle:
+            return np.random.default_rng(seed=[self.seed, self.epoch]).permutation(len(self.shard_names))
+        return np.arange(len(self.shard_names))
+
+    def _get_samples_per_rank(self, shard_order):
+        return min(int(self.shard_lengths[shard_order[rank::self.world_size]].sum()) for rank in range(self.world_size))
+
+    def __len__(self):
+        # number of samples per rank
+        return self._get_samples_per_rank(self._get_shard_order())
+
+    def _get_worker_shards(self, worker_id, num_workers):
+        """
+        returns the shard indices of a worker, the number of samples to skip in its first shard and the number of
+        samples the worker has to yield
+        """
+        shard_order = self._get_shard_order()
+        rank_shards = shard_order[self.rank::self.world_size]
+        # drop surplus samples such that all ranks have the same number of samples
+        samples_per_rank = self._get_samples_per_rank(shard_order)
+        # split samples of the rank evenly among workers (same split on all ranks)
+        worker_start = worker_id * (samples_per_rank // num_workers) + min(worker_id, samples_per_rank % num_workers)
+        worker_length = samples_per_rank // num_workers + int(worker_id < samples_per_rank % num_workers)
+        worker_end = worker_start + worker_length
+        # select the shards that overlap with [worker_start, worker_end)
+        shard_ends = np.cumsum(self.shard_lengths[rank_shards])
+        shard_starts = shard_ends - self.shard_lengths[rank_shards]
+        is_overlapping = (shard_starts < worker_end) & (worker_start < shard_ends)
+        worker_shards = rank_shards[is_overlapping]
+        if len(worker_shards) == 0:
+            return worker_shards, 0, 0
+        num_skip = worker_start - int(shard_starts[is_overlapping][0])
+        return worker_shards, num_skip, worker_length
+
+    def _iter_shard(self, shard_idx, num_skip=0):
+        with tarfile.open(self.root / self.shard_names[shard_idx], mode="r|") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                if num_skip > 0:
+                    num_skip -= 1
+                    continue
+                yield pickle.loads(tar.extractfile(member).read())
+
+    def _iter_unshuffled_samples(self, shards, num_skip, length):
+        samples = itertools.chain.from_iterable(
+            self._iter_shard(shard_idx, num_skip=num_skip if i == 0 else 0)
+            for i, shard_idx in enumerate(shards)
+        )
+        # the last shard of a worker can contain samples of the next worker
+        yield from itertools.islice(samples, length)
+
+    def _iter_samples(self, shards, num_skip, length, rng):
+        samples = self._iter_unshuffled_samples(shards=shards, num_skip=num_skip, length=length)
+        if not self.shuffle:
+            yield from samples
+            return
+        buffer = []
+        for sample in samples:
+            if len(buffer) < self.shuffle_buffer_size:
+                buffer.append(sample)
+                continue
+            # replace a random sample of the buffer
+            buffer_idx = rng.integers(len(buffer))
+            yield buffer[buffer_idx]
+            buffer[buffer_idx] = sample
+        for buffer_idx in rng.permutation(len(buffer)):
+            yield buffer[buffer_idx]
+
+    def __iter__(self):
+        info = get_worker_info()
+        if info is None:
+            worker_id, num_workers = 0, 1
+        else:
+            worker_id, num_workers = info.id, info.num_workers
+        shards, num_skip, length = self._get_worker_shards(worker_id=worker_id, num_workers=num_workers)
+        rng = np.random.default_rng(seed=[self.seed, self.epoch, self.rank, worker_id])
+        for sample in self._iter_samples(shards=shards, num_skip=num_skip, length=length, rng=rng):
+            if self.transform is not None:
+                sample = self.transform(sample)
+            yield sample
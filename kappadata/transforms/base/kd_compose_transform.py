@@ -1,4 +1,5 @@
 from kappadata.factory import object_to_transform
+from .kd_scheduled_transform import KDScheduledTransform
 from .kd_transform import KDTransform
 
 
@@ -16,6 +17,21 @@ class KDComposeTransform(KDTransform):
     def is_deterministic(self):
         return all(t.is_deterministic for t in self.transforms)
 
+    def split_deterministic_prefix(self):
+        """
+        splits the transforms into the longest prefix of deterministic transforms and the remaining transforms
+        the output of the prefix can be cached (e.g. decode -> resize) whereas the suffix has to be applied every time
+        transforms that are not a KDTransform or change over time (KDScheduledTransform) are not part of the prefix
+        """
+        num_deterministic = 0
+        for t in self.transforms:
+            if not isinstance(t, KDTransform) or isinstance(t, KDScheduledTransform) or not t.is_deterministic:
+                break
+            num_deterministic += 1
+        prefix = KDComposeTransform(self.transforms[:num_deterministic])
+        suffix = KDComposeTransform(self.transforms[num_deterministic:])
+        return prefix, suffix
+
     @property
     def is_kd_transform(self):
         return all(isinstance(t, KDTransform))
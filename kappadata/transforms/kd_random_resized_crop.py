@@ -2,7 +2,9 @@ import math
 
 import numpy as np
 from torchvision.transforms import InterpolationMode
-from torchvision.transforms.functional import resized_crop, get_image_size
+from torchvision.transforms.functional import resized_crop, get_image_size, pil_modes_mapping
+
+from kappadata.loading.draft import get_draft_original_size
 
 from kappadata.utils.param_checking import to_2tuple
 from .base.kd_stochastic_transform import KDStochasticTransform
@@ -25,15 +27,30 @@ class KDRandomResizedCrop(KDStochasticTransform):
         self.interpolation = InterpolationMode(interpolation)
 
     def __call__(self, x, ctx=None):
-        i, j, h, w = self.get_params(x)
-        if ctx is not None:
+        # images decoded with reduced size (kappadata.loading.draft_image) -> sample parameters w.r.t. the original
+        # size such that the crop (and ctx values) are the same as if the full-resolution image would have been used
+        draft_og_size = get_draft_original_size(x)
+        if draft_og_size is None:
             og_w, og_h = get_image_size(x)
+        else:
+            og_w, og_h = draft_og_size
+        i, j, h, w = self._get_params(width=og_w, height=og_h)
+        if ctx is not None:
             ctx["random_resized_crop"] = dict(og_h=og_h, og_w=og_w, i=i, j=j, h=h, w=w)
-        return resized_crop(x, i, j, h, w, self.size, self.interpolation)
+        if draft_og_size is None:
+            return resized_crop(x, i, j, h, w, self.size, self.interpolation)
+        # crop box in coordinates of the reduced-size image (PIL supports subpixel boxes)
+        scale_x = x.width / og_w
+        scale_y = x.height / og_h
+        box = (j * scale_x, i * scale_y, (j + w) * scale_x, (i + h) * scale_y)
+        return x.resize((self.size[1], self.size[0]), resample=pil_modes_mapping[self.interpolation], box=box)
 
     def get_params(self, img):
-        # same as torchvision.transform.RandomResizedCrop but with rng
         width, height = get_image_size(img)
+        return self._get_params(width=width, height=height)
+
+    def _get_params(self, width, height):
+        # same as torchvision.transform.RandomResizedCrop but with rng
         area = height * width
 
         # the torch version has a floating point error which is bad for testing
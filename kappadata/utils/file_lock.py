@@ -0,0 +1,72 @@
+import os
+import time
+from pathlib import Path
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    """
+    inter-process lock via a lock file (fcntl.flock on posix, msvcrt.locking on windows)
+    each FileLock object holds its own file descriptor -> also locks between threads of the same process
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = Path(path).expanduser()
+        self._fd = None
+
+    def __getstate__(self):
+        # file descriptors can't be shared with other processes
+        return dict(path=self.path)
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self._fd = None
+
+    @property
+    def is_locked(self):
+        return self._fd is not None
+
+    def acquire(self, blocking=True):
+        assert self._fd is None, f"FileLock '{self.path}' is already acquired"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        while True:
+            try:
+                if os.name == "nt":
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self._fd = fd
+                return True
+            except OSError:
+                if not blocking:
+                    os.close(fd)
+                    return False
+                if os.name == "nt":
+                    time.sleep(0.1)
+                else:
+                    # blocking flock is not busy waiting
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                    self._fd = fd
+                    return True
+
+    def release(self):
+        assert self._fd is not None, f"FileLock '{self.path}' is not acquired"
+        if os.name == "nt":
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *_):
+        self.release()
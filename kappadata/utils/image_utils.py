@@ -9,3 +9,12 @@ def get_dimensions(img):
         w, h = img.size
         c = 1 if img.mode == "L" else 3
     return c, h, w
+
+
+def get_resized_size(width, height, max_short_side):
+    # same as torchvision.transforms.Resize(max_short_side) but images are never upscaled
+    if max_short_side is None or min(width, height) <= max_short_side:
+        return height, width
+    if width <= height:
+        return int(max_short_side * height / width), max_short_side
+    return max_short_side, int(max_short_side * width / height)
@@ -0,0 +1,21 @@
+import numpy as np
+from torch.utils.data import Subset
+
+from kappadata.datasets.kd_wrapper import KDWrapper
+from kappadata.wrappers.mode_wrapper import ModeWrapper
+
+
+def get_root_index_mapping(dataset):
+    """
+    resolves the wrappers of dataset to an array that maps indices of dataset to indices of the root dataset
+    (e.g. ShuffleWrapper/SubsetWrapper/ClassFilterWrapper/RepeatWrapper remap indices)
+    returns None if the indices of dataset are the same as the indices of the root dataset
+    """
+    mapping = None
+    while True:
+        if isinstance(dataset, Subset):
+            indices = np.asarray(dataset.indices, dtype=np.int64)
+            mapping = indices if mapping is None else indices[mapping]
+        elif not isinstance(dataset, (KDWrapper, ModeWrapper)):
+            return mapping
+        dataset = dataset.dataset
@@ -11,14 +11,16 @@ class TransformWrapperBase(KDWrapper):
         self.transform = object_to_transform(transform)
         self.seed = seed
 
-    def _getitem(self, item, idx, ctx=None):
+    def _getitem(self, item, idx, ctx=None, transform=None):
+        # transform can be overwritten to apply only a part of self.transform
+        transform = transform if transform is not None else self.transform
         if self.seed is not None:
             rng = np.random.default_rng(seed=self.seed + idx)
-            if isinstance(self.transform, (KDComposeTransform, KDStochasticTransform)):
-                self.transform.set_rng(rng)
-        if isinstance(self.transform, KDTransform):
-            return self.transform(item, ctx=ctx)
-        return self.transform(item)
+            if isinstance(transform, (KDComposeTransform, KDStochasticTransform)):
+                transform.set_rng(rng)
+        if isinstance(transform, KDTransform):
+            return transform(item, ctx=ctx)
+        return transform(item)
 
     def _worker_init_fn(self, rank, **kwargs):
         if isinstance(self.transform, KDTransform):
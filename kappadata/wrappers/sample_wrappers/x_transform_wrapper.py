@@ -1,10 +1,55 @@
+from kappadata.caching.shared_memory_cache import SharedMemoryCache
+from kappadata.transforms import KDComposeTransform
 from .base.transform_wrapper_base import TransformWrapperBase
 
+_MISSING = object()
+
 
 class XTransformWrapper(TransformWrapperBase):
+    def __init__(self, *args, prefix_cache_num_bytes=None, prefix_cache_multiprocessing_context=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # cache the output of the deterministic prefix of the transform (e.g. Resize(256) of
+        # [Resize(256), RandomResizedCrop(224), ...]) per sample such that only the stochastic suffix has to be
+        # applied when a sample is loaded again
+        # ctx values written while loading the item and applying the prefix are cached with the item and restored
+        # on a cache hit (ctx is the same regardless of whether or not the sample was cached)
+        self.prefix_transform = None
+        self.suffix_transform = None
+        self.prefix_cache = None
+        if prefix_cache_num_bytes is not None:
+            assert isinstance(self.transform, KDComposeTransform), "prefix caching requires a KDComposeTransform"
+            self.prefix_transform, self.suffix_transform = self.transform.split_deterministic_prefix()
+            if len(self.prefix_transform.transforms) == 0:
+                self.logger.warning(f"transform has no deterministic prefix -> prefix_cache_num_bytes is ignored")
+            else:
+                self.prefix_cache = SharedMemoryCache(
+                    num_slots=len(self.dataset),
+                    num_bytes=prefix_cache_num_bytes,
+                    multiprocessing_context=prefix_cache_multiprocessing_context,
+                )
+
     def getitem_x(self, idx, ctx=None):
-        item = self.dataset.getitem_x(idx, ctx=ctx)
-        return self._getitem(item=item, idx=idx, ctx=ctx)
+        if self.prefix_cache is None:
+            item = self.dataset.getitem_x(idx, ctx=ctx)
+            return self._getitem(item=item, idx=idx, ctx=ctx)
+        # check cache before loading the item from the dataset (e.g. to avoid decoding the image)
+        cached = self.prefix_cache.get(idx, default=_MISSING)
+        if cached is _MISSING:
+            # load into a copy of ctx to retrieve the values that were written by the dataset/prefix
+            prefix_ctx = dict(ctx) if ctx is not None else {}
+            item = self.dataset.getitem_x(idx, ctx=prefix_ctx)
+            item = self.prefix_transform(item, ctx=prefix_ctx)
+            ctx_delta = {
+                key: value
+                for key, value in prefix_ctx.items()
+                if ctx is None or key not in ctx or ctx[key] is not value
+            }
+            self.prefix_cache.put(idx, (item, ctx_delta))
+        else:
+            item, ctx_delta = cached
+        if ctx is not None:
+            ctx.update(ctx_delta)
+        return self._getitem(item=item, idx=idx, ctx=ctx, transform=self.suffix_transform)
 
     def getitem_class(self, idx, ctx=None):
         # TODO ugly solution to circumvent XTransformWrapper being skipped when a dataset with a fused operation
@@ -15,5 +60,12 @@ class XTransformWrapper(TransformWrapperBase):
     def getitem_xclass(self, idx, ctx=None):
         # TODO ugly solution to circumvent XTransformWrapper being skipped when a dataset with a fused operation
         #  is wrapperd (e.g. XTransformWrapper(KDMixWrapper(dataset))
+        # NOTE: doesn't use the prefix cache (x and class of a fused operation are loaded together) -> the whole
+        #  transform is applied
         item, cls = self.dataset.getitem_xclass(idx, ctx=ctx)
-        return self._getitem(item=item, idx=idx, ctx=ctx), cls
\ No newline at end of file
+        return self._getitem(item=item, idx=idx, ctx=ctx), cls
+
+    def dispose(self):
+        if self.prefix_cache is not None:
+            self.prefix_cache.dispose()
+        super().dispose()
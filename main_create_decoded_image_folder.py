@@ -0,0 +1,42 @@
+from argparse import ArgumentParser
+from time import time
+
+from kappadata.copying.create_decoded import create_decoded_imagefolder
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--src",
+        type=str,
+        required=True,
+        help="path to image folder (e.g. /global/imagenet100/train)",
+    )
+    parser.add_argument(
+        "--dst",
+        type=str,
+        required=True,
+        help="path to destination folder (e.g. /global/imagenet100_decoded256/train)",
+    )
+    parser.add_argument("--max_short_side", type=int)
+    parser.add_argument("--interpolation", type=str, default="bilinear")
+    parser.add_argument("--num_workers", type=int, default=0)
+    return vars(parser.parse_args())
+
+
+def main(src, dst, max_short_side, interpolation, num_workers):
+    start_time = time()
+    create_decoded_imagefolder(
+        src=src,
+        dst=dst,
+        max_short_side=max_short_side,
+        interpolation=interpolation,
+        num_workers=num_workers,
+        log_fn=print,
+    )
+    end_time = time()
+    print(f"decoding took {end_time - start_time}s")
+
+
+if __name__ == "__main__":
+    main(**parse_args())
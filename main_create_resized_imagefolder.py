@@ -0,0 +1,67 @@
+import zipfile
+from argparse import ArgumentParser
+from time import time
+
+from kappadata.copying.create_resized import create_resized_imagefolder
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--src",
+        type=str,
+        required=True,
+        help="path to image folder (e.g. /global/imagenet1k/train)",
+    )
+    parser.add_argument(
+        "--dst",
+        type=str,
+        required=True,
+        help="path to destination (e.g. /global/imagenet1k_256/train)",
+    )
+    parser.add_argument("--max_short_side", type=int, required=True)
+    parser.add_argument("--quality", type=int, default=90)
+    parser.add_argument("--interpolation", type=str, default="bilinear")
+    output_group = parser.add_mutually_exclusive_group()
+    output_group.add_argument("--zip", action="store_const", dest="output_format", const="zip")
+    output_group.add_argument("--zips", action="store_const", dest="output_format", const="zips")
+    parser.add_argument("--num_workers", type=int, default=0)
+    parser.add_argument(
+        "--compression",
+        type=str,
+        default="stored",
+        choices=["stored", "deflated"],
+        help="stored avoids compressing already compressed files (e.g. JPEG/WAV)",
+    )
+    return vars(parser.parse_args())
+
+
+def main(src, dst, max_short_side, quality, interpolation, output_format, num_workers, compression):
+    output_format = output_format or "folder"
+    print(f"src={src}")
+    print(f"dst={dst}")
+    print(f"max_short_side={max_short_side}")
+    print(f"quality={quality}")
+    print(f"output_format={output_format}")
+    print(f"num_workers={num_workers}")
+    print(f"compression={compression}")
+    if output_format == "zip":
+        assert not str(dst).endswith(".zip"), "pass --dst without the .zip ending (appended automatically)"
+    start_time = time()
+    create_resized_imagefolder(
+        src=src,
+        dst=dst,
+        max_short_side=max_short_side,
+        quality=quality,
+        interpolation=interpolation,
+        output_format=output_format,
+        num_workers=num_workers,
+        compression=dict(stored=zipfile.ZIP_STORED, deflated=zipfile.ZIP_DEFLATED)[compression],
+        log_fn=print,
+    )
+    end_time = time()
+    print(f"resizing took {end_time - start_time}s")
+
+
+if __name__ == "__main__":
+    main(**parse_args())
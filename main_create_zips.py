@@ -1,7 +1,8 @@
-import shutil
+import zipfile
 from argparse import ArgumentParser
 from pathlib import Path
-from kappadata.copying.create_zips import create_zips_imagefolder, create_zips_folder
+from kappadata.copying.create_packed import create_packed_imagefolder
+from kappadata.copying.create_zips import create_zip, create_zips_imagefolder, create_zips_folder
 
 
 def parse_args():
@@ -21,30 +22,60 @@ def parse_args():
     zip_group = parser.add_mutually_exclusive_group(required=True)
     zip_group.add_argument("--zip", action="store_const", dest="zip_format", const="zip")
     zip_group.add_argument("--zips", action="store_const", dest="zip_format", const="zips")
+    zip_group.add_argument("--packed", action="store_const", dest="zip_format", const="packed")
     dataset_group = parser.add_mutually_exclusive_group()
     dataset_group.add_argument("--folder", action="store_const", dest="dataset_format", const="folder")
     dataset_group.add_argument("--image_folder", action="store_const", dest="dataset_format", const="image_folder")
+    parser.add_argument("--num_workers", type=int, default=0)
+    parser.add_argument("--num_bytes_per_zip", type=int, help="balance zips by bytes (only for --zips --folder)")
+    parser.add_argument(
+        "--compression",
+        type=str,
+        choices=["stored", "deflated"],
+        help=(
+            "stored avoids compressing already compressed files (e.g. JPEG/WAV) "
+            "(default: deflated for --zip and --zips --image_folder, stored for --zips --folder)"
+        ),
+    )
     return vars(parser.parse_args())
 
 
-def main(src, dst, dataset_format, zip_format):
+def main(src, dst, dataset_format, zip_format, num_workers, num_bytes_per_zip, compression):
     print(f"src={src}")
     print(f"dst={dst}")
     print(f"zip_format={zip_format}")
+    print(f"num_workers={num_workers}")
+    print(f"compression={compression}")
     src = Path(src).expanduser()
     dst = Path(dst).expanduser()
+    # if --compression is not passed, the default of the respective function is used
+    if compression is None:
+        compression_kwargs = {}
+    else:
+        compression = dict(stored=zipfile.ZIP_STORED, deflated=zipfile.ZIP_DEFLATED)[compression]
+        compression_kwargs = dict(compression=compression)
     if zip_format == "zip":
         assert not str(dst).endswith(".zip"), "pass --dst without the .zip ending (appended automatically)"
         assert dst.parent.exists(), dst.as_posix()
         assert not dst.with_suffix(".zip").exists(), dst.as_posix()
-        shutil.make_archive(src, "zip", dst)
+        create_zip(src=src, dst=dst, log_fn=print, **compression_kwargs)
     elif zip_format == "zips":
         if dataset_format == "image_folder":
-            create_zips_imagefolder(src=src, dst=dst)
+            create_zips_imagefolder(src=src, dst=dst, num_workers=num_workers, log_fn=print, **compression_kwargs)
         elif dataset_format == "folder":
-            create_zips_folder(src=src, dst=dst)
+            create_zips_folder(
+                src=src,
+                dst=dst,
+                num_bytes_per_zip=num_bytes_per_zip,
+                num_workers=num_workers,
+                log_fn=print,
+                **compression_kwargs,
+            )
         else:
             raise NotImplementedError
+    elif zip_format == "packed":
+        assert dataset_format == "image_folder", "--packed is only supported for --image_folder"
+        create_packed_imagefolder(src=src, dst=dst, num_workers=num_workers, log_fn=print)
     else:
         raise NotImplementedError
 
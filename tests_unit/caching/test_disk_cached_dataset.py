@@ -0,0 +1,104 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import torch
+from torch.utils.data import DataLoader
+
+from kappadata.caching.disk_cached_dataset import DiskCachedDataset
+
+
+class TestDiskCachedDataset(unittest.TestCase):
+    def test_hits_misses(self):
+        data = [torch.full(size=(4,), fill_value=i) for i in range(10)]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with DiskCachedDataset(data, cache_dir=cache_dir, num_bytes=100000) as ds:
+                for _ in range(2):
+                    for i in range(len(ds)):
+                        self.assertEqual(data[i].tolist(), ds[i].tolist())
+                self.assertEqual(10, ds.hits)
+                self.assertEqual(10, ds.misses)
+
+    def test_reuse_after_restart(self):
+        data = [bytes([i]) * 10 for i in range(10)]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with DiskCachedDataset(data, cache_dir=cache_dir, num_bytes=100000) as ds:
+                _ = [ds[i] for i in range(len(ds))]
+            # new instance (e.g. restarted job) -> cache is warm
+            with DiskCachedDataset(data, cache_dir=cache_dir, num_bytes=100000) as ds:
+                self.assertEqual(data, [ds[i] for i in range(len(ds))])
+                self.assertEqual(10, ds.hits)
+                self.assertEqual(10, ds.misses)
+            # different dataset length -> cache is cleared
+            with DiskCachedDataset(data[:5], cache_dir=cache_dir, num_bytes=100000) as ds:
+                self.assertEqual(data[:5], [ds[i] for i in range(len(ds))])
+                self.assertEqual(0, ds.hits)
+                self.assertEqual(5, ds.misses)
+
+    def test_fingerprint(self):
+        data = [bytes([i]) * 10 for i in range(10)]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with DiskCachedDataset(data, cache_dir=cache_dir, num_bytes=100000) as ds:
+                _ = [ds[i] for i in range(len(ds))]
+            # different version (e.g. changed transforms) -> cache is cleared
+            with DiskCachedDataset(data, cache_dir=cache_dir, num_bytes=100000, version="v2") as ds:
+                self.assertEqual(data, [ds[i] for i in range(len(ds))])
+                self.assertEqual(0, ds.hits)
+            # different dataset of the same length -> cache is cleared
+            other = torch.arange(10)
+            with DiskCachedDataset(other, cache_dir=cache_dir, num_bytes=100000, version="v2") as ds:
+                self.assertEqual(other.tolist(), [ds[i].item() for i in range(len(ds))])
+                self.assertEqual(0, ds.hits)
+
+    def test_fingerprint_root_and_repr(self):
+        class Dataset:
+            def __init__(self, root, transform):
+                self.root = root
+                self.transform = transform
+
+            def __len__(self):
+                return 10
+
+            def __repr__(self):
+                return f"Dataset(transform={self.transform})"
+
+        fingerprint = DiskCachedDataset.get_fingerprint(Dataset(root="a", transform="t1"))
+        self.assertEqual(fingerprint.tolist(), DiskCachedDataset.get_fingerprint(Dataset("a", "t1")).tolist())
+        self.assertNotEqual(fingerprint.tolist(), DiskCachedDataset.get_fingerprint(Dataset("b", "t1")).tolist())
+        self.assertNotEqual(fingerprint.tolist(), DiskCachedDataset.get_fingerprint(Dataset("a", "t2")).tolist())
+
+    def test_eviction(self):
+        data = [bytes(100) for _ in range(20)]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with DiskCachedDataset(data, cache_dir=cache_dir, num_bytes=1000) as ds:
+                for _ in range(3):
+                    for i in range(len(ds)):
+                        self.assertEqual(data[i], ds[i])
+                        self.assertLessEqual(ds.num_cached_bytes, 1000)
+                num_files = len(list((Path(cache_dir) / "samples").rglob("*.pkl")))
+                cached_bytes = sum(p.stat().st_size for p in (Path(cache_dir) / "samples").rglob("*.pkl"))
+                self.assertLess(0, num_files)
+                self.assertEqual(ds.num_cached_bytes, cached_bytes)
+
+    def test_eviction_second_chance(self):
+        data = [bytes(100) for _ in range(4)]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # fits 2 samples
+            with DiskCachedDataset(data, cache_dir=cache_dir, num_bytes=300) as ds:
+                _ = ds[0]
+                _ = ds[1]
+                # clears reference bits of 0 and 1 -> evicts 0
+                _ = ds[2]
+                self.assertEqual(0, ds.index[ds._HEADER_ROWS, 0])
+                self.assertLess(0, ds.index[ds._HEADER_ROWS + 1, 0])
+                self.assertLess(0, ds.index[ds._HEADER_ROWS + 2, 0])
+
+    def test_dataloader(self):
+        data = [torch.full(size=(4,), fill_value=i) for i in range(16)]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with DiskCachedDataset(data, cache_dir=cache_dir, num_bytes=100000) as ds:
+                loader = DataLoader(ds, batch_size=4, num_workers=2)
+                for _ in range(2):
+                    self.assertEqual(torch.stack(data).tolist(), torch.concat(list(loader)).tolist())
+                self.assertEqual(16, ds.hits)
+                self.assertEqual(16, ds.misses)
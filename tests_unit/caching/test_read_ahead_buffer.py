@@ -0,0 +1,62 @@
+import pickle
+import unittest
+
+from kappadata.caching.read_ahead_buffer import ReadAheadBuffer
+
+
+class TestReadAheadBuffer(unittest.TestCase):
+    def test_put_get(self):
+        buffer = ReadAheadBuffer(num_slots=4, num_bytes=10)
+        try:
+            self.assertIsNone(buffer.get(0))
+            self.assertTrue(buffer.put(0, b"abc"))
+            self.assertTrue(buffer.put(1, b"defg"))
+            self.assertIn(0, buffer)
+            self.assertEqual(b"abc", buffer.get(0))
+            self.assertEqual(b"defg", buffer.get(1))
+            self.assertEqual(2, buffer.hits)
+            self.assertEqual(1, buffer.misses)
+            # too large
+            self.assertFalse(buffer.put(2, b"x" * 11))
+        finally:
+            buffer.dispose()
+
+    def test_overwrite(self):
+        buffer = ReadAheadBuffer(num_slots=4, num_bytes=10)
+        try:
+            buffer.put(0, b"abcd")
+            buffer.put(1, b"efgh")
+            # doesn't fit at the end of the ring -> wraps around and overwrites sample 0
+            buffer.put(2, b"ijk")
+            self.assertEqual(13, buffer.write_head)
+            self.assertNotIn(0, buffer)
+            self.assertIsNone(buffer.get(0))
+            self.assertEqual(b"efgh", buffer.get(1))
+            self.assertEqual(b"ijk", buffer.get(2))
+            # rewrite sample 1 (old data of sample 1 is overwritten)
+            buffer.put(1, b"lmnop")
+            self.assertEqual(18, buffer.write_head)
+            self.assertEqual(b"lmnop", buffer.get(1))
+            self.assertEqual(b"ijk", buffer.get(2))
+            # wraps around and overwrites sample 1 and 2
+            buffer.put(3, b"qrstuv")
+            self.assertEqual(26, buffer.write_head)
+            self.assertIsNone(buffer.get(1))
+            self.assertIsNone(buffer.get(2))
+            self.assertEqual(b"qrstuv", buffer.get(3))
+        finally:
+            buffer.dispose()
+
+    def test_pickle(self):
+        buffer = ReadAheadBuffer(num_slots=2, num_bytes=10)
+        try:
+            buffer.put(1, b"abc")
+            reader = pickle.loads(pickle.dumps(buffer))
+            self.assertEqual(b"abc", reader.get(1))
+            with self.assertRaises(AssertionError):
+                reader.put(0, b"abc")
+            buffer.put(0, b"def")
+            self.assertEqual(b"def", reader.get(0))
+            reader.dispose()
+        finally:
+            buffer.dispose()
@@ -0,0 +1,51 @@
+import unittest
+
+import torch
+from torch.utils.data import DataLoader
+
+from kappadata.caching.shared_memory_dataset import SharedMemoryDataset
+
+
+class TestSharedMemoryDataset(unittest.TestCase):
+    def test_hits_misses(self):
+        data = [torch.full(size=(4,), fill_value=i) for i in range(10)]
+        with SharedMemoryDataset(data, num_bytes=100000) as ds:
+            for i in range(len(ds)):
+                self.assertEqual(data[i].tolist(), ds[i].tolist())
+            self.assertEqual(0, ds.hits)
+            self.assertEqual(10, ds.misses)
+            for i in range(len(ds)):
+                self.assertEqual(data[i].tolist(), ds[i].tolist())
+            self.assertEqual(10, ds.hits)
+            self.assertEqual(10, ds.misses)
+
+    def test_budget(self):
+        data = [bytes(100) for _ in range(10)]
+        with SharedMemoryDataset(data, num_bytes=500) as ds:
+            for i in range(len(ds)):
+                self.assertEqual(data[i], ds[i])
+            num_cached = len(ds.cache)
+            self.assertLess(0, num_cached)
+            self.assertLess(num_cached, 5)
+            self.assertLessEqual(ds.cache.num_used_bytes, 500)
+            # samples that dont fit are still loaded
+            for i in range(len(ds)):
+                self.assertEqual(data[i], ds[i])
+            self.assertEqual(num_cached, ds.hits)
+
+    def test_transform(self):
+        with SharedMemoryDataset(list(range(5)), num_bytes=1000, transform=lambda x: x * 2) as ds:
+            self.assertEqual([0, 2, 4, 6, 8], [ds[i] for i in range(len(ds))])
+            self.assertEqual([0, 2, 4, 6, 8], [ds[i] for i in range(len(ds))])
+            self.assertEqual(5, ds.hits)
+
+    def test_dataloader_workers_share_cache(self):
+        data = [torch.full(size=(4,), fill_value=i) for i in range(16)]
+        with SharedMemoryDataset(data, num_bytes=100000) as ds:
+            loader = DataLoader(ds, batch_size=4, num_workers=2)
+            for _ in range(2):
+                self.assertEqual(torch.stack(data).tolist(), torch.concat(list(loader)).tolist())
+            # samples cached by the workers are visible in the main process
+            self.assertEqual(16, len(ds.cache))
+            self.assertEqual(16, ds.hits)
+            self.assertEqual(16, ds.misses)
@@ -0,0 +1,50 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from torchvision.datasets import ImageFolder
+from torchvision.transforms.functional import resize
+
+from kappadata.common.datasets.kd_decoded_image_folder import KDDecodedImageFolder
+from kappadata.copying.create_decoded import create_decoded_imagefolder
+from tests_util.image_folder import create_image_folder
+
+
+class TestKDDecodedImageFolder(unittest.TestCase):
+    def _test(self, max_short_side, num_workers):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            dst = Path(tmp) / "dst"
+            create_decoded_imagefolder(src=src, dst=dst, max_short_side=max_short_side, num_workers=num_workers)
+            expected = ImageFolder(root=src)
+            with KDDecodedImageFolder(root=dst) as ds:
+                self.assertEqual(len(expected), len(ds))
+                self.assertEqual(["a", "b"], ds.class_names)
+                self.assertEqual((2,), ds.getshape_class())
+                for i in range(len(ds)):
+                    img, cls = expected[i]
+                    if max_short_side is not None:
+                        img = resize(img, max_short_side, antialias=True)
+                    x = ds.getitem_x(i)
+                    self.assertEqual(np.uint8, x.dtype)
+                    self.assertEqual(np.asarray(img).tolist(), x.tolist())
+                    self.assertEqual(cls, ds.getitem_class(i))
+
+    def test_noresize(self):
+        self._test(max_short_side=None, num_workers=0)
+
+    def test_resize(self):
+        self._test(max_short_side=16, num_workers=0)
+
+    def test_resize_parallel(self):
+        self._test(max_short_side=16, num_workers=2)
+
+    def test_zero_copy(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            create_decoded_imagefolder(src=src, dst=Path(tmp) / "dst")
+            with KDDecodedImageFolder(root=Path(tmp) / "dst") as ds:
+                x = ds.getitem_x(1)
+                self.assertFalse(x.flags.owndata)
+                self.assertTrue(np.shares_memory(x, ds.x))
@@ -0,0 +1,57 @@
+import tempfile
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+
+import numpy as np
+from torchvision.datasets import ImageFolder
+
+from kappadata.common.datasets.kd_packed_image_folder import KDPackedImageFolder
+from kappadata.copying.create_packed import create_packed_imagefolder
+from tests_util.image_folder import create_image_folder
+
+
+class TestKDPackedImageFolder(unittest.TestCase):
+    def _test(self, num_workers, max_reads_in_flight_per_worker=4):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            create_packed_imagefolder(
+                src=src,
+                dst=Path(tmp) / "packed",
+                num_workers=num_workers,
+                max_reads_in_flight_per_worker=max_reads_in_flight_per_worker,
+            )
+            expected = ImageFolder(root=src)
+            with KDPackedImageFolder(root=Path(tmp) / "packed") as ds:
+                self.assertEqual(len(expected), len(ds))
+                self.assertEqual(expected.classes, ds.class_names)
+                self.assertEqual(expected.targets, ds.getall_class())
+                for i in range(len(ds)):
+                    with open(expected.samples[i][0], "rb") as f:
+                        self.assertEqual(f.read(), ds.getitem_raw(i).tobytes())
+                    img, cls = expected[i]
+                    self.assertEqual(np.asarray(img).tolist(), np.asarray(ds.getitem_x(i)).tolist())
+                    self.assertEqual(cls, ds.getitem_class(i))
+
+    def test_sequential(self):
+        self._test(num_workers=0)
+
+    def test_threaded(self):
+        self._test(num_workers=4)
+
+    def test_threaded_bounded(self):
+        self._test(num_workers=2, max_reads_in_flight_per_worker=1)
+
+    def test_interrupted(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            dst = Path(tmp) / "packed"
+            with patch("kappadata.copying.create_packed.raw_image_loader", side_effect=OSError("read failed")):
+                with self.assertRaises(OSError):
+                    create_packed_imagefolder(src=src, dst=dst)
+            # no data.bin -> not mistaken for a complete packed dataset and packing can be restarted
+            self.assertFalse((dst / "data.bin").exists())
+            create_packed_imagefolder(src=src, dst=dst)
+            self.assertTrue((dst / "data.bin").exists())
+            self.assertFalse((dst / "data.bin.tmp").exists())
+
@@ -0,0 +1,63 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader
+from torchvision.datasets import ImageFolder
+from torchvision.transforms.functional import pil_to_tensor
+
+from kappadata.common.datasets.kd_zip_image_folder import KDZipImageFolder
+from kappadata.copying.create_zips import create_zips_imagefolder
+from kappadata.wrappers.mode_wrapper import ModeWrapper
+from tests_util.image_folder import create_image_folder
+
+
+class TestKDZipImageFolder(unittest.TestCase):
+    def _assert_equal_to_image_folder(self, src, ds):
+        expected = ImageFolder(root=src)
+        self.assertEqual(len(expected), len(ds))
+        self.assertEqual(expected.classes, ds.class_names)
+        for i in range(len(ds)):
+            img, cls = expected[i]
+            self.assertEqual(np.asarray(img).tolist(), np.asarray(ds.getitem_x(i)).tolist())
+            self.assertEqual(cls, ds.getitem_class(i))
+
+    def test_classwise_zips(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            create_zips_imagefolder(src=src, dst=Path(tmp) / "zips")
+            with KDZipImageFolder(root=Path(tmp) / "zips") as ds:
+                self._assert_equal_to_image_folder(src=src, ds=ds)
+
+    def test_single_zip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            shutil.make_archive(Path(tmp) / "train", "zip", src)
+            with KDZipImageFolder(root=Path(tmp) / "train") as ds:
+                self._assert_equal_to_image_folder(src=src, ds=ds)
+            with KDZipImageFolder(root=Path(tmp) / "train.zip") as ds:
+                self.assertEqual(6, len(ds))
+
+    def test_max_open_zips(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src", class_names=("a", "b", "c"))
+            create_zips_imagefolder(src=src, dst=Path(tmp) / "zips")
+            with KDZipImageFolder(root=Path(tmp) / "zips", max_open_zips=2) as ds:
+                for i in range(len(ds)):
+                    _ = ds.getitem_x(i)
+                    self.assertLessEqual(len(ds._zips), 2)
+
+    def test_dataloader(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src", sizes=((8, 8),))
+            create_zips_imagefolder(src=src, dst=Path(tmp) / "zips")
+            ds = KDZipImageFolder(root=Path(tmp) / "zips", transform=lambda x, ctx: pil_to_tensor(x))
+            with ModeWrapper(ds, mode="x class") as mode_ds:
+                # open handles in main process before forking
+                _ = mode_ds[0]
+                loader = DataLoader(mode_ds, batch_size=2, num_workers=2)
+                x = torch.concat([x for x, _ in loader])
+                self.assertEqual([ds.getitem_x(i).tolist() for i in range(len(ds))], x.tolist())
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from kappadata.common.datasets.kd_image_folder import KDImageFolder
+from kappadata.copying.background_copier import BackgroundCopier
+from kappadata.copying.copying_utils import CopyManifest
+from kappadata.samplers.copy_ahead_sampler import CopyAheadSampler
+from kappadata.transforms import KDIdentityTransform
+from tests_util.image_folder import create_image_folder
+
+
+class TestBackgroundCopier(unittest.TestCase):
+    def test_copy(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            create_image_folder(Path(tmp) / "global" / "train", num_samples_per_class=10)
+            copier = BackgroundCopier(Path(tmp) / "global", Path(tmp) / "local", relative_path="train", num_workers=3)
+            copier.start()
+            copier.prioritize(["b/b_9.png", "a/a_5.png"])
+            copier.wait()
+            dst = Path(tmp) / "local" / "train"
+            self.assertTrue((dst / "autocopy_end.txt").exists())
+            self.assertEqual(20, len(CopyManifest(dst / "autocopy_manifest.txt").completed))
+            for class_name in ["a", "b"]:
+                for i in range(10):
+                    src_bytes = (Path(tmp) / "global" / "train" / class_name / f"{class_name}_{i}.png").read_bytes()
+                    self.assertEqual(src_bytes, (dst / class_name / f"{class_name}_{i}.png").read_bytes())
+            # already copied
+            copier = BackgroundCopier(Path(tmp) / "global", Path(tmp) / "local", relative_path="train").start()
+            self.assertTrue(copier.is_finished)
+
+    def test_resume_removes_stale_tmp_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            create_image_folder(Path(tmp) / "global" / "train", num_samples_per_class=3)
+            dst = Path(tmp) / "local" / "train"
+            # simulate an interrupted copy
+            (dst / "a").mkdir(parents=True)
+            (dst / "autocopy_start.txt").touch()
+            (dst / "a" / ".a_0.png.1234.tmp").write_bytes(b"partial")
+            BackgroundCopier(Path(tmp) / "global", Path(tmp) / "local", relative_path="train").start().wait()
+            self.assertTrue((dst / "autocopy_end.txt").exists())
+            self.assertEqual([], [file for _, _, files in os.walk(dst) for file in files if file.endswith(".tmp")])
+
+    def test_prioritize_dedup_and_cap(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            create_image_folder(Path(tmp) / "global", num_samples_per_class=10)
+            copier = BackgroundCopier(Path(tmp) / "global", Path(tmp) / "local", max_priority=3)
+            # not started -> files are only queued
+            copier.prioritize(["a/a_0.png", "a/a_0.png", "a/a_1.png"])
+            self.assertEqual(["a/a_0.png", "a/a_1.png"], list(copier._priority))
+            copier.prioritize(["a/a_2.png", "a/a_3.png"])
+            self.assertEqual(["a/a_1.png", "a/a_2.png", "a/a_3.png"], list(copier._priority))
+
+    def test_failed_file_is_skipped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            create_image_folder(Path(tmp) / "global", num_samples_per_class=5)
+            copier = BackgroundCopier(Path(tmp) / "global", Path(tmp) / "local", num_workers=2)
+            copy = copier._copy
+
+            def failing_copy(relative_path):
+                if relative_path == "a/a_2.png":
+                    raise OSError("read error")
+                copy(relative_path)
+
+            copier._copy = failing_copy
+            copier.start().wait()
+            self.assertEqual(["a/a_2.png"], copier.failed_paths)
+            self.assertTrue((Path(tmp) / "local" / "b" / "b_4.png").exists())
+            # not marked as finished -> the next start copies the missing file
+            self.assertFalse((Path(tmp) / "local" / "autocopy_end.txt").exists())
+            BackgroundCopier(Path(tmp) / "global", Path(tmp) / "local").start().wait()
+            self.assertTrue((Path(tmp) / "local" / "a" / "a_2.png").exists())
+            self.assertTrue((Path(tmp) / "local" / "autocopy_end.txt").exists())
+
+    def test_dataset_during_copy(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            global_root = create_image_folder(Path(tmp) / "global", num_samples_per_class=10)
+            local_root = Path(tmp) / "local"
+            expected = KDImageFolder(root=global_root, transform=KDIdentityTransform())
+            ds = KDImageFolder(root=global_root, transform=KDIdentityTransform(), use_index=True, local_root=local_root)
+            # nothing copied yet -> global paths
+            self.assertEqual(global_root / "a" / "a_0.png", ds.get_path(0))
+            copier = BackgroundCopier(global_root, local_root, num_workers=2)
+            copier.start()
+            sampler = CopyAheadSampler(range(len(ds)), copier=copier, path_fn=ds.get_relative_path, num_ahead=4)
+            for idx in sampler:
+                self.assertEqual(np.asarray(expected.getitem_x(idx)).tolist(), np.asarray(ds.getitem_x(idx)).tolist())
+            copier.wait()
+            self.assertEqual(local_root / "a" / "a_0.png", ds.get_path(0))
@@ -0,0 +1,38 @@
+import multiprocessing
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from kappadata.copying.folder import copy_folder_from_global_to_local
+from kappadata.copying.image_folder import copy_imagefolder_from_global_to_local
+
+
+def _copy(copy_fn, global_path, local_path):
+    result = copy_fn(global_path, local_path, relative_path="train", use_lock=True)
+    return result.was_copied, result.was_deleted
+
+
+class TestCopyLock(unittest.TestCase):
+    def _test(self, copy_fn):
+        with tempfile.TemporaryDirectory() as tmp:
+            global_path = Path(tmp) / "global"
+            global_path.mkdir()
+            with zipfile.ZipFile(global_path / "train.zip", "w") as f:
+                for i in range(3):
+                    for j in range(20):
+                        f.writestr(f"class{i}/file{j}.txt", f"{i}_{j}")
+            local_path = Path(tmp) / "local"
+            with multiprocessing.Pool(4) as pool:
+                results = pool.starmap(_copy, [(copy_fn, global_path, local_path)] * 4)
+            # exactly one process copied, no process deleted the copy of another process
+            self.assertEqual(1, sum(was_copied for was_copied, _ in results))
+            self.assertFalse(any(was_deleted for _, was_deleted in results))
+            self.assertTrue((local_path / "train" / "autocopy_end.txt").exists())
+            self.assertEqual("2_19", (local_path / "train" / "class2" / "file19.txt").read_text())
+
+    def test_folder(self):
+        self._test(copy_folder_from_global_to_local)
+
+    def test_imagefolder(self):
+        self._test(copy_imagefolder_from_global_to_local)
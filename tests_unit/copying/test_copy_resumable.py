@@ -0,0 +1,82 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from kappadata.copying.copying_utils import CopyManifest, copy_files_resumable
+from kappadata.copying.folder import copy_folder_from_global_to_local
+from kappadata.copying.image_folder import copy_imagefolder_from_global_to_local
+
+
+class TestCopyResumable(unittest.TestCase):
+    @staticmethod
+    def _create_files(root, num_folders=3, num_files=5):
+        for i in range(num_folders):
+            (root / f"folder{i}").mkdir(parents=True)
+            for j in range(num_files):
+                (root / f"folder{i}" / f"file{j}.txt").write_text(f"{i}_{j}")
+
+    def _assert_copied(self, dst, num_folders=3, num_files=5):
+        for i in range(num_folders):
+            for j in range(num_files):
+                self.assertEqual(f"{i}_{j}", (dst / f"folder{i}" / f"file{j}.txt").read_text())
+
+    def test_manifest_incomplete_line(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "manifest.txt"
+            path.write_text("a/b.txt\na/c.txt\na/d.t")
+            manifest = CopyManifest(path)
+            self.assertEqual({"a/b.txt", "a/c.txt"}, manifest.completed)
+            manifest.add(["a/d.txt"])
+            self.assertIn("a/d.txt", CopyManifest(path))
+
+    def test_copy_files_resumable(self):
+        for num_workers in [0, 4]:
+            with tempfile.TemporaryDirectory() as tmp:
+                src = Path(tmp) / "src"
+                dst = Path(tmp) / "dst"
+                self._create_files(src)
+                manifest = CopyManifest(Path(tmp) / "manifest.txt")
+                num_copied = copy_files_resumable(src, dst, manifest, num_workers=num_workers, chunk_size=4)
+                self.assertEqual(15, num_copied)
+                self._assert_copied(dst)
+                self.assertEqual(15, len(CopyManifest(Path(tmp) / "manifest.txt").completed))
+
+    def _test_resume(self, copy_fn):
+        with tempfile.TemporaryDirectory() as tmp:
+            global_path = Path(tmp) / "global"
+            local_path = Path(tmp) / "local"
+            self._create_files(global_path / "train")
+            # simulate interrupted copy
+            dst = local_path / "train"
+            (dst / "folder0").mkdir(parents=True)
+            (dst / "autocopy_start.txt").touch()
+            (dst / "folder0" / "file0.txt").write_text("not overwritten")
+            (dst / "autocopy_manifest.txt").write_text("folder0/file0.txt\n")
+            result = copy_fn(global_path, local_path, relative_path="train", num_workers=2)
+            self.assertTrue(result.was_copied)
+            self.assertTrue(result.was_resumed)
+            self.assertFalse(result.was_deleted)
+            self.assertTrue((dst / "autocopy_end.txt").exists())
+            self.assertEqual("not overwritten", (dst / "folder0" / "file0.txt").read_text())
+            (dst / "folder0" / "file0.txt").write_text("0_0")
+            self._assert_copied(dst)
+
+    def test_resume_folder(self):
+        self._test_resume(copy_folder_from_global_to_local)
+
+    def test_resume_imagefolder(self):
+        self._test_resume(copy_imagefolder_from_global_to_local)
+
+    def test_copy_excludes_src_markers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            global_path = Path(tmp) / "global"
+            self._create_files(global_path / "train")
+            (global_path / "train" / "autocopy_start.txt").touch()
+            (global_path / "train" / "autocopy_end.txt").touch()
+            dst = Path(tmp) / "local" / "train"
+            dst.mkdir(parents=True)
+            (dst / "autocopy_start.txt").touch()
+            (dst / "autocopy_manifest.txt").touch()
+            manifest = CopyManifest(dst / "autocopy_manifest.txt")
+            copy_files_resumable(global_path / "train", dst, manifest, exclude=["autocopy_end.txt"])
+            self.assertFalse((dst / "autocopy_end.txt").exists())
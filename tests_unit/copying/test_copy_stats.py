@@ -0,0 +1,72 @@
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from kappadata.copying.copy_stats import CopyStats
+from kappadata.copying.create_zips import create_zips_imagefolder
+from kappadata.copying.folder import copy_folder_from_global_to_local
+from kappadata.copying.image_folder import copy_imagefolder_from_global_to_local
+from tests_util.image_folder import create_image_folder
+
+
+class TestCopyStats(unittest.TestCase):
+    def test_add(self):
+        logs = []
+        stats = CopyStats(num_files=4, num_bytes=400, log_fn=logs.append, log_interval=0)
+        stats.add(num_files=1, num_bytes=100, read_time=1., write_time=0.5, worker="a")
+        stats.add(num_files=1, num_bytes=100, read_time=0.5, decompress_time=1.5, worker="b")
+        self.assertEqual(2, len(logs))
+        self.assertEqual(200, stats.copied_bytes)
+        self.assertEqual(2, stats.copied_files)
+        self.assertEqual(1.5, stats.read_time)
+        self.assertEqual(0.5, stats.write_time)
+        self.assertEqual(1.5, stats.decompress_time)
+        self.assertEqual(dict(a=200 / 3, b=50.), stats.worker_bytes_per_second)
+        # half of the bytes were copied -> remaining time is approximately the elapsed time
+        self.assertAlmostEqual(stats.elapsed, stats.eta, delta=0.1)
+        stats.finish()
+        # elapsed time is fixed after finish
+        elapsed = stats.elapsed
+        time.sleep(0.01)
+        self.assertEqual(elapsed, stats.elapsed)
+        self.assertIn("copied 2/4 files", logs[-1])
+
+    def test_eta_unknown(self):
+        stats = CopyStats()
+        stats.add(num_files=1, num_bytes=100)
+        self.assertIsNone(stats.eta)
+
+    def _assert_stats(self, stats, src):
+        num_files = sum(1 for path in Path(src).rglob("*") if path.is_file())
+        num_bytes = sum(path.stat().st_size for path in Path(src).rglob("*") if path.is_file())
+        self.assertEqual(num_files, stats.copied_files)
+        self.assertEqual(num_bytes, stats.copied_bytes)
+        self.assertGreater(stats.read_time, 0)
+        self.assertGreater(stats.write_time, 0)
+        self.assertGreater(len(stats.worker_bytes_per_second), 0)
+
+    def test_copy_raw(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "global" / "train")
+            result = copy_folder_from_global_to_local(Path(tmp) / "global", Path(tmp) / "local", "train", num_workers=2)
+            self._assert_stats(result.stats, src=src)
+            self.assertEqual(0, result.stats.decompress_time)
+
+    def test_copy_zip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            shutil.make_archive(Path(tmp) / "global" / "train", "zip", src)
+            result = copy_imagefolder_from_global_to_local(Path(tmp) / "global", Path(tmp) / "local", "train")
+            self._assert_stats(result.stats, src=src)
+            self.assertEqual(result.stats.num_bytes, result.stats.copied_bytes)
+            self.assertGreater(result.stats.decompress_time, 0)
+
+    def test_copy_zips(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            create_zips_imagefolder(src=src, dst=Path(tmp) / "global" / "train")
+            result = copy_imagefolder_from_global_to_local(Path(tmp) / "global", Path(tmp) / "local", "train")
+            self._assert_stats(result.stats, src=src)
+            self.assertEqual(0, result.stats.eta)
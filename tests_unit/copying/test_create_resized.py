@@ -0,0 +1,71 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+from torchvision.datasets import ImageFolder
+
+from kappadata.common.datasets.kd_zip_image_folder import KDZipImageFolder
+from kappadata.copying.create_resized import create_resized_imagefolder
+from tests_util.image_folder import create_image_folder
+
+
+class TestCreateResized(unittest.TestCase):
+    def _assert_resized(self, src, ds, max_short_side):
+        expected = ImageFolder(root=src)
+        self.assertEqual(len(expected), len(ds))
+        for i in range(len(ds)):
+            src_img, _ = expected[i]
+            img, _ = ds[i]
+            self.assertLessEqual(min(img.size), max_short_side)
+            self.assertEqual(min(max_short_side, min(src_img.size)), min(img.size))
+
+    def test_folder(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            create_resized_imagefolder(src=src, dst=Path(tmp) / "dst", max_short_side=16, num_workers=2, chunk_size=2)
+            ds = ImageFolder(root=Path(tmp) / "dst")
+            self.assertEqual(ImageFolder(root=src).samples, [(path.replace("dst", "src"), y) for path, y in ds.samples])
+            self._assert_resized(src=src, ds=ds, max_short_side=16)
+
+    def test_small_images_unchanged(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            create_resized_imagefolder(src=src, dst=Path(tmp) / "dst", max_short_side=20)
+            # (20, 30) is not resized, (32, 24) is resized to (26, 20)
+            self.assertEqual((src / "a" / "a_0.png").read_bytes(), (Path(tmp) / "dst" / "a" / "a_0.png").read_bytes())
+            with Image.open(Path(tmp) / "dst" / "a" / "a_1.png") as img:
+                self.assertEqual((20, 26), img.size)
+
+    def test_jpeg(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "src"
+            (src / "a").mkdir(parents=True)
+            img = np.random.default_rng(seed=0).integers(0, 256, size=(64, 96, 3), dtype=np.uint8)
+            Image.fromarray(img).save(src / "a" / "a_0.jpg", quality=100)
+            create_resized_imagefolder(src=src, dst=Path(tmp) / "dst", max_short_side=16, quality=50)
+            with Image.open(Path(tmp) / "dst" / "a" / "a_0.jpg") as img:
+                self.assertEqual("JPEG", img.format)
+                self.assertEqual((24, 16), img.size)
+
+    def test_zip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            create_resized_imagefolder(src=src, dst=Path(tmp) / "train", max_short_side=16, output_format="zip")
+            with KDZipImageFolder(root=Path(tmp) / "train", transform=lambda x, ctx: x) as ds:
+                self._assert_resized(src=src, ds=[(ds.getitem_x(i), None) for i in range(len(ds))], max_short_side=16)
+
+    def test_zips(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            create_resized_imagefolder(
+                src=src,
+                dst=Path(tmp) / "zips",
+                max_short_side=16,
+                output_format="zips",
+                num_workers=2,
+            )
+            self.assertEqual(["a.zip", "b.zip"], sorted(path.name for path in (Path(tmp) / "zips").iterdir()))
+            with KDZipImageFolder(root=Path(tmp) / "zips", transform=lambda x, ctx: x) as ds:
+                self._assert_resized(src=src, ds=[(ds.getitem_x(i), None) for i in range(len(ds))], max_short_side=16)
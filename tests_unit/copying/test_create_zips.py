@@ -0,0 +1,57 @@
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from kappadata.copying.create_zips import create_zip, create_zips_folder, create_zips_imagefolder
+
+
+class TestCreateZips(unittest.TestCase):
+    def test_create_zip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "src"
+            (src / "a").mkdir(parents=True)
+            (src / "a" / "0.txt").write_text("a0")
+            (src / "b").mkdir()
+            (src / "b" / "0.txt").write_text("b0")
+            create_zip(src=src, dst=Path(tmp) / "dst" / "train", compression=zipfile.ZIP_STORED)
+            with zipfile.ZipFile(Path(tmp) / "dst" / "train.zip") as f:
+                self.assertEqual(["a/0.txt", "b/0.txt"], f.namelist())
+                self.assertTrue(all(info.compress_type == zipfile.ZIP_STORED for info in f.infolist()))
+                self.assertEqual(b"b0", f.read("b/0.txt"))
+
+    def test_create_zips_imagefolder(self):
+        for num_workers in [0, 2]:
+            with tempfile.TemporaryDirectory() as tmp:
+                src = Path(tmp) / "src"
+                for class_name in ["a", "b", "c"]:
+                    (src / class_name).mkdir(parents=True)
+                    for i in range(3):
+                        (src / class_name / f"{i}.txt").write_text(f"{class_name}{i}")
+                dst = Path(tmp) / "dst"
+                create_zips_imagefolder(src=src, dst=dst, num_workers=num_workers)
+                self.assertEqual(["a.zip", "b.zip", "c.zip"], sorted(item.name for item in dst.iterdir()))
+                with zipfile.ZipFile(dst / "b.zip") as f:
+                    self.assertEqual(["0.txt", "1.txt", "2.txt"], f.namelist())
+                    self.assertEqual(b"b1", f.read("1.txt"))
+
+    def test_create_zips_folder(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "src"
+            src.mkdir()
+            for i in range(10):
+                (src / f"{i}.wav").write_bytes(b"x" * (100 if i == 0 else 10))
+            # batch_size
+            create_zips_folder(src=src, dst=str(Path(tmp) / "by_count"), batch_size=4)
+            zips = sorted((Path(tmp) / "by_count").iterdir())
+            self.assertEqual(["batch_0.zip", "batch_1.zip", "batch_2.zip"], [item.name for item in zips])
+            with zipfile.ZipFile(zips[2]) as f:
+                self.assertEqual(["8.wav", "9.wav"], f.namelist())
+                # files are stored without compression by default
+                self.assertTrue(all(info.compress_type == zipfile.ZIP_STORED for info in f.infolist()))
+            # balanced by bytes (0.wav is as large as all other files combined)
+            create_zips_folder(src=src, dst=Path(tmp) / "by_bytes", num_bytes_per_zip=100, num_workers=2)
+            zips = sorted((Path(tmp) / "by_bytes").iterdir())
+            self.assertEqual(2, len(zips))
+            with zipfile.ZipFile(zips[0]) as f:
+                self.assertEqual(["0.wav"], f.namelist())
@@ -0,0 +1,120 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from kappadata.copying.create_zips import create_zips_imagefolder
+from kappadata.copying.folder import copy_folder_from_global_to_local
+from kappadata.copying.image_folder import copy_imagefolder_from_global_to_local
+from kappadata.copying.integrity import (
+    check_copy_integrity,
+    check_integrity,
+    create_integrity_manifest,
+    get_integrity_entries,
+    load_integrity_manifest,
+)
+from tests_util.image_folder import create_image_folder
+
+
+class TestIntegrity(unittest.TestCase):
+    def test_manifest(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            path = create_integrity_manifest(src, num_workers=2)
+            entries = load_integrity_manifest(path)
+            self.assertEqual(6, len(entries))
+            self.assertEqual((src / "a" / "a_0.png").stat().st_size, entries["a/a_0.png"][0])
+            self.assertEqual([], check_integrity(src, entries, num_workers=2))
+            # same checksums as zip
+            create_zips_imagefolder(src=src, dst=Path(tmp) / "zips")
+            self.assertEqual(entries, get_integrity_entries(Path(tmp) / "zips", source_format="zips", classwise=True))
+            # size only
+            entries = load_integrity_manifest(create_integrity_manifest(src, use_checksum=False))
+            self.assertIsNone(entries["a/a_0.png"][1])
+
+    def test_detects_invalid(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            entries = load_integrity_manifest(create_integrity_manifest(src))
+            (src / "a" / "a_0.png").unlink()
+            # same size but different content
+            data = bytearray((src / "b" / "b_1.png").read_bytes())
+            data[-1] = (data[-1] + 1) % 256
+            (src / "b" / "b_1.png").write_bytes(data)
+            self.assertEqual(["a/a_0.png", "b/b_1.png"], check_integrity(src, entries))
+            self.assertEqual(["a/a_0.png"], check_integrity(src, entries, use_checksum=False))
+
+    def test_copy_with_check(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            create_image_folder(Path(tmp) / "global" / "train")
+            create_integrity_manifest(Path(tmp) / "global" / "train")
+            result = copy_folder_from_global_to_local(
+                Path(tmp) / "global",
+                Path(tmp) / "local",
+                relative_path="train",
+                check_integrity="checksum",
+            )
+            self.assertTrue(result.was_copied)
+            self.assertTrue((Path(tmp) / "local" / "train" / "autocopy_end.txt").exists())
+
+    def test_copy_zip_with_check(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            shutil.make_archive(Path(tmp) / "global" / "train", "zip", src)
+            result = copy_imagefolder_from_global_to_local(
+                Path(tmp) / "global",
+                Path(tmp) / "local",
+                relative_path="train",
+                check_integrity="checksum",
+            )
+            self.assertTrue(result.was_copied)
+
+    def test_copy_invalid(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            create_image_folder(Path(tmp) / "global" / "train")
+            create_integrity_manifest(Path(tmp) / "global" / "train")
+            # corrupt manifest
+            manifest_path = Path(tmp) / "global" / "train" / "kappadata_integrity.txt"
+            manifest_path.write_text(manifest_path.read_text().replace("a/a_0.png\t", "a/a_9.png\t"))
+            with self.assertRaises(AssertionError):
+                copy_folder_from_global_to_local(
+                    Path(tmp) / "global",
+                    Path(tmp) / "local",
+                    relative_path="train",
+                    check_integrity="size",
+                )
+            dst = Path(tmp) / "local" / "train"
+            self.assertFalse((dst / "autocopy_end.txt").exists())
+            self.assertFalse((dst / "autocopy_manifest.txt").exists())
+
+    def test_invalid_mode_fails_before_copy(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            create_image_folder(Path(tmp) / "global" / "train")
+            for copy_fn in [copy_folder_from_global_to_local, copy_imagefolder_from_global_to_local]:
+                with self.assertRaises(AssertionError):
+                    copy_fn(Path(tmp) / "global", Path(tmp) / "local", relative_path="train", check_integrity="sizes")
+                self.assertFalse((Path(tmp) / "local").exists())
+
+    def test_source_format_is_not_guessed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            # raw dataset that mostly consists of zip files (e.g. zipped documents) -> entries are the zip files
+            src = Path(tmp) / "src"
+            src.mkdir()
+            shutil.make_archive(src / "doc", "zip", create_image_folder(Path(tmp) / "docs"))
+            (src / "labels.txt").write_text("0")
+            entries = get_integrity_entries(src, source_format="raw")
+            self.assertEqual(["doc.zip", "labels.txt"], sorted(entries.keys()))
+            self.assertEqual((src / "doc.zip").stat().st_size, entries["doc.zip"][0])
+            # folder of zips -> entries are the members of the zips
+            entries = get_integrity_entries(src, source_format="zips")
+            self.assertEqual(6, len(entries))
+
+    def test_copy_invalid_without_manifest(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            dst = Path(tmp) / "dst"
+            dst.mkdir()
+            # dst has no autocopy_manifest.txt -> only the integrity error is raised
+            with self.assertRaises(AssertionError):
+                check_copy_integrity(src_path=src, dst_path=dst, mode="size", source_format="raw")
+
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from kappadata.copying.folder import copy_folder_from_global_to_local
+from kappadata.copying.image_folder import copy_imagefolder_from_global_to_local
+from kappadata.copying.local_dataset_store import LocalDatasetStore
+
+
+class TestLocalDatasetStore(unittest.TestCase):
+    @staticmethod
+    def _create_dataset(path, num_bytes):
+        (path / "class0").mkdir(parents=True)
+        (path / "class0" / "file.bin").write_bytes(b"x" * num_bytes)
+
+    def test_get_default_name(self):
+        folder_name = LocalDatasetStore.get_default_name("/data/imagenet", "train")
+        zip_name = LocalDatasetStore.get_default_name("/data/imagenet/train.zip")
+        self.assertTrue(folder_name.startswith("data_imagenet_train_"))
+        self.assertTrue(zip_name.startswith("data_imagenet_train_"))
+        self.assertEqual(folder_name, LocalDatasetStore.get_default_name("/data/imagenet/train"))
+        # different sources are not mapped to the same name
+        self.assertNotEqual(folder_name, zip_name)
+        self.assertNotEqual(
+            LocalDatasetStore.get_default_name("/data/imagenet_train"),
+            LocalDatasetStore.get_default_name("/data/imagenet/train"),
+        )
+        self.assertTrue(LocalDatasetStore.get_default_name("/data/imagenet.v2/train").startswith("data_imagenet.v2_"))
+
+    def test_reuse(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._create_dataset(Path(tmp) / "global" / "ds", num_bytes=10)
+            store = LocalDatasetStore(Path(tmp) / "store")
+            with store.use(Path(tmp) / "global", relative_path="ds", copy_fn=copy_imagefolder_from_global_to_local) as path:
+                self.assertEqual(b"x" * 10, (path / "class0" / "file.bin").read_bytes())
+                self.assertEqual(1, store.get_num_refs(path.name))
+                mtime = (path / "autocopy_end.txt").stat().st_mtime_ns
+            self.assertEqual(0, store.get_num_refs(path.name))
+            # second use reuses the copy
+            with store.use(Path(tmp) / "global", relative_path="ds") as path2:
+                self.assertEqual(path, path2)
+                self.assertEqual(mtime, (path / "autocopy_end.txt").stat().st_mtime_ns)
+
+    def test_eviction(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ["a", "b", "c"]:
+                self._create_dataset(Path(tmp) / "global" / name, num_bytes=10000)
+            store = LocalDatasetStore(Path(tmp) / "store", num_bytes=25000)
+            path_a = store.acquire(Path(tmp) / "global", relative_path="a")
+            with store.use(Path(tmp) / "global", relative_path="b") as path_b:
+                pass
+            self.assertGreaterEqual(store.num_used_bytes, 20000)
+            # a is in use -> b is evicted (although a was used less recently)
+            path_c = store.acquire(Path(tmp) / "global", relative_path="c")
+            self.assertTrue(path_a.exists())
+            self.assertFalse(path_b.exists())
+            self.assertTrue(path_c.exists())
+            # a is released -> a is evicted when space is required
+            store.release(path_a.name)
+            store.release(path_c.name)
+            store.evict(num_bytes_required=10000)
+            self.assertFalse(path_a.exists())
+            self.assertTrue(path_c.exists())
+
+    def test_dead_process_ref(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._create_dataset(Path(tmp) / "global" / "a", num_bytes=100)
+            store = LocalDatasetStore(Path(tmp) / "store", num_bytes=50)
+            path = store.acquire(Path(tmp) / "global", relative_path="a")
+            # simulate reference of a process that died
+            ref, = os.listdir(store.refs_path / path.name)
+            os.rename(store.refs_path / path.name / ref, store.refs_path / path.name / "999999999_0")
+            self.assertEqual(0, store.get_num_refs(path.name))
+            store.evict()
+            self.assertFalse(path.exists())
+
+    def test_multiple_acquires_in_one_process(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._create_dataset(Path(tmp) / "global" / "a", num_bytes=100)
+            store = LocalDatasetStore(Path(tmp) / "store", num_bytes=50)
+            path = store.acquire(Path(tmp) / "global", relative_path="a")
+            store.acquire(Path(tmp) / "global", relative_path="a")
+            self.assertEqual(2, store.get_num_refs(path.name))
+            # one release keeps the dataset protected
+            store.release(path.name)
+            self.assertEqual(1, store.get_num_refs(path.name))
+            store.evict()
+            self.assertTrue(path.exists())
+            store.release(path.name)
+            store.evict()
+            self.assertFalse(path.exists())
+
+    def test_raw_folder_evicts_before_copy(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ["a", "b"]:
+                self._create_dataset(Path(tmp) / "global" / name, num_bytes=10000)
+            store = LocalDatasetStore(Path(tmp) / "store", num_bytes=15000)
+            with store.use(Path(tmp) / "global", relative_path="a") as path_a:
+                pass
+            # raw folder b is estimated with its size -> a is evicted before b is copied
+            copied = []
+
+            def copy_fn(**kwargs):
+                copied.append(path_a.exists())
+                copy_folder_from_global_to_local(**kwargs)
+
+            with store.use(Path(tmp) / "global", relative_path="b", copy_fn=copy_fn):
+                pass
+            self.assertEqual([False], copied)
@@ -0,0 +1,84 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from kappadata.common.datasets.kd_image_folder import KDImageFolder
+from kappadata.common.datasets.kd_zip_image_folder import KDZipImageFolder
+from kappadata.copying.create_zips import create_zips_imagefolder
+from kappadata.copying.folder import copy_folder_from_global_to_local
+from kappadata.copying.subset import copy_subset_from_global_to_local, get_root_indices
+from kappadata.transforms import KDIdentityTransform
+from kappadata.wrappers.dataset_wrappers import ClassFilterWrapper, RepeatWrapper, ShuffleWrapper, SubsetWrapper
+from kappadata.wrappers.mode_wrapper import ModeWrapper
+from tests_util.image_folder import create_image_folder
+
+
+class TestSubset(unittest.TestCase):
+    @staticmethod
+    def _list_files(root):
+        return sorted(
+            path.relative_to(root).as_posix()
+            for path in Path(root).rglob("*.png")
+        )
+
+    def test_get_root_indices(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = create_image_folder(Path(tmp) / "global", class_names=("a", "b", "c"), num_samples_per_class=4)
+            ds = KDImageFolder(root=root, use_index=True)
+            self.assertEqual(list(range(12)), get_root_indices(ds).tolist())
+            ds = ClassFilterWrapper(ds, valid_classes=[1, 2])
+            self.assertEqual(list(range(4, 12)), get_root_indices(ds).tolist())
+            ds = SubsetWrapper(ds, indices=[5, 0, 1, 0])
+            self.assertEqual([4, 5, 9], get_root_indices(ds).tolist())
+            ds = ShuffleWrapper(RepeatWrapper(ds, repetitions=2), seed=0)
+            self.assertEqual([4, 5, 9], get_root_indices(ModeWrapper(ds, mode="x")).tolist())
+
+    def test_copy_raw(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = create_image_folder(Path(tmp) / "global" / "train", class_names=("a", "b", "c"))
+            ds = SubsetWrapper(ClassFilterWrapper(KDImageFolder(root=root, use_index=True), valid_classes=[1, 2]), [0, 4])
+            local_root = Path(tmp) / "local" / "train"
+            result = copy_subset_from_global_to_local(ds, Path(tmp) / "global", Path(tmp) / "local", "train")
+            self.assertTrue(result.was_copied)
+            self.assertEqual(2, result.num_copied)
+            self.assertEqual(["b/b_0.png", "c/c_1.png"], self._list_files(local_root))
+            self.assertFalse((local_root / "autocopy_end.txt").exists())
+            # samples are loaded from the local copy
+            local_ds = KDImageFolder(root=root, use_index=True, local_root=local_root, transform=KDIdentityTransform())
+            self.assertEqual(local_root / "b" / "b_0.png", local_ds.get_path(3))
+            self.assertEqual(root / "a" / "a_0.png", local_ds.get_path(0))
+            # second subset only copies missing files
+            ds = ClassFilterWrapper(KDImageFolder(root=root, use_index=True), valid_classes=[2])
+            result = copy_subset_from_global_to_local(ds, Path(tmp) / "global", Path(tmp) / "local", "train")
+            self.assertEqual(2, result.num_copied)
+            # full copy resumes the subset copy
+            result = copy_folder_from_global_to_local(Path(tmp) / "global", Path(tmp) / "local", "train")
+            self.assertTrue(result.was_resumed)
+            self.assertEqual(self._list_files(root), self._list_files(local_root))
+
+    def _test_copy_zip(self, zip_root, src, num_workers):
+        ds = KDZipImageFolder(root=zip_root, transform=KDIdentityTransform())
+        subset = ClassFilterWrapper(ds, valid_classes=[1])
+        local_root = Path(src).parent / "local"
+        result = copy_subset_from_global_to_local(subset, zip_root, local_root, num_workers=num_workers)
+        self.assertEqual(3, result.num_copied)
+        self.assertEqual(["b/b_0.png", "b/b_1.png", "b/b_2.png"], self._list_files(local_root))
+        with KDZipImageFolder(root=zip_root, local_root=local_root, transform=KDIdentityTransform()) as local_ds:
+            for i in range(len(ds)):
+                self.assertEqual(np.asarray(ds.getitem_x(i)).tolist(), np.asarray(local_ds.getitem_x(i)).tolist())
+        ds.dispose()
+
+    def test_copy_classwise_zips(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            create_zips_imagefolder(src=src, dst=Path(tmp) / "zips")
+            self._test_copy_zip(zip_root=Path(tmp) / "zips", src=src, num_workers=0)
+
+    def test_copy_single_zip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = create_image_folder(Path(tmp) / "src")
+            shutil.make_archive(Path(tmp) / "train", "zip", src)
+            self._test_copy_zip(zip_root=Path(tmp) / "train", src=src, num_workers=2)
@@ -0,0 +1,101 @@
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from kappadata.copying.copying_utils import CopyManifest, unzip_parallel, split_balanced
+from kappadata.copying.image_folder import copy_imagefolder_from_global_to_local
+
+
+class TestUnzipParallel(unittest.TestCase):
+    @staticmethod
+    def _create_zip(path, num_classes=3, num_files=10):
+        with zipfile.ZipFile(path, "w") as f:
+            for i in range(num_classes):
+                for j in range(num_files):
+                    f.writestr(f"class{i}/file{j}.txt", f"{i}_{j}" * (j + 1))
+
+    def _assert_extracted(self, dst, num_classes=3, num_files=10):
+        for i in range(num_classes):
+            for j in range(num_files):
+                self.assertEqual(f"{i}_{j}" * (j + 1), (dst / f"class{i}" / f"file{j}.txt").read_text())
+
+    def testsplit_balanced(self):
+        self.assertEqual([(0, 2), (2, 4)], split_balanced([1, 1, 1, 1], num_splits=2))
+        self.assertEqual([(0, 1), (1, 4)], split_balanced([3, 1, 1, 1], num_splits=2))
+        self.assertEqual([(0, 1), (1, 2)], split_balanced([0, 0], num_splits=2))
+
+    def test_unzip_parallel(self):
+        for num_workers in [0, 3]:
+            with tempfile.TemporaryDirectory() as tmp:
+                src = Path(tmp) / "data.zip"
+                self._create_zip(src)
+                manifest_path = Path(tmp) / "manifest.txt"
+                unzip_parallel(src, Path(tmp) / "dst", num_workers=num_workers, chunk_bytes=50, manifest_path=manifest_path)
+                self._assert_extracted(Path(tmp) / "dst")
+                self.assertLess(1, len(CopyManifest(manifest_path).completed))
+
+    def test_unzip_parallel_sanitizes_paths(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "data.zip"
+            with zipfile.ZipFile(src, "w") as f:
+                f.writestr("../escaped_dir/x.txt", "x")
+                f.writestr("/absolute_dir/y.txt", "y")
+            dst = Path(tmp) / "dst"
+            unzip_parallel(src, dst)
+            self.assertFalse((Path(tmp) / "escaped_dir").exists())
+            self.assertEqual("x", (dst / "escaped_dir" / "x.txt").read_text())
+            self.assertEqual("y", (dst / "absolute_dir" / "y.txt").read_text())
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "data.zip"
+            self._create_zip(src)
+            manifest_path = Path(tmp) / "manifest.txt"
+            unzip_parallel(src, Path(tmp) / "dst", chunk_bytes=100, manifest_path=manifest_path)
+            entries = sorted(CopyManifest(manifest_path).completed)
+            # simulate that the first chunk was not completed
+            manifest_path.write_text("".join(f"{entry}\n" for entry in entries[1:]))
+            start, end = map(int, entries[0].split(":")[1].split("-"))
+            with zipfile.ZipFile(src) as f:
+                names = [info.filename for info in f.infolist()[start:end]]
+            for name in names:
+                (Path(tmp) / "dst" / name).unlink()
+            unzip_parallel(src, Path(tmp) / "dst", chunk_bytes=100, manifest_path=manifest_path)
+            self._assert_extracted(Path(tmp) / "dst")
+
+    def test_copy_imagefolder_zip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            global_path = Path(tmp) / "global"
+            global_path.mkdir()
+            self._create_zip(global_path / "train.zip")
+            local_path = Path(tmp) / "local"
+            result = copy_imagefolder_from_global_to_local(global_path, local_path, relative_path="train", num_workers=2)
+            self.assertTrue(result.was_zip)
+            self._assert_extracted(local_path / "train")
+            self.assertTrue((local_path / "train" / "autocopy_end.txt").exists())
+
+    def test_copy_imagefolder_classwise_resume(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            global_path = Path(tmp) / "global" / "train"
+            global_path.mkdir(parents=True)
+            for i in range(3):
+                with zipfile.ZipFile(global_path / f"class{i}.zip", "w") as f:
+                    f.writestr("file.txt", str(i))
+            # simulate interrupted copy where class0.zip was already extracted
+            dst = Path(tmp) / "local" / "train"
+            (dst / "class0").mkdir(parents=True)
+            (dst / "class0" / "file.txt").write_text("not overwritten")
+            (dst / "autocopy_start.txt").touch()
+            (dst / "autocopy_manifest.txt").write_text("class0.zip\n")
+            result = copy_imagefolder_from_global_to_local(
+                Path(tmp) / "global",
+                Path(tmp) / "local",
+                relative_path="train",
+                num_workers=2,
+            )
+            self.assertTrue(result.was_resumed)
+            self.assertTrue(result.was_zip_classwise)
+            self.assertEqual("not overwritten", (dst / "class0" / "file.txt").read_text())
+            self.assertEqual("1", (dst / "class1" / "file.txt").read_text())
+            self.assertEqual("2", (dst / "class2" / "file.txt").read_text())
@@ -0,0 +1,64 @@
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from kappadata.loading.draft import draft_loader, get_draft_original_size
+from kappadata.loading.image_folder import raw_image_folder_sample_to_pil_sample
+from kappadata.transforms.kd_random_resized_crop import KDRandomResizedCrop
+
+
+class TestDraft(unittest.TestCase):
+    @staticmethod
+    def _create_img(fmt="JPEG", width=800, height=600):
+        # smooth image such that the reduced-size decoding is similar to a downsampled full-resolution image
+        x = np.linspace(0, 255, width)[None, :, None]
+        y = np.linspace(0, 255, height)[:, None, None]
+        img = np.concatenate([x + 0 * y, y + 0 * x, (x + y) / 2], axis=2).astype(np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(img).save(buffer, format=fmt)
+        return buffer.getvalue()
+
+    def test_draft_loader(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "img.jpg"
+            path.write_bytes(self._create_img())
+            img = draft_loader(path, draft_size=200)
+            self.assertEqual((400, 300), img.size)
+            self.assertEqual("RGB", img.mode)
+            self.assertEqual((800, 600), get_draft_original_size(img))
+            # resized images are not considered as drafted anymore
+            self.assertIsNone(get_draft_original_size(img.resize((100, 100))))
+            # no draft
+            img = draft_loader(path)
+            self.assertEqual((800, 600), img.size)
+            self.assertIsNone(get_draft_original_size(img))
+
+    def test_raw_sample_to_pil_sample(self):
+        x, y = raw_image_folder_sample_to_pil_sample((self._create_img(), 3), draft_size=100)
+        self.assertEqual(3, y)
+        self.assertEqual((200, 150), x.size)
+        # only JPEGs are drafted
+        x, _ = raw_image_folder_sample_to_pil_sample((self._create_img(fmt="PNG"), 3), draft_size=100)
+        self.assertEqual((800, 600), x.size)
+        self.assertIsNone(get_draft_original_size(x))
+
+    def test_random_resized_crop_consistent(self):
+        data = self._create_img()
+        full, _ = raw_image_folder_sample_to_pil_sample((data, 0))
+        drafted, _ = raw_image_folder_sample_to_pil_sample((data, 0), draft_size=200)
+        full_ctx = {}
+        drafted_ctx = {}
+        full_crop = KDRandomResizedCrop(size=64, scale=(0.25, 1.0)).set_rng(np.random.default_rng(seed=5))
+        drafted_crop = KDRandomResizedCrop(size=64, scale=(0.25, 1.0)).set_rng(np.random.default_rng(seed=5))
+        for _ in range(5):
+            full_x = full_crop(full, ctx=full_ctx)
+            drafted_x = drafted_crop(drafted, ctx=drafted_ctx)
+            self.assertEqual(full_ctx, drafted_ctx)
+            self.assertEqual(dict(og_h=600, og_w=800), {k: full_ctx["random_resized_crop"][k] for k in ["og_h", "og_w"]})
+            self.assertEqual(full_x.size, drafted_x.size)
+            diff = np.abs(np.asarray(full_x, dtype=np.float32) - np.asarray(drafted_x, dtype=np.float32))
+            self.assertLess(diff.mean(), 5)
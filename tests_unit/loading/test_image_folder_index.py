@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from torchvision.datasets import ImageFolder
+
+from kappadata.common.datasets.kd_image_folder import KDImageFolder
+from kappadata.loading.image_folder_index import ImageFolderIndex
+from kappadata.transforms import KDIdentityTransform
+from tests_util.image_folder import create_image_folder
+
+
+class TestImageFolderIndex(unittest.TestCase):
+    def test_create_matches_imagefolder(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = create_image_folder(Path(tmp) / "root", class_names=("b", "a", "c"))
+            expected = ImageFolder(root=root)
+            index = ImageFolderIndex.create(root)
+            self.assertEqual(len(expected), len(index))
+            self.assertEqual(expected.classes, index.class_names)
+            self.assertEqual(expected.targets, index.classes.tolist())
+            for i, (path, _) in enumerate(expected.samples):
+                self.assertEqual(Path(path), root / index.get_relative_path(i))
+
+    def test_load_or_create(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = create_image_folder(Path(tmp) / "root")
+            index_path = ImageFolderIndex.get_default_index_path(root)
+            index = ImageFolderIndex.load_or_create(root)
+            self.assertTrue(index_path.exists())
+            # index file is ignored by ImageFolder
+            self.assertEqual(len(ImageFolder(root=root)), len(index))
+            # reuse
+            loaded = ImageFolderIndex.load_or_create(root)
+            self.assertEqual(index.path_offsets.tolist(), loaded.path_offsets.tolist())
+            self.assertEqual(index.class_names, loaded.class_names)
+            # second load uses the saved index (saving the index into root doesn't invalidate it)
+            with patch.object(ImageFolderIndex, "create", side_effect=AssertionError):
+                ImageFolderIndex.load_or_create(root)
+            # adding a file invalidates the index
+            shutil.copyfile(root / "a" / "a_0.png", root / "a" / "a_new.png")
+            updated = ImageFolderIndex.load_or_create(root)
+            self.assertEqual(len(index) + 1, len(updated))
+            # adding a class invalidates the index
+            shutil.copytree(root / "a", root / "new_class")
+            updated = ImageFolderIndex.load_or_create(root)
+            self.assertIn("new_class", updated.class_names)
+
+    def test_copied_folder(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = create_image_folder(Path(tmp) / "root")
+            index_path = Path(tmp) / "index.npz"
+            ImageFolderIndex.load_or_create(root, index_path=index_path)
+            # index of a copied folder is validated via the autocopy_end.txt marker
+            copy = Path(tmp) / "copy"
+            shutil.copytree(root, copy)
+            (copy / "autocopy_end.txt").touch()
+            index = ImageFolderIndex.load_or_create(copy, index_path=index_path)
+            self.assertEqual(1, len(index.fingerprint))
+            self.assertEqual(len(ImageFolder(root=root)), len(index))
+
+    def test_kd_image_folder(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = create_image_folder(Path(tmp) / "root")
+            expected = KDImageFolder(root=root, transform=KDIdentityTransform())
+            ds = KDImageFolder(root=root, transform=KDIdentityTransform(), use_index=True)
+            self.assertEqual(len(expected), len(ds))
+            self.assertEqual(expected.getshape_class(), ds.getshape_class())
+            for i in range(len(ds)):
+                self.assertEqual(expected.getitem_class(i), ds.getitem_class(i))
+                self.assertEqual(np.asarray(expected.getitem_x(i)).tolist(), np.asarray(ds.getitem_x(i)).tolist())
@@ -0,0 +1,136 @@
+import random
+import unittest
+
+from torch.utils.data import DistributedSampler
+
+from kappadata.samplers.interleaved_sampler import InterleavedSampler, InterleavedSamplerConfig
+from kappadata.samplers.sequential_sampler import SequentialSampler
+
+
+def _reference_iter(sampler):
+    """ per-sample reference implementation of InterleavedSampler.__iter__ (before iter_batches was introduced) """
+
+    def _iter_interleaved(config_idx):
+        config = sampler.configs[config_idx]
+        index_offset = sampler.index_offsets[config_idx]
+        interleaved_batch_size = config.batch_size or sampler.batch_size
+        sample_in_interleaved = 0
+        for interleaved_idx in config.sampler:
+            sample_in_interleaved += 1
+            is_full_batch = (
+                    sample_in_interleaved % interleaved_batch_size == 0 or
+                    sample_in_interleaved == len(config.sampler)
+            )
+            yield is_full_batch, index_offset + interleaved_idx
+
+    if sampler.epochs == 0 or sampler.updates == 0 or sampler.samples == 0:
+        for config_idx in range(len(sampler.configs)):
+            yield from _iter_interleaved(config_idx)
+        return
+
+    samples_per_epoch = sampler._get_samples_per_epoch()
+    epoch = sampler.start_epoch
+    update = sampler.start_update
+    sample = sampler.start_sample
+    sample_in_update = 0
+    sample_at_last_update = sampler.start_sample
+    start_sample_in_epoch = sampler.start_sample - sampler.start_epoch * samples_per_epoch
+    while True:
+        sample_in_epoch = start_sample_in_epoch
+        if hasattr(sampler.main_sampler, "set_epoch"):
+            sampler.main_sampler.set_epoch(epoch)
+        main_iterator = sampler._iter_main_sampler(start_sample_in_epoch)
+        start_sample_in_epoch = 0
+        for main_idx in main_iterator:
+            sample += 1
+            sample_in_epoch += 1
+            sample_in_update += 1
+            is_update = sample_in_update == sampler.batch_size or sample_in_epoch == samples_per_epoch
+            yield is_update, main_idx
+            if not is_update:
+                continue
+            sample_in_update = 0
+            update += 1
+            if sample_in_epoch == samples_per_epoch:
+                epoch += 1
+            for config_idx, config in enumerate(sampler.configs):
+                should_iter = False
+                if config.every_n_epochs is not None:
+                    should_iter = sample_in_epoch == samples_per_epoch and epoch % config.every_n_epochs == 0
+                if config.every_n_updates is not None:
+                    should_iter = update % config.every_n_updates == 0
+                if config.every_n_samples is not None:
+                    if sample % config.every_n_samples == 0:
+                        should_iter = True
+                    elif sample_at_last_update // config.every_n_samples < sample // config.every_n_samples:
+                        should_iter = True
+                if should_iter:
+                    yield from _iter_interleaved(config_idx)
+            sample_at_last_update = sample
+            if (
+                    (sampler.epochs is not None and epoch == sampler.epochs) or
+                    (sampler.updates is not None and update == sampler.updates) or
+                    (sampler.samples is not None and sample >= sampler.samples)
+            ):
+                return
+            if sample_in_epoch == samples_per_epoch:
+                break
+
+
+class TestInterleavedSamplerIterBatches(unittest.TestCase):
+    @staticmethod
+    def _create_random_kwargs(rng):
+        main_size = rng.randint(1, 20)
+        batch_size = rng.randint(1, main_size)
+        drop_last = rng.random() < 0.5
+        drop_last_batch_size = None
+        if drop_last and rng.random() < 0.3:
+            factor = rng.randint(1, 3)
+            if batch_size * factor <= main_size:
+                drop_last_batch_size = batch_size * factor
+        if rng.random() < 0.5:
+            main_sampler = SequentialSampler(list(range(main_size)))
+        else:
+            main_sampler = DistributedSampler(
+                list(range(main_size)),
+                num_replicas=1,
+                rank=0,
+                shuffle=True,
+                seed=rng.randint(0, 100),
+            )
+        configs = []
+        for _ in range(rng.randint(0, 3)):
+            every_key = rng.choice(["every_n_epochs", "every_n_updates", "every_n_samples"])
+            configs.append(
+                InterleavedSamplerConfig(
+                    sampler=SequentialSampler(list(range(rng.randint(1, 7)))),
+                    batch_size=rng.choice([None, rng.randint(1, 5)]),
+                    **{every_key: rng.randint(1, 5)},
+                ),
+            )
+        duration_key = rng.choice(["epochs", "updates", "samples"])
+        return dict(
+            main_sampler=main_sampler,
+            batch_size=batch_size,
+            configs=configs,
+            drop_last=drop_last,
+            drop_last_batch_size=drop_last_batch_size,
+            **{duration_key: rng.randint(0, 12)},
+        )
+
+    def test_equivalent_to_reference(self):
+        rng = random.Random(0)
+        for i in range(300):
+            kwargs = self._create_random_kwargs(rng)
+            expected = list(_reference_iter(InterleavedSampler(**kwargs)))
+            self.assertEqual(expected, list(InterleavedSampler(**kwargs)), f"iteration={i}")
+            # batch_sampler groups by is_full_batch
+            expected_batches = []
+            batch = []
+            for is_full_batch, idx in expected:
+                batch.append(idx)
+                if is_full_batch:
+                    expected_batches.append(batch)
+                    batch = []
+            sampler = InterleavedSampler(**kwargs)
+            self.assertEqual(expected_batches, [batch for batch in sampler.batch_sampler], f"iteration={i}")
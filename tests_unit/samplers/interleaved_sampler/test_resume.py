@@ -0,0 +1,93 @@
+import unittest
+
+from torch.utils.data import DistributedSampler
+
+from kappadata.samplers.distributed_sampler import DistributedSampler as KDDistributedSampler
+from kappadata.samplers.interleaved_sampler import InterleavedSampler, InterleavedSamplerConfig
+from kappadata.samplers.sequential_sampler import SequentialSampler
+
+
+class TestInterleavedSamplerResume(unittest.TestCase):
+    @staticmethod
+    def _create_sampler(main_sampler, **kwargs):
+        return InterleavedSampler(
+            main_sampler=main_sampler,
+            configs=[
+                InterleavedSamplerConfig(sampler=SequentialSampler(list(range(3))), every_n_updates=4),
+                InterleavedSamplerConfig(sampler=SequentialSampler(list(range(2))), every_n_samples=7),
+                InterleavedSamplerConfig(sampler=SequentialSampler(list(range(2))), every_n_epochs=1),
+            ],
+            **kwargs,
+        )
+
+    def _test_resume(self, main_sampler_fn, batch_size, drop_last, drop_last_batch_size=None):
+        kwargs = dict(batch_size=batch_size, drop_last=drop_last, drop_last_batch_size=drop_last_batch_size, epochs=3)
+        full_sampler = self._create_sampler(main_sampler_fn(), **kwargs)
+        # _InterleavedBatchSampler doesn't implement __len__ -> list(...) doesn't work
+        batches = [batch for batch in full_sampler.batch_sampler]
+        # indices of interleaved datasets are offset by the length of the main dataset
+        is_main = [batch[0] < full_sampler.index_offsets[0] for batch in batches]
+        main_batch_positions = [i for i in range(len(batches)) if is_main[i]]
+        sample = 0
+        for update in range(1, len(main_batch_positions)):
+            sample += len(batches[main_batch_positions[update - 1]])
+            expected = batches[main_batch_positions[update]:]
+            # resume from update
+            sampler = self._create_sampler(main_sampler_fn(), start_update=update, **kwargs)
+            self.assertEqual(sample, sampler.start_sample)
+            self.assertEqual(expected, [batch for batch in sampler.batch_sampler], f"start_update={update}")
+            # resume from sample
+            sampler = self._create_sampler(main_sampler_fn(), start_sample=sample, **kwargs)
+            self.assertEqual(update, sampler.start_update)
+            self.assertEqual(expected, [batch for batch in sampler.batch_sampler], f"start_sample={sample}")
+
+    def test_sequential_droplast(self):
+        self._test_resume(lambda: SequentialSampler(list(range(10))), batch_size=3, drop_last=True)
+
+    def test_sequential_nodroplast(self):
+        self._test_resume(lambda: SequentialSampler(list(range(10))), batch_size=3, drop_last=False)
+
+    def test_sequential_droplastbatchsize(self):
+        self._test_resume(
+            lambda: SequentialSampler(list(range(11))),
+            batch_size=2,
+            drop_last=True,
+            drop_last_batch_size=4,
+        )
+
+    def test_shuffled_nodroplast(self):
+        # no iter_from -> skipped indices are generated
+        self._test_resume(
+            lambda: DistributedSampler(list(range(10)), num_replicas=1, rank=0, shuffle=True, seed=5),
+            batch_size=4,
+            drop_last=False,
+        )
+
+    def test_kd_distributed_nodroplast(self):
+        # iter_from -> resumes without generating the skipped indices
+        self._test_resume(
+            lambda: KDDistributedSampler(list(range(10)), num_replicas=1, rank=0, shuffle=True, seed=5),
+            batch_size=4,
+            drop_last=False,
+        )
+
+    def test_kd_distributed_repeated_droplast(self):
+        self._test_resume(
+            lambda: KDDistributedSampler(list(range(11)), num_replicas=2, rank=1, seed=5, num_repeats=2),
+            batch_size=2,
+            drop_last=True,
+        )
+
+    def test_start_epoch(self):
+        kwargs = dict(batch_size=3, drop_last=False, epochs=3)
+        sampler = self._create_sampler(SequentialSampler(list(range(10))), start_epoch=2, **kwargs)
+        self.assertEqual(8, sampler.start_update)
+        self.assertEqual(20, sampler.start_sample)
+        self.assertEqual(
+            list(self._create_sampler(SequentialSampler(list(range(10))), start_update=8, **kwargs)),
+            list(sampler),
+        )
+
+    def test_start_sample_inside_update(self):
+        with self.assertRaises(AssertionError):
+            self._create_sampler(SequentialSampler(list(range(10))), batch_size=3, epochs=1, start_sample=4)
@@ -32,5 +32,35 @@ class TestClassBalancedSampler(unittest.TestCase):
         indices = [i for i in sampler]
         classes = torch.tensor([ds.getitem_class(i) for i in indices])
         _, counts = classes.unique(return_counts=True)
-        self.assertEqual([4, 1, 0, 2, 4, 3], indices)
-        self.assertEqual([3, 3], counts.tolist())
\ No newline at end of file
+        self.assertEqual([3, 4, 4, 0, 1, 2], indices)
+        self.assertEqual([3, 3], counts.tolist())
+
+    def test_sample_replacement(self):
+        ds = ClassDataset(classes=[0, 1, 1, 1, 0])
+        sampler = ClassBalancedSampler(ds, shuffle=True, seed=0, replacement=True)
+        indices = [i for i in sampler]
+        classes = torch.tensor([ds.getitem_class(i) for i in indices])
+        _, counts = classes.unique(return_counts=True)
+        self.assertEqual([1, 0, 4, 3, 3, 0], indices)
+        self.assertEqual([3, 3], counts.tolist())
+
+    def test_sample_without_replacement_uses_all_samples(self):
+        classes = torch.randint(5, size=(100,), generator=torch.Generator().manual_seed(0))
+        classes[:5] = torch.arange(5)
+        ds = ClassDataset(classes=classes.tolist())
+        sampler = ClassBalancedSampler(ds, shuffle=True, samples_per_class=50)
+        indices = torch.tensor([i for i in sampler])
+        self.assertEqual([50] * 5, classes[indices].bincount().tolist())
+        # each sample of a class is sampled floor(50 / count) or ceil(50 / count) times
+        usage = indices.bincount(minlength=len(classes))
+        expected = 50 / classes.bincount()[classes]
+        self.assertTrue(torch.all(expected.floor() <= usage))
+        self.assertTrue(torch.all(usage <= expected.ceil()))
+
+    def test_distributed(self):
+        ds = ClassDataset(classes=[0, 1, 1, 1, 0, 2, 2])
+        samplers = [ClassBalancedSampler(ds, seed=3, rank=rank, world_size=2) for rank in range(2)]
+        sampler = ClassBalancedSampler(ds, seed=3, rank=0, world_size=1)
+        self.assertEqual([4, 4], [len(s) for s in samplers])
+        rank0, rank1 = [[i for i in s] for s in samplers]
+        self.assertEqual([i for i in sampler][:8], [i for pair in zip(rank0, rank1) for i in pair])
@@ -22,3 +22,12 @@ class TestDistributedSampler(unittest.TestCase):
         self.assertEqual([2, 2, 3], list(iter(kd0)))
         self.assertEqual([2, 3, 3], list(iter(kd1)))
         self.assertEqual([2, 3, 1], list(iter(kd2)))
+
+    def test_iter_from(self):
+        ds = list(range(10))
+        for num_repeats in [1, 3]:
+            sampler = DistributedSampler(ds, num_repeats=num_repeats, rank=1, num_replicas=2, seed=3)
+            sampler.set_epoch(2)
+            indices = list(sampler)
+            for start in range(len(indices) + 1):
+                self.assertEqual(indices[start:], list(sampler.iter_from(start)))
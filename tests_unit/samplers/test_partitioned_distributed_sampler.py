@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import patch
+
+from kappadata.samplers.partitioned_distributed_sampler import PartitionedDistributedSampler, get_partition_indices
+
+
+class TestPartitionedDistributedSampler(unittest.TestCase):
+    def test_get_partition_indices(self):
+        partitions = [get_partition_indices(10, num_partitions=3, partition_idx=i) for i in range(3)]
+        self.assertEqual([4, 3, 3], [len(partition) for partition in partitions])
+        self.assertEqual(list(range(10)), sorted(idx for partition in partitions for idx in partition.tolist()))
+        for partition in partitions:
+            self.assertEqual(sorted(partition.tolist()), partition.tolist())
+        # deterministic
+        self.assertEqual(partitions[1].tolist(), get_partition_indices(10, num_partitions=3, partition_idx=1).tolist())
+
+    def _create_samplers(self, world_size, **kwargs):
+        return [
+            PartitionedDistributedSampler(list(range(10)), rank=rank, world_size=world_size, **kwargs)
+            for rank in range(world_size)
+        ]
+
+    def test_ranks_stay_in_partition(self):
+        samplers = self._create_samplers(world_size=4, num_partitions=2)
+        for epoch in range(3):
+            for sampler in samplers:
+                sampler.set_epoch(epoch)
+            indices = [list(sampler) for sampler in samplers]
+            self.assertTrue(all(len(sampler) == len(rank_indices) for sampler, rank_indices in zip(samplers, indices)))
+            # ranks 0/1 use partition 0 and ranks 2/3 use partition 1
+            for rank, rank_indices in enumerate(indices):
+                self.assertTrue(set(rank_indices).issubset(samplers[0].partitions[rank // 2].tolist()))
+            # partitions are padded to be divisible by the number of ranks per partition
+            self.assertEqual(set(samplers[0].partitions[0].tolist()), set(indices[0] + indices[1]))
+            self.assertEqual(set(samplers[0].partitions[1].tolist()), set(indices[2] + indices[3]))
+
+    def test_shuffle_per_epoch(self):
+        sampler = self._create_samplers(world_size=1, num_partitions=1)[0]
+        epoch0 = list(sampler)
+        sampler.set_epoch(1)
+        epoch1 = list(sampler)
+        self.assertNotEqual(epoch0, epoch1)
+        self.assertEqual(list(range(10)), sorted(epoch0))
+        self.assertEqual(list(range(10)), sorted(epoch1))
+
+    def test_noshuffle(self):
+        sampler = self._create_samplers(world_size=3, num_partitions=3, shuffle=False)[1]
+        self.assertEqual(sampler.partitions[1].tolist() + sampler.partitions[1][:1].tolist(), list(sampler))
+
+    def test_equal_length(self):
+        for drop_last, expected_len in [(False, 2), (True, 1)]:
+            samplers = self._create_samplers(world_size=6, num_partitions=3, drop_last=drop_last)
+            self.assertEqual([expected_len] * 6, [len(list(sampler)) for sampler in samplers])
+
+    def test_rotate(self):
+        samplers = self._create_samplers(world_size=2, num_partitions=2, rotate_every_epochs=2)
+        self.assertEqual([0, 0, 1, 1, 0], [samplers[0].get_partition_idx(epoch) for epoch in range(5)])
+        self.assertEqual([1, 1, 0, 0, 1], [samplers[1].get_partition_idx(epoch) for epoch in range(5)])
+        samplers[0].set_epoch(2)
+        self.assertTrue(set(samplers[0]).issubset(samplers[0].partitions[1].tolist()))
+
+    def test_explicit_rank0(self):
+        module = "kappadata.samplers.partitioned_distributed_sampler"
+        with patch(f"{module}.get_rank", return_value=1), patch(f"{module}.get_world_size", return_value=2):
+            sampler = PartitionedDistributedSampler(list(range(10)), num_partitions=1, rank=0, world_size=1)
+        self.assertEqual(0, sampler.rank)
+        self.assertEqual(1, sampler.world_size)
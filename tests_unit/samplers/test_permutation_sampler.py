@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from kappadata.samplers.interleaved_sampler import InterleavedSampler
+from kappadata.samplers.permutation_sampler import FeistelPermutation, PermutationSampler
+
+
+class TestPermutationSampler(unittest.TestCase):
+    def test_feistel_is_permutation(self):
+        for size in [1, 2, 3, 7, 16, 17, 1000, 4097]:
+            perm = FeistelPermutation(size, seed=size)
+            self.assertEqual(list(range(size)), sorted(perm.get(np.arange(size)).tolist()))
+
+    def test_feistel_seed(self):
+        perm0 = FeistelPermutation(1000, seed=0).get(np.arange(1000)).tolist()
+        self.assertEqual(perm0, FeistelPermutation(1000, seed=0).get(np.arange(1000)).tolist())
+        self.assertNotEqual(perm0, FeistelPermutation(1000, seed=1).get(np.arange(1000)).tolist())
+        self.assertNotEqual(list(range(1000)), perm0)
+
+    def test_feistel_random_access(self):
+        perm = FeistelPermutation(10 ** 12, seed=3)
+        idxs = np.array([0, 5, 10 ** 12 - 1])
+        values = perm.get(idxs)
+        self.assertTrue(np.all(values < 10 ** 12))
+        self.assertEqual([perm[int(idx)] for idx in idxs], values.tolist())
+
+    def test_ranks_partition_dataset(self):
+        for drop_last in [False, True]:
+            samplers = [
+                PermutationSampler(list(range(10)), rank=rank, world_size=3, drop_last=drop_last, chunk_size=2)
+                for rank in range(3)
+            ]
+            indices = [list(sampler) for sampler in samplers]
+            self.assertEqual([len(samplers[0])] * 3, [len(rank_indices) for rank_indices in indices])
+            all_indices = [idx for rank_indices in indices for idx in rank_indices]
+            if drop_last:
+                self.assertEqual(9, len(set(all_indices)))
+            else:
+                self.assertEqual(list(range(10)), sorted(set(all_indices)))
+                self.assertEqual(12, len(all_indices))
+
+    def test_epoch(self):
+        sampler = PermutationSampler(list(range(100)), rank=0, world_size=1)
+        epoch0 = list(sampler)
+        sampler.set_epoch(1)
+        epoch1 = list(sampler)
+        self.assertNotEqual(epoch0, epoch1)
+        self.assertEqual(list(range(100)), sorted(epoch1))
+        sampler.set_epoch(0)
+        self.assertEqual(epoch0, list(sampler))
+
+    def test_noshuffle(self):
+        sampler = PermutationSampler(list(range(10)), rank=1, world_size=3, shuffle=False)
+        self.assertEqual([1, 4, 7, 0], list(sampler))
+
+    def test_iter_from(self):
+        sampler = PermutationSampler(list(range(50)), rank=1, world_size=2, chunk_size=7)
+        indices = list(sampler)
+        self.assertEqual(indices[13:], list(sampler.iter_from(13)))
+        self.assertEqual(indices[13], sampler[13])
+
+    def test_num_repeats(self):
+        sampler = PermutationSampler(list(range(12)), rank=0, world_size=1, num_repeats=3)
+        indices = list(sampler)
+        self.assertEqual(12, len(indices))
+        for i in range(0, 12, 3):
+            self.assertEqual([indices[i]] * 3, indices[i:i + 3])
+
+    def test_interleaved_resume(self):
+        def _create(**kwargs):
+            return InterleavedSampler(
+                main_sampler=PermutationSampler(list(range(10)), rank=0, world_size=1),
+                batch_size=3,
+                drop_last=False,
+                epochs=2,
+                **kwargs,
+            )
+
+        batches = [batch for batch in _create().batch_sampler]
+        self.assertEqual(batches[5:], [batch for batch in _create(start_update=5).batch_sampler])
+
+    def test_explicit_rank0(self):
+        module = "kappadata.samplers.permutation_sampler"
+        with patch(f"{module}.get_rank", return_value=1), patch(f"{module}.get_world_size", return_value=2):
+            sampler = PermutationSampler(list(range(10)), rank=0, world_size=1)
+        self.assertEqual(0, sampler.rank)
+        self.assertEqual(1, sampler.world_size)
@@ -18,3 +18,11 @@ class TestRandomSampler(unittest.TestCase):
         ds = list(range(10))
         kd = RandomSampler(ds, num_repeats=3, generator=torch.Generator().manual_seed(seed))
         self.assertEqual([2, 2, 2, 3, 3, 3, 1, 1, 1, 9], list(iter(kd)))
+
+    def test_iter_from(self):
+        ds = list(range(10))
+        for num_repeats in [1, 3]:
+            indices = list(RandomSampler(ds, num_repeats=num_repeats, generator=torch.Generator().manual_seed(5)))
+            for start in range(len(indices) + 1):
+                sampler = RandomSampler(ds, num_repeats=num_repeats, generator=torch.Generator().manual_seed(5))
+                self.assertEqual(indices[start:], list(sampler.iter_from(start)))
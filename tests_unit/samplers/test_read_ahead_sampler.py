@@ -0,0 +1,129 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Subset
+
+from kappadata.caching.read_ahead_buffer import ReadAheadBuffer
+from kappadata.common.datasets.kd_image_folder import KDImageFolder
+from kappadata.samplers.random_sampler import RandomSampler
+from kappadata.samplers.read_ahead_sampler import ReadAheadSampler
+from kappadata.transforms import KDIdentityTransform
+from kappadata.wrappers.dataset_wrappers.shuffle_wrapper import ShuffleWrapper
+from kappadata.wrappers.mode_wrapper import ModeWrapper
+from tests_util.image_folder import create_image_folder
+
+
+class TestReadAheadSampler(unittest.TestCase):
+    def test_order_and_reads(self):
+        data = [bytes([i]) * (i + 1) for i in range(10)]
+        buffer = ReadAheadBuffer(num_slots=len(data), num_bytes=1000)
+        try:
+            sampler = ReadAheadSampler(
+                sampler=RandomSampler(data, generator=torch.Generator().manual_seed(0)),
+                buffer=buffer,
+                read_fn=data.__getitem__,
+                num_ahead=3,
+                num_threads=2,
+            )
+            expected = list(RandomSampler(data, generator=torch.Generator().manual_seed(0)))
+            idxs = []
+            for idx in sampler:
+                # wait for the read of the current sample
+                for _ in range(100):
+                    if idx in buffer:
+                        break
+                    time.sleep(0.01)
+                self.assertEqual(data[idx], buffer.get(idx))
+                idxs.append(idx)
+            self.assertEqual(expected, idxs)
+            self.assertEqual(len(data), len(sampler))
+        finally:
+            buffer.dispose()
+
+    def test_early_stop(self):
+        buffer = ReadAheadBuffer(num_slots=100, num_bytes=1000)
+        try:
+            sampler = ReadAheadSampler(range(100), buffer=buffer, read_fn=lambda i: b"x", num_ahead=4)
+            for i, idx in enumerate(sampler):
+                if i == 5:
+                    break
+        finally:
+            buffer.dispose()
+
+    def test_kd_image_folder_dataloader(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = create_image_folder(Path(tmp) / "root", num_samples_per_class=5)
+            buffer = ReadAheadBuffer(num_slots=10, num_bytes=2 ** 20)
+            try:
+                ds = KDImageFolder(root=root, transform=KDIdentityTransform(), read_ahead_buffer=buffer)
+                sampler = ReadAheadSampler(
+                    sampler=RandomSampler(ds, generator=torch.Generator().manual_seed(0)),
+                    buffer=buffer,
+                    path_fn=ds.get_path,
+                    num_ahead=4,
+                )
+                loader = DataLoader(
+                    ModeWrapper(ds, mode="index x"),
+                    sampler=sampler,
+                    batch_size=2,
+                    num_workers=2,
+                    collate_fn=lambda batch: batch,
+                )
+                for batch in loader:
+                    for idx, x in batch:
+                        expected = KDImageFolder(root=root, transform=KDIdentityTransform()).getitem_x(idx)
+                        self.assertEqual(np.asarray(expected).tolist(), np.asarray(x).tolist())
+                self.assertGreater(buffer.hits + buffer.misses, 0)
+            finally:
+                buffer.dispose()
+
+    def _test_kd_image_folder_wrapped(self, wrap_fn):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = create_image_folder(Path(tmp) / "root", num_samples_per_class=5)
+            buffer = ReadAheadBuffer(num_slots=10, num_bytes=2 ** 20)
+            try:
+                ds = KDImageFolder(root=root, transform=KDIdentityTransform(), read_ahead_buffer=buffer)
+                wrapped = wrap_fn(ds)
+                self.assertNotEqual(list(range(len(ds))), list(wrapped.indices))
+                read_idxs = []
+
+                def path_fn(idx):
+                    read_idxs.append(idx)
+                    return ds.get_path(idx)
+
+                sampler = ReadAheadSampler(
+                    sampler=RandomSampler(wrapped, generator=torch.Generator().manual_seed(0)),
+                    buffer=buffer,
+                    path_fn=path_fn,
+                    num_ahead=2,
+                    num_threads=1,
+                )
+                root_idxs = []
+                for idx in sampler:
+                    # samples are read and stored under the index of the root dataset
+                    root_idx = int(wrapped.indices[idx])
+                    for _ in range(100):
+                        if root_idx in buffer:
+                            break
+                        time.sleep(0.01)
+                    root_idxs.append(root_idx)
+                self.assertEqual(root_idxs, read_idxs[:len(root_idxs)])
+                reference = KDImageFolder(root=root, transform=KDIdentityTransform())
+                for root_idx in root_idxs:
+                    self.assertIn(root_idx, buffer)
+                    expected = reference.getitem_x(root_idx)
+                    actual = ds.getitem_x(root_idx)
+                    self.assertEqual(np.asarray(expected).tolist(), np.asarray(actual).tolist())
+                self.assertEqual(len(ds), buffer.hits)
+            finally:
+                buffer.dispose()
+
+    def test_kd_image_folder_shuffle_wrapper(self):
+        self._test_kd_image_folder_wrapped(lambda ds: ShuffleWrapper(ds, seed=0))
+
+    def test_kd_image_folder_subset(self):
+        self._test_kd_image_folder_wrapped(lambda ds: Subset(ds, indices=list(reversed(range(len(ds))))))
@@ -44,4 +44,43 @@ class TestWeightedSampler(unittest.TestCase):
         sampler = WeightedSampler(ds, weights=weights)
         self.assertEqual(10, len(sampler))
         samples = torch.tensor([i for i in sampler])
-        self.assertEqual(10, samples.unique().numel())
\ No newline at end of file
+        self.assertEqual(10, samples.unique().numel())
+
+    def test_replacement_size_larger_than_nonzero_weights(self):
+        ds = torch.arange(10)
+        weights = torch.zeros(10)
+        weights[[2, 5]] = torch.tensor([1., 3.])
+        for use_sum_tree in [False, True]:
+            sampler = WeightedSampler(ds, weights=weights, size=4000, replacement=True, use_sum_tree=use_sum_tree)
+            self.assertEqual(4000, len(sampler))
+            samples = torch.tensor([i for i in sampler])
+            self.assertEqual([2, 5], samples.unique().tolist())
+            self.assertLess(abs((samples == 5).float().mean().item() - 0.75), 0.05)
+
+    def test_replacement_deterministic(self):
+        ds = torch.arange(100)
+        weights = torch.rand(100, generator=torch.Generator().manual_seed(0))
+        sampler = WeightedSampler(ds, weights=weights, replacement=True, chunk_size=7)
+        samples1 = [i for i in sampler]
+        self.assertEqual(samples1, [i for i in sampler])
+        sampler.set_epoch(1)
+        self.assertNotEqual(samples1, [i for i in sampler])
+        # length doesnt influence sampling
+        sampler = WeightedSampler(ds, weights=weights, size=50, replacement=True, chunk_size=7)
+        self.assertEqual(samples1[:50], [i for i in sampler])
+
+    def test_replacement_ranks(self):
+        ds = torch.arange(100)
+        weights = torch.rand(100, generator=torch.Generator().manual_seed(0))
+        samplers = [WeightedSampler(ds, weights=weights, replacement=True, rank=i, world_size=2) for i in range(2)]
+        self.assertEqual([50, 50], [len(sampler) for sampler in samplers])
+        self.assertNotEqual(*[[i for i in sampler] for sampler in samplers])
+
+    def test_update_weights(self):
+        ds = torch.arange(10)
+        weights = torch.ones(10)
+        for use_sum_tree in [False, True]:
+            sampler = WeightedSampler(ds, weights=weights, size=100, replacement=True, use_sum_tree=use_sum_tree)
+            sampler.update_weights(torch.arange(9), torch.zeros(9))
+            self.assertEqual([9] * 100, [i for i in sampler])
+            self.assertEqual(10, weights.sum().item())
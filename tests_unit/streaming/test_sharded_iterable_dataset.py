@@ -0,0 +1,100 @@
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import torch
+from torch.utils.data import DataLoader
+
+from kappadata.streaming.create_shards import create_shards
+from kappadata.streaming.sharded_iterable_dataset import ShardedIterableDataset
+from kappadata.wrappers.mode_wrapper import ModeWrapper
+from tests_util.datasets import ClassificationDataset
+
+
+class TestShardedIterableDataset(unittest.TestCase):
+    @staticmethod
+    def _create_shards(dst, size=20, num_bytes_per_shard=200):
+        ds = ClassificationDataset(x=[bytes([i]) * 10 for i in range(size)], classes=list(range(size)))
+        create_shards(ModeWrapper(ds, mode="index x class"), dst=dst, num_bytes_per_shard=num_bytes_per_shard)
+
+    def test_noshuffle(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._create_shards(tmp)
+            ds = ShardedIterableDataset(tmp, shuffle=False)
+            self.assertLess(1, len(ds.shard_names))
+            samples = list(ds)
+            self.assertEqual(20, len(ds))
+            self.assertEqual(list(range(20)), [idx for idx, _, _ in samples])
+            self.assertEqual([(bytes([i]) * 10, i) for i in range(20)], [(x, y) for _, x, y in samples])
+
+    def test_shuffle(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._create_shards(tmp)
+            ds = ShardedIterableDataset(tmp, shuffle=True, shuffle_buffer_size=5, seed=3)
+            epoch0 = [idx for idx, _, _ in ds]
+            self.assertEqual(epoch0, [idx for idx, _, _ in ds])
+            self.assertEqual(list(range(20)), sorted(epoch0))
+            self.assertNotEqual(list(range(20)), epoch0)
+            ds.set_epoch(1)
+            epoch1 = [idx for idx, _, _ in ds]
+            self.assertEqual(list(range(20)), sorted(epoch1))
+            self.assertNotEqual(epoch0, epoch1)
+
+    def test_distributed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._create_shards(tmp, size=23, num_bytes_per_shard=100)
+            idxs = []
+            for rank in range(2):
+                ds = ShardedIterableDataset(tmp, rank=rank, world_size=2, seed=1)
+                rank_idxs = [idx for idx, _, _ in ds]
+                self.assertEqual(len(ds), len(rank_idxs))
+                idxs.append(rank_idxs)
+            self.assertEqual(len(idxs[0]), len(idxs[1]))
+            self.assertEqual(0, len(set(idxs[0]) & set(idxs[1])))
+
+    def test_dataloader_workers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._create_shards(tmp)
+            ds = ShardedIterableDataset(tmp, transform=lambda sample: sample[0])
+            loader = DataLoader(ds, batch_size=4, num_workers=2)
+            idxs = torch.concat(list(loader)).tolist()
+            self.assertEqual(list(range(20)), sorted(idxs))
+
+    def test_distributed_dataloader_workers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            # shards with 4 samples + 1 shard with 1 sample -> unequal number of samples per shard/worker
+            self._create_shards(tmp, size=37, num_bytes_per_shard=100)
+            for shuffle in [False, True]:
+                idxs = []
+                num_batches = []
+                for rank in range(2):
+                    ds = ShardedIterableDataset(
+                        tmp,
+                        transform=lambda sample: sample[0],
+                        shuffle=shuffle,
+                        shuffle_buffer_size=4,
+                        rank=rank,
+                        world_size=2,
+                        seed=2,
+                    )
+                    batches = list(DataLoader(ds, batch_size=3, num_workers=3))
+                    rank_idxs = torch.concat(batches).tolist()
+                    self.assertEqual(len(ds), len(rank_idxs))
+                    self.assertEqual(len(rank_idxs), len(set(rank_idxs)))
+                    idxs.append(rank_idxs)
+                    num_batches.append(len(batches))
+                    # samples are split evenly among workers -> each worker yields at most one partial batch
+                    worker_lengths = [len(ds) // 3 + int(i < len(ds) % 3) for i in range(3)]
+                    self.assertEqual(sum(-(-length // 3) for length in worker_lengths), len(batches))
+                # same number of batches on all ranks
+                self.assertEqual(num_batches[0], num_batches[1])
+                self.assertEqual(0, len(set(idxs[0]) & set(idxs[1])))
+
+    def test_rank0_is_not_overwritten(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self._create_shards(tmp)
+            module = "kappadata.streaming.sharded_iterable_dataset"
+            with patch(f"{module}.get_rank", return_value=1), patch(f"{module}.get_world_size", return_value=2):
+                ds = ShardedIterableDataset(tmp, rank=0, world_size=1)
+            self.assertEqual(0, ds.rank)
+            self.assertEqual(1, ds.world_size)
@@ -4,6 +4,8 @@ import torch
 
 from kappadata.common.transforms.norm.kd_image_net_norm import KDImageNetNorm
 from kappadata.transforms.base.kd_compose_transform import KDComposeTransform
+from kappadata.transforms.base.kd_scheduled_transform import KDScheduledTransform
+from kappadata.transforms.kd_resize import KDResize
 from kappadata.transforms.kd_random_gaussian_blur_pil import KDRandomGaussianBlurPIL
 from kappadata.transforms.kd_random_grayscale import KDRandomGrayscale
 
@@ -22,3 +24,20 @@ class TestKDComposeTransform(unittest.TestCase):
             self.assertEqual(0.2 * factor, grayscale.p)
             self.assertEqual(0.1, blur.gaussian_blur.sigma_lb)
             self.assertEqual(0.1 + (2.0 - 0.1) * factor, blur.gaussian_blur.sigma_ub)
+
+    def test_split_deterministic_prefix(self):
+        resize = KDResize(size=32)
+        grayscale = KDRandomGrayscale(p=0.2)
+        norm = KDImageNetNorm()
+        prefix, suffix = KDComposeTransform([resize, norm, grayscale, resize]).split_deterministic_prefix()
+        self.assertEqual([resize, norm], prefix.transforms)
+        self.assertEqual([grayscale, resize], suffix.transforms)
+
+        prefix, suffix = KDComposeTransform([grayscale, norm]).split_deterministic_prefix()
+        self.assertEqual([], prefix.transforms)
+        self.assertEqual([grayscale, norm], suffix.transforms)
+
+        scheduled = KDScheduledTransform(norm)
+        prefix, suffix = KDComposeTransform([norm, scheduled]).split_deterministic_prefix()
+        self.assertEqual([norm], prefix.transforms)
+        self.assertEqual([scheduled], suffix.transforms)
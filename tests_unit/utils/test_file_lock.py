@@ -0,0 +1,18 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from kappadata.utils.file_lock import FileLock
+
+
+class TestFileLock(unittest.TestCase):
+    def test_exclusive(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            lock0 = FileLock(Path(tmp) / "lock")
+            lock1 = FileLock(Path(tmp) / "lock")
+            with lock0:
+                self.assertTrue(lock0.is_locked)
+                self.assertFalse(lock1.acquire(blocking=False))
+            self.assertFalse(lock0.is_locked)
+            self.assertTrue(lock1.acquire(blocking=False))
+            lock1.release()
@@ -3,7 +3,7 @@ import unittest
 import torch
 from torchvision.transforms.functional import to_pil_image
 
-from kappadata.utils.image_utils import get_dimensions
+from kappadata.utils.image_utils import get_dimensions, get_resized_size
 
 
 class TestImageUtils(unittest.TestCase):
@@ -20,3 +20,11 @@ class TestImageUtils(unittest.TestCase):
         pil = to_pil_image(tensor)
         self.assertEqual(shape, get_dimensions(tensor))
         self.assertEqual(shape, get_dimensions(pil))
+
+    def test_get_resized_size(self):
+        # (height, width) with the shorter side resized to max_short_side
+        self.assertEqual((20, 40), get_resized_size(width=80, height=40, max_short_side=20))
+        self.assertEqual((40, 20), get_resized_size(width=40, height=80, max_short_side=20))
+        # never upscaled
+        self.assertEqual((10, 30), get_resized_size(width=30, height=10, max_short_side=20))
+        self.assertEqual((10, 30), get_resized_size(width=30, height=10, max_short_side=None))
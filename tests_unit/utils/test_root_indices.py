@@ -0,0 +1,21 @@
+import unittest
+
+from torch.utils.data import Subset
+
+from kappadata.utils.root_indices import get_root_index_mapping
+from kappadata.wrappers.mode_wrapper import ModeWrapper
+from tests_util.datasets.index_dataset import IndexDataset
+
+
+class TestRootIndices(unittest.TestCase):
+    def test_root(self):
+        self.assertIsNone(get_root_index_mapping(IndexDataset(size=5)))
+        self.assertIsNone(get_root_index_mapping(list(range(5))))
+
+    def test_nested_subsets(self):
+        ds = Subset(Subset(IndexDataset(size=5), indices=[4, 3, 2, 1, 0]), indices=[0, 0, 2])
+        self.assertEqual([4, 4, 2], get_root_index_mapping(ds).tolist())
+
+    def test_mode_wrapper(self):
+        ds = Subset(ModeWrapper(IndexDataset(size=5), mode="x"), indices=[1, 3])
+        self.assertEqual([1, 3], get_root_index_mapping(ds).tolist())
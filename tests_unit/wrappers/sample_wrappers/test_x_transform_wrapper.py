@@ -3,7 +3,7 @@ import unittest
 import numpy as np
 import torch
 
-from kappadata.transforms import KDAdditiveGaussianNoise
+from kappadata.transforms import KDAdditiveGaussianNoise, KDComposeTransform, KDRearrange, KDTransform
 from kappadata.wrappers.sample_wrappers import XTransformWrapper
 from tests_util.datasets.x_dataset import XDataset
 
@@ -22,3 +22,42 @@ class TestXTransformWrapper(unittest.TestCase):
         ds = XTransformWrapper(dataset=ds, transform=transform)
         for i in range(len(ds)):
             self.assertNotEqual(ds.getitem_x(i).tolist(), ds.getitem_x(i).tolist())
+
+    def test_prefix_cache(self):
+        x = torch.randn(10, 5, generator=torch.Generator().manual_seed(5))
+        transform = KDComposeTransform([
+            KDRearrange("dim -> dim"),
+            KDAdditiveGaussianNoise(std=1.),
+        ])
+        expected_ds = XTransformWrapper(dataset=XDataset(x=x), transform=transform, seed=5)
+        expected = [expected_ds.getitem_x(i).tolist() for i in range(len(expected_ds))]
+        with XTransformWrapper(dataset=XDataset(x=x), transform=transform, seed=5, prefix_cache_num_bytes=10000) as ds:
+            self.assertEqual(1, len(ds.prefix_transform.transforms))
+            self.assertEqual(1, len(ds.suffix_transform.transforms))
+            for _ in range(2):
+                self.assertEqual(expected, [ds.getitem_x(i).tolist() for i in range(len(ds))])
+            self.assertEqual(10, ds.prefix_cache.hits)
+            self.assertEqual(10, ds.prefix_cache.misses)
+
+    def test_prefix_cache_ctx(self):
+        class KDSumToCtx(KDTransform):
+            def __call__(self, x, ctx=None):
+                if ctx is not None:
+                    ctx["sum"] = x.sum().item()
+                return x
+
+        x = torch.randn(10, 5, generator=torch.Generator().manual_seed(5))
+        transform = KDComposeTransform([KDSumToCtx(), KDAdditiveGaussianNoise(std=1.)])
+        with XTransformWrapper(dataset=XDataset(x=x), transform=transform, seed=5, prefix_cache_num_bytes=10000) as ds:
+            self.assertEqual(1, len(ds.prefix_transform.transforms))
+            for _ in range(2):
+                for i in range(len(ds)):
+                    ctx = dict(existing=i)
+                    ds.getitem_x(i, ctx=ctx)
+                    self.assertEqual(i, ctx["existing"])
+                    self.assertEqual(x[i].sum().item(), ctx["sum"])
+                    self.assertIn("KDAdditiveGaussianNoise.magnitude", ctx)
+                    # ctx=None is also supported
+                    ds.getitem_x(i)
+            self.assertEqual(30, ds.prefix_cache.hits)
+            self.assertEqual(10, ds.prefix_cache.misses)
@@ -0,0 +1,17 @@
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+
+def create_image_folder(root, class_names=("a", "b"), num_samples_per_class=3, sizes=((20, 30), (32, 24)), seed=0):
+    """ creates an image folder with random png images of the given (height, width) sizes """
+    root = Path(root)
+    rng = np.random.default_rng(seed=seed)
+    for class_name in class_names:
+        (root / class_name).mkdir(parents=True)
+        for i in range(num_samples_per_class):
+            height, width = sizes[i % len(sizes)]
+            img = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+            Image.fromarray(img).save(root / class_name / f"{class_name}_{i}.png")
+    return root